@@ -10,9 +10,605 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, date
+from dataset_registry import fingerprint_sources, tag_dataset, dataset_key, register_dataset, get_dataset
+from aggregate_cache import cached_aggregate, freeze
+import disk_cache
+from background_precompute import preempts_background, schedule_precompute, show_precompute_progress
+from ui_fragments import fragment
+from data_grid import render_data_grid
+from data_export import render_export_panel
+from cohort_engine import COHORT_FREQUENCIES, cohort_curves, cohort_summary
+from dataset_linking import join_stages
+from admission_query import (ADMISSION_DB_FILE, ADMISSION_MULTISELECT_FILTERS, ADMISSION_RANGE_FILTERS, FrameQuery,
+                             SqlQuery, database_key, distinct_values, column_bounds, build_admission_sketch_cube,
+                             admission_sketch_distribution, database_sketch_cube)
+from quantile_sketch import STATISTICS
+from column_stats import build_column_stats, dataset_column_stats, stat_bounds, stat_values, prune_row_groups
+from memory_optimizer import (optimize_dataset, drop_unused_categories, concat_frames, memory_report,
+                              record_combined_report)
+from admission_history import (ADMISSION_HISTORY_DIR, list_partitions, history_years, history_levels, select_partitions,
+                               partition_version)
+import os
+import functools
 import warnings
 warnings.filterwarnings('ignore')
 
+DEFAULT_DATA_FILE = '2025 admissions  - primary only (1).csv'
+
+# Columns whose statistics (zone maps) are recorded at ingest for the sidebar and range filters
+ADMISSION_STATS_COLUMNS = ([column for _, column in ADMISSION_MULTISELECT_FILTERS] +
+                           [column for _, column in ADMISSION_RANGE_FILTERS] + ['Date of Admission'])
+
+
+def prepare_admission_frame(df):
+    """Parse dates and numbers and add the derived columns (row by row, so it also works on chunks)"""
+    # Data preprocessing with more flexible date parsing
+    df['Date of Admission'] = pd.to_datetime(df['Date of Admission'], errors='coerce')
+    df['enquiry date'] = pd.to_datetime(df['enquiry date'], errors='coerce')
+    df['Date of Birth'] = pd.to_datetime(df['Date of Birth'], errors='coerce')
+    df['Family Annual Income'] = pd.to_numeric(df['Family Annual Income'], errors='coerce')
+    df['Prequalification Percentage'] = pd.to_numeric(df['Prequalification Percentage'], errors='coerce')
+    df['Age'] = 2025 - df['Date of Birth'].dt.year
+    df['Month'] = df['Date of Admission'].dt.to_period('M').astype(str)
+    df['Days_to_Admission'] = (df['Date of Admission'] - df['enquiry date']).dt.days
+    return df
+
+
+def read_admission_source(source):
+    """Read and preprocess an admission CSV (file path or uploaded file); parsed frames are kept on disk"""
+    key = fingerprint_sources([source])
+    df = disk_cache.cached(('admission', key, 'dataset'),
+                           lambda: optimize_dataset('admission', key, prepare_admission_frame(pd.read_csv(source))))
+    return tag_dataset(df, key)
+
+
+def load_admission_data(source):
+    """read_admission_source, recording the column statistics so the sidebar never scans the rows"""
+    df = read_admission_source(source)
+    admission_column_stats(df)
+    return df
+
+
+def load_admission_partitions(partitions):
+    """One dataset from the selected (year, level, path) history partitions, with a Cycle Year column"""
+    frames = [read_admission_source(path).assign(**{'Cycle Year': np.int16(year)}) for year, _, path in partitions]
+    if not frames:
+        return pd.DataFrame()
+    df = concat_frames(frames)
+    df = tag_dataset(df, '+'.join(dataset_key(frame) for frame in frames))
+    record_combined_report('admission', dataset_key(df), [memory_report('admission', dataset_key(frame)) for frame in frames],
+                           df)
+    admission_column_stats(df)
+    return df
+
+
+def admission_column_stats(df):
+    """Zone maps of the sidebar columns (built on the spot for an untagged frame)"""
+    stats = dataset_column_stats('admission', df, ADMISSION_STATS_COLUMNS)
+    return stats if stats is not None else build_column_stats(df, ADMISSION_STATS_COLUMNS)
+
+
+def admission_options(df, column):
+    """Distinct non-null values of a sidebar column, from the column statistics when they list them"""
+    values = stat_values(admission_column_stats(df), column)
+    if values is None:
+        values = list(df[column].dropna().unique()) if column in df.columns else []
+    return values
+
+
+def admission_filter_bounds(df):
+    """Income, score and date bounds used by the sidebar sliders and date picker"""
+    stats = admission_column_stats(df)
+    min_income, max_income = stat_bounds(stats, 'Family Annual Income')
+    min_score, max_score = stat_bounds(stats, 'Prequalification Percentage')
+    min_date, max_date = stat_bounds(stats, 'Date of Admission')
+    # Use today's date as fallback if min/max dates are invalid
+    today = date.today()
+    return {
+        'income': (int(min_income) if min_income is not None else 0,
+                   int(max_income) if max_income is not None else 1000000),
+        'score': (min_score if min_score is not None else 0.0, max_score if max_score is not None else 100.0),
+        'date': (min_date.date() if min_date is not None else today, max_date.date() if max_date is not None else today),
+    }
+
+
+def default_admission_filters(df):
+    """Filter state produced by the sidebar widgets before the user changes anything"""
+    bounds = admission_filter_bounds(df)
+    return {
+        'state': ['All'],
+        'category': ['All'],
+        'religion': ['All'],
+        'source': ['All'],
+        'status': ['All'],
+        'income_range': bounds['income'],
+        'score_range': bounds['score'],
+        'date_range': bounds['date'],
+    }
+
+
+def apply_admission_filters(df, filters):
+    """Apply a sidebar filter state to the admission data"""
+    # Row groups whose zone maps rule out a range are dropped before any mask is evaluated
+    ranges = {column: filters[key] for key, column in ADMISSION_RANGE_FILTERS
+              if column in df.columns and filters.get(key) is not None and len(filters[key]) == 2}
+    date_range = filters.get('date_range')
+    if isinstance(date_range, tuple) and len(date_range) == 2:
+        # A half-picked date range is ignored
+        ranges['Date of Admission'] = (pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]))
+    filtered_df = df
+    if ranges:
+        filtered_df = prune_row_groups(df, dataset_column_stats('admission', df, ADMISSION_STATS_COLUMNS), ranges)
+
+    # All conditions are combined into one mask, so the rows are copied once
+    mask = np.ones(len(filtered_df), dtype=bool)
+    for column, (low, high) in ranges.items():
+        mask &= ((filtered_df[column] >= low) & (filtered_df[column] <= high)).to_numpy()
+
+    # Multiselect filters - 'All' (or nothing) selected means no filtering
+    for key, column in ADMISSION_MULTISELECT_FILTERS:
+        selected = filters.get(key) or []
+        if 'All' not in selected and len(selected) > 0 and column in filtered_df.columns:
+            mask &= filtered_df[column].isin(selected).to_numpy()
+
+    if not mask.all():
+        filtered_df = filtered_df[mask]
+    return filtered_df if filtered_df is df else drop_unused_categories(filtered_df)
+
+
+# ---------------------------------------------------------------------------
+# Section builders - one per tab, shared by the page and the background warm-up.
+# Each reads the selected rows through a query object: FrameQuery for the
+# filtered DataFrame or SqlQuery for the admission database.
+# ---------------------------------------------------------------------------
+
+def build_overview_section(data):
+    """Headline numbers for the Overview tab"""
+    return {
+        'total_admissions': len(data),
+        'avg_income': data.mean('Family Annual Income') if 'Family Annual Income' in data.columns else 0,
+        'avg_score': data.mean('Prequalification Percentage') if 'Prequalification Percentage' in data.columns else 0,
+    }
+
+
+def build_kpi_section(data):
+    """Metrics and charts for the KPIs tab"""
+    total = len(data)
+    section = {'total_students': total}
+    columns = data.columns
+
+    section['avg_income'] = data.mean('Family Annual Income') if 'Family Annual Income' in columns else None
+    section['avg_score'] = data.mean('Prequalification Percentage') if 'Prequalification Percentage' in columns else None
+    if 'Gender' in columns:
+        section['gender_ratio'] = (data.count_equal('Gender', 'Male'), data.count_equal('Gender', 'Female'))
+    else:
+        section['gender_ratio'] = None
+    section['avg_days'] = data.mean('Days_to_Admission') if 'Days_to_Admission' in columns else None
+    section['avg_age'] = data.mean('Age') if 'Age' in columns else None
+    if 'Student Status' in columns:
+        active_count = data.count_equal('Student Status', 'Active')
+        section['active_pct'] = (active_count / total) * 100 if total > 0 else 0
+    else:
+        section['active_pct'] = None
+
+    # Program Level Distribution
+    section['program_level_fig'] = None
+    if 'Program Level' in columns:
+        program_counts = data.value_counts('Program Level')
+        section['program_level_fig'] = px.pie(values=program_counts.values, names=program_counts.index,
+                                              title="Distribution by Program Level")
+
+    # Gender Distribution
+    section['gender_fig'] = None
+    if 'Gender' in columns:
+        gender_counts = data.value_counts('Gender')
+        section['gender_fig'] = px.bar(x=gender_counts.index, y=gender_counts.values,
+                                       labels={'x': 'Gender', 'y': 'Count'},
+                                       title="Gender Distribution")
+
+    # Student Status Distribution
+    section['status_fig'] = None
+    if 'Student Status' in columns:
+        status_counts = data.value_counts('Student Status')
+        section['status_fig'] = px.pie(values=status_counts.values, names=status_counts.index,
+                                       title="Student Status Distribution")
+
+    # Age Distribution Histogram
+    section['age_fig'] = None
+    if 'Age' in columns:
+        section['age_fig'] = px.histogram(data.frame(['Age']), x='Age', nbins=20,
+                                          title="Age Distribution",
+                                          color_discrete_sequence=['#636EFA'])
+
+    # Income vs Score Scatter Plot
+    section['income_score_fig'] = None
+    if 'Family Annual Income' in columns and 'Prequalification Percentage' in columns:
+        section['income_score_fig'] = px.scatter(data.frame(['Family Annual Income', 'Prequalification Percentage']),
+                                                 x='Family Annual Income', y='Prequalification Percentage',
+                                                 title="Income vs. Prequalification Score",
+                                                 color_discrete_sequence=['#EF553B'])
+    return section
+
+
+def build_demographics_section(data):
+    """Charts for the Demographics tab"""
+    section = {'age_fig': None, 'category_fig': None, 'religion_fig': None}
+    if 'Age' in data.columns:
+        section['age_fig'] = px.histogram(data.frame(['Age']), x='Age', nbins=20,
+                                          title="Distribution of Student Ages")
+    if 'Category' in data.columns:
+        category_counts = data.value_counts('Category')
+        section['category_fig'] = px.bar(x=category_counts.index, y=category_counts.values,
+                                         labels={'x': 'Category', 'y': 'Count'},
+                                         title="Student Distribution by Category")
+    if 'Religion' in data.columns:
+        religion_counts = data.value_counts('Religion')
+        section['religion_fig'] = px.pie(values=religion_counts.values, names=religion_counts.index,
+                                         title="Student Distribution by Religion")
+    return section
+
+
+def build_programs_section(data):
+    """Charts for the Programs tab"""
+    section = {'programme_fig': None, 'level_fig': None}
+    if 'Programme Name' in data.columns:
+        prog_counts = data.value_counts('Programme Name').head(10)
+        fig_prog = px.bar(x=prog_counts.index, y=prog_counts.values,
+                          labels={'x': 'Programme', 'y': 'Count'},
+                          title="Top 10 Programmes")
+        fig_prog.update_layout(xaxis_tickangle=-45)
+        section['programme_fig'] = fig_prog
+    if 'Program Level' in data.columns:
+        level_counts = data.value_counts('Program Level')
+        section['level_fig'] = px.bar(x=level_counts.index, y=level_counts.values,
+                                      labels={'x': 'Program Level', 'y': 'Count'},
+                                      title="Distribution by Program Level")
+    return section
+
+
+def build_trends_section(data):
+    """Charts for the Trends tab"""
+    section = {'trend_fig': None, 'score_trend_fig': None}
+    if 'Date of Admission' not in data.columns:
+        return section
+
+    # Monthly admission counts (the Month column is derived at load time)
+    if 'Month' in data.columns:
+        month_data = data
+    else:
+        columns = ['Date of Admission'] + [c for c in ['Prequalification Percentage'] if c in data.columns]
+        frame = data.frame(columns)
+        month_data = FrameQuery(frame.assign(Month=frame['Date of Admission'].dt.to_period('M').astype(str)))
+    monthly_counts = month_data.value_counts('Month').sort_index()
+    section['trend_fig'] = px.line(x=monthly_counts.index, y=monthly_counts.values,
+                                   labels={'x': 'Month', 'y': 'Number of Admissions'},
+                                   title="Monthly Admission Trends")
+
+    # Group by month and calculate average scores
+    if 'Prequalification Percentage' in data.columns:
+        monthly_scores = month_data.group_mean('Month', 'Prequalification Percentage')
+        section['score_trend_fig'] = px.line(x=monthly_scores.index, y=monthly_scores.values,
+                                             labels={'x': 'Month', 'y': 'Average Score'},
+                                             title="Average Prequalification Score Trends")
+    return section
+
+
+def build_geography_section(data):
+    """Charts for the Geography tab"""
+    section = {'state_fig': None, 'state_income_fig': None}
+    if 'erp20may_State' in data.columns:
+        state_counts = data.value_counts('erp20may_State').head(10)
+        fig_state = px.bar(x=state_counts.index, y=state_counts.values,
+                           labels={'x': 'State', 'y': 'Number of Admissions'},
+                           title="Top 10 States by Admissions")
+        fig_state.update_layout(xaxis_tickangle=-45)
+        section['state_fig'] = fig_state
+    if 'erp20may_State' in data.columns and 'Family Annual Income' in data.columns:
+        state_income = data.group_mean('erp20may_State', 'Family Annual Income').sort_values(ascending=False).head(10)
+        fig_income = px.bar(x=state_income.index, y=state_income.values,
+                            labels={'x': 'State', 'y': 'Average Income (₹)'},
+                            title="Top 10 States by Average Family Income")
+        fig_income.update_layout(xaxis_tickangle=-45)
+        section['state_income_fig'] = fig_income
+        section['state_income_stats'] = data.distribution('Family Annual Income', by='erp20may_State')
+    return section
+
+
+def build_financial_section(data):
+    """Charts for the Financial tab"""
+    section = {'income_dist_fig': None, 'income_score_fig': None, 'category_income_fig': None, 'percentiles': None}
+    percentiles = {label: data.distribution(column) for column, label in
+                   [('Family Annual Income', 'Family Annual Income (₹)'), ('Prequalification Percentage', 'Prequalification Score (%)')]
+                   if column in data.columns}
+    if percentiles:
+        table = pd.concat(percentiles, names=['Measure']).reset_index(level=1, drop=True)
+        section['percentiles'] = table[['count', 'p10', 'p25', 'p50', 'p75', 'p90']].rename(
+            columns={'count': 'Records', 'p10': 'P10', 'p25': 'P25', 'p50': 'Median', 'p75': 'P75', 'p90': 'P90'})
+    if 'Family Annual Income' in data.columns:
+        section['income_dist_fig'] = px.histogram(data.frame(['Family Annual Income']), x='Family Annual Income', nbins=30,
+                                                  title="Distribution of Family Annual Income")
+    if 'Family Annual Income' in data.columns and 'Prequalification Percentage' in data.columns:
+        section['income_score_fig'] = px.scatter(data.frame(['Family Annual Income', 'Prequalification Percentage']),
+                                                 x='Family Annual Income', y='Prequalification Percentage',
+                                                 title="Correlation between Family Income and Prequalification Score",
+                                                 labels={'Family Annual Income': 'Family Annual Income (₹)',
+                                                         'Prequalification Percentage': 'Prequalification Score (%)'})
+    if 'Family Annual Income' in data.columns and 'Category' in data.columns:
+        category_income = data.group_mean('Category', 'Family Annual Income').sort_values(ascending=False)
+        section['category_income_fig'] = px.bar(x=category_income.index, y=category_income.values,
+                                                labels={'x': 'Category', 'y': 'Average Income (₹)'},
+                                                title="Average Family Income by Category")
+        section['category_income_stats'] = data.distribution('Family Annual Income', by='Category')
+    return section
+
+
+def _cohort_figures(curves, title):
+    """Curve chart (latest cohorts) and cohort x day heatmap for a cohort_curves result"""
+    days = curves['days']
+    latest = slice(-12, None)
+    lines = pd.DataFrame(curves['curves'][latest].T, index=days, columns=curves['cohorts'][latest])
+    curve_fig = px.line(lines, labels={'index': 'Days since Enquiry', 'value': 'Cumulative Conversion (%)', 'variable': 'Cohort'},
+                        title=title)
+    checkpoints = days[::7]
+    heatmap_fig = px.imshow(curves['curves'][:, ::7], x=[f"Day {d}" for d in checkpoints], y=curves['cohorts'],
+                            color_continuous_scale='Blues', aspect='auto',
+                            labels={'x': 'Days since Enquiry', 'y': 'Cohort', 'color': 'Conversion (%)'},
+                            title="Cumulative Conversion by Cohort (weekly checkpoints)")
+    return curve_fig, heatmap_fig
+
+
+def build_cohorts_section(data, freq='M'):
+    """Admitted students bucketed by enquiry week/month: share admitted by each day since enquiry"""
+    section = {'curves': None, 'summary': None, 'curve_fig': None, 'heatmap_fig': None}
+    if 'enquiry date' not in data.columns or 'Days_to_Admission' not in data.columns:
+        return section
+    frame = data.frame([c for c in ['enquiry date', 'Days_to_Admission', 'Date of Admission'] if c in data.columns])
+    as_of = frame['Date of Admission'].max() if 'Date of Admission' in frame.columns else None
+    curves = cohort_curves(frame['enquiry date'], frame['Days_to_Admission'], freq,
+                           as_of=as_of if pd.notna(as_of) else None)
+    if curves is None:
+        return section
+    section['curves'] = curves
+    section['summary'] = cohort_summary(curves)
+    section['curve_fig'], section['heatmap_fig'] = _cohort_figures(curves, "Cumulative Share of Admissions by Days since Enquiry")
+    return section
+
+
+def build_enquiry_cohorts_section(enquiry_df, admission_df, freq='M'):
+    """All enquiries bucketed by enquiry week/month: share admitted by each day since enquiry"""
+    section = {'curves': None, 'summary': None, 'curve_fig': None, 'heatmap_fig': None}
+    joined = join_stages('enquiry', enquiry_df, 'admission', admission_df, 'enquiry_no')
+    if joined is None or 'left_event_date' not in joined.columns or 'right_event_date' not in joined.columns:
+        return section
+    days = (joined['right_event_date'] - joined['left_event_date']).dt.total_seconds() / 86400.0
+    curves = cohort_curves(joined['left_event_date'], days, freq, as_of=joined['right_event_date'].max())
+    if curves is None:
+        return section
+    section['curves'] = curves
+    section['summary'] = cohort_summary(curves)
+    section['curve_fig'], section['heatmap_fig'] = _cohort_figures(curves, "Cumulative Enquiry-to-Admission Conversion")
+    return section
+
+
+MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def summarize_admissions(df):
+    """Counts and sums of a set of admissions that add up across partitions"""
+    summary = {'admissions': len(df)}
+    months = df['Date of Admission'].dt.month.value_counts() if 'Date of Admission' in df.columns else pd.Series()
+    summary.update({label: int(months.get(month, 0)) for month, label in enumerate(MONTH_LABELS, start=1)})
+    for name, column in [('income', 'Family Annual Income'), ('score', 'Prequalification Percentage')]:
+        values = df[column] if column in df.columns else pd.Series(dtype='float64')
+        summary[f'{name}_sum'] = float(values.sum())
+        summary[f'{name}_count'] = int(values.count())
+    return summary
+
+
+def build_year_over_year_section(summaries):
+    """Year-over-year charts and table from per-partition summaries (one row per cycle year and level)"""
+    section = {'levels_fig': None, 'cumulative_fig': None, 'table': None}
+    if summaries.empty or summaries['admissions'].sum() == 0:
+        return section
+    summaries = summaries.assign(cycle=summaries['year'].astype(str))
+    section['levels_fig'] = px.bar(summaries, x='cycle', y='admissions', color='level', barmode='group',
+                                   labels={'cycle': 'Admission Cycle', 'admissions': 'Admissions', 'level': 'Program Level'},
+                                   title="Admissions per Cycle by Program Level")
+
+    years = summaries.groupby('year').sum(numeric_only=True)
+    cumulative = years[MONTH_LABELS].cumsum(axis=1)
+    fig = go.Figure()
+    for year, row in cumulative.iterrows():
+        fig.add_trace(go.Scatter(x=MONTH_LABELS, y=row.to_numpy(), mode='lines+markers', name=str(year)))
+    fig.update_layout(title="Cumulative Admissions through the Year", xaxis_title="Month of Admission",
+                      yaxis_title="Admissions to Date", legend_title="Cycle")
+    section['cumulative_fig'] = fig
+
+    admissions = years['admissions']
+    section['table'] = pd.DataFrame({
+        'Cycle': years.index.astype(str),
+        'Admissions': admissions.to_numpy(),
+        'Change vs Previous Cycle (%)': (admissions.pct_change() * 100).round(1).to_numpy(),
+        'Avg Family Income': (years['income_sum'] / years['income_count'].replace(0, np.nan)).round(0).to_numpy(),
+        'Avg Prequalification %': (years['score_sum'] / years['score_count'].replace(0, np.nan)).round(1).to_numpy(),
+    })
+    return section
+
+
+ADMISSION_SECTIONS = {
+    'overview': build_overview_section,
+    'kpis': build_kpi_section,
+    'demographics': build_demographics_section,
+    'programs': build_programs_section,
+    'trends': build_trends_section,
+    'geography': build_geography_section,
+    'financial': build_financial_section,
+    'cohorts_monthly': functools.partial(build_cohorts_section, freq='M'),
+    'cohorts_weekly': functools.partial(build_cohorts_section, freq='W'),
+}
+
+
+def admission_sketch(df, filters, column, by=None):
+    """Percentiles of a filter state from the dataset's quantile sketch cube (None if it cannot answer)"""
+    cube = cached_aggregate(('admission', dataset_key(df), 'sketch_cube'), lambda: build_admission_sketch_cube(df),
+                            persist=True)
+    return admission_sketch_distribution(cube, filters, column, by)
+
+
+def admission_db_sketch(db_path, filters, column, by=None):
+    """admission_sketch for the admission database"""
+    cube = cached_aggregate(('admission', database_key(db_path), 'sketch_cube'), lambda: database_sketch_cube(db_path),
+                            persist=True)
+    return admission_sketch_distribution(cube, filters, column, by)
+
+
+def admission_section(name, df, filtered_df, filters):
+    """Return a dashboard section from the aggregate cache, building it on a miss"""
+    key = ('admission', dataset_key(df), freeze(filters), name)
+    sketch = functools.partial(admission_sketch, df, filters)
+    return cached_aggregate(key, lambda: ADMISSION_SECTIONS[name](FrameQuery(filtered_df, sketch)), persist=True)
+
+
+def admission_db_section(name, db_path, filters):
+    """Same as admission_section, answered with SQL aggregations against the admission database"""
+    key = ('admission', database_key(db_path), freeze(filters), name)
+    sketch = functools.partial(admission_db_sketch, db_path, filters)
+    return cached_aggregate(key, lambda: ADMISSION_SECTIONS[name](SqlQuery(db_path, filters, sketch)), persist=True)
+
+
+def admission_partition_summary(year, level, path, filters):
+    """summarize_admissions of one history partition under the multiselect filters (parsed only on a miss)"""
+    key = ('admission', 'history', path, partition_version(path), freeze(filters), 'summary')
+    return cached_aggregate(key, lambda: dict(summarize_admissions(apply_admission_filters(read_admission_source(path),
+                                                                                             filters)),
+                                              year=year, level=level), persist=True)
+
+
+def admission_year_over_year(partitions, filters):
+    """Year-over-year section of the selected partitions; the sidebar's multiselect filters apply to every cycle"""
+    filters = {key: filters.get(key) for key, _ in ADMISSION_MULTISELECT_FILTERS}
+    # One partition is loaded at a time; only its summary is kept
+    summaries = pd.DataFrame([admission_partition_summary(year, level, path, filters) for year, level, path in partitions])
+    return build_year_over_year_section(summaries)
+
+
+def admission_db_filter_bounds(db_path):
+    """admission_filter_bounds read from the database indexes"""
+    def bounds(column, cast, default):
+        low, high = column_bounds(db_path, column)
+        return (cast(low) if low is not None else default[0], cast(high) if high is not None else default[1])
+
+    today = date.today()
+    min_date, max_date = column_bounds(db_path, 'Date of Admission')
+    return {
+        'income': bounds('Family Annual Income', int, (0, 1000000)),
+        'score': bounds('Prequalification Percentage', float, (0.0, 100.0)),
+        'date': (pd.Timestamp(min_date).date() if min_date else today, pd.Timestamp(max_date).date() if max_date else today),
+    }
+
+
+def admission_precompute_tasks(df):
+    """Background warm-up: filter bounds, default selection and every tab's section"""
+    state = {}
+
+    def warm_selection():
+        state['filters'] = default_admission_filters(df)
+        state['filtered_df'] = apply_admission_filters(df, state['filters'])
+
+    def warm_section(name):
+        return lambda: admission_section(name, df, state['filtered_df'], state['filters'])
+
+    def warm_sketches():
+        admission_sketch(df, {}, 'Family Annual Income')
+
+    tasks = [("default filter selection", warm_selection), ("quantile sketches", warm_sketches)]
+    tasks += [(f"{name} tab", warm_section(name)) for name in ADMISSION_SECTIONS]
+    return tasks
+
+
+@fragment
+def admission_statistic_chart(stats, mean_fig, group_label, key, top=None):
+    """Income by group for the statistic picked next to the chart; reruns only this chart"""
+    statistic = st.radio("Statistic", list(STATISTICS), horizontal=True, key=key)
+    if statistic == 'Mean' or stats is None:
+        st.plotly_chart(mean_fig, use_container_width=True)
+        return
+    values = stats[STATISTICS[statistic]].sort_values(ascending=False)
+    if top is not None:
+        values = values.head(top)
+    fig = px.bar(x=values.index, y=values.values,
+                 labels={'x': group_label, 'y': f"{statistic} Income (₹)"},
+                 title=f"Family Income ({statistic}) by {group_label}")
+    fig.update_layout(xaxis_tickangle=-45)
+    st.plotly_chart(fig, use_container_width=True)
+
+
+@fragment
+def admission_cohorts_panel(df, section, has_rows):
+    """Body of the Cohorts tab; its selectors rerun only this panel"""
+    if has_rows:
+        col1, col2 = st.columns(2)
+        with col1:
+            cohort_period = st.radio("Cohort by enquiry", list(COHORT_FREQUENCIES), index=1, horizontal=True,
+                                     key="admission_cohort_period")
+        freq = COHORT_FREQUENCIES[cohort_period]
+
+        # Conversion of all enquiries needs the enquiry data loaded in the Enquiry Dashboard
+        enquiry_key = st.session_state.get('enquiry_dataset_key')
+        enquiry_df = get_dataset('enquiry', enquiry_key) if enquiry_key else None
+        bases = ["Admitted students"]
+        if enquiry_df is not None and df is not None and 'Enquiry No.' in enquiry_df.columns and 'Enquiry No.' in df.columns:
+            bases.append("All enquiries")
+        with col2:
+            cohort_base = st.radio("Cohort base", bases, horizontal=True, key="admission_cohort_base")
+
+        if cohort_base == "All enquiries":
+            cohort_key = ('admission', dataset_key(df), dataset_key(enquiry_df), 'enquiry_cohorts', freq)
+            cohorts = cached_aggregate(cohort_key, lambda: build_enquiry_cohorts_section(enquiry_df, df, freq))
+            st.caption("Enquiries from the Enquiry Dashboard matched to admissions on Enquiry No. (sidebar filters are not applied).")
+        else:
+            name = 'cohorts_weekly' if freq == 'W' else 'cohorts_monthly'
+            cohorts = section(name)
+            st.caption("Admitted students grouped by enquiry date; curves show the share admitted within N days of enquiry.")
+
+        if cohorts['curves'] is not None:
+            st.plotly_chart(cohorts['curve_fig'], use_container_width=True)
+            st.plotly_chart(cohorts['heatmap_fig'], use_container_width=True)
+            st.subheader("Cohort Summary")
+            st.dataframe(cohorts['summary'], use_container_width=True, hide_index=True)
+        else:
+            st.info("Cohort analysis needs enquiry dates and days to admission.")
+    else:
+        st.info("No data available for cohort analysis.")
+
+
+@fragment
+def admission_year_over_year_panel(partitions, filters):
+    """Body of the Year over Year tab; its selectors rerun only this panel"""
+    if not partitions:
+        st.info(f"No admission history found in '{ADMISSION_HISTORY_DIR}'. Partition past admission exports by cycle "
+                "year and program level with: python admission_history.py 2024.csv 2025.csv")
+        return
+    years = history_years(partitions)
+    col1, col2 = st.columns(2)
+    with col1:
+        compared = st.multiselect("Compare cycles", years, default=years, key="admission_yoy_years")
+    with col2:
+        levels = st.multiselect("Program levels", history_levels(partitions), default=history_levels(partitions),
+                                key="admission_yoy_levels")
+    selected = select_partitions(partitions, compared, levels)
+    yoy = admission_year_over_year(selected, filters)
+    if yoy['table'] is None:
+        st.info("No admissions in the selected cycles and levels.")
+        return
+    st.caption(f"{len(selected)} of {len(partitions)} partitions read. State, category, religion, source and "
+               "status filters apply to every cycle; date, income and score ranges do not.")
+    st.plotly_chart(yoy['levels_fig'], use_container_width=True)
+    st.plotly_chart(yoy['cumulative_fig'], use_container_width=True)
+    st.dataframe(yoy['table'], use_container_width=True, hide_index=True)
+
+
+@preempts_background
 def render_admission_dashboard():
     """Render the admission dashboard as a module"""
     
@@ -149,28 +745,20 @@ def render_admission_dashboard():
     """, unsafe_allow_html=True)
 
     # Load data with caching
+    @st.cache_data
+    def load_history(partitions, versions):
+        # The partition versions are part of the cache key, so a rewritten cycle is read again
+        return load_admission_partitions(partitions)
+
     @st.cache_data
     def load_data(uploaded_file=None):
         """Load and preprocess data"""
         if uploaded_file is not None:
-            df = pd.read_csv(uploaded_file)
-        else:
-            try:
-                df = pd.read_csv('2025 admissions  - primary only (1).csv')
-            except FileNotFoundError:
-                return None
-        
-        # Data preprocessing with more flexible date parsing
-        df['Date of Admission'] = pd.to_datetime(df['Date of Admission'], errors='coerce')
-        df['enquiry date'] = pd.to_datetime(df['enquiry date'], errors='coerce')
-        df['Date of Birth'] = pd.to_datetime(df['Date of Birth'], errors='coerce')
-        df['Family Annual Income'] = pd.to_numeric(df['Family Annual Income'], errors='coerce')
-        df['Prequalification Percentage'] = pd.to_numeric(df['Prequalification Percentage'], errors='coerce')
-        df['Age'] = 2025 - df['Date of Birth'].dt.year
-        df['Month'] = df['Date of Admission'].dt.to_period('M').astype(str)
-        df['Days_to_Admission'] = (df['Date of Admission'] - df['enquiry date']).dt.days
-        
-        return df
+            return load_admission_data(uploaded_file)
+        try:
+            return load_admission_data(DEFAULT_DATA_FILE)
+        except FileNotFoundError:
+            return None
 
     # File Upload Section
     st.sidebar.header("📁 Data Upload")
@@ -181,15 +769,41 @@ def render_admission_dashboard():
         help="Upload your admission data CSV file"
     )
 
+    # Query engine: the admission database (built with admission_query.py) keeps multi-year history on disk
+    db_path = None
+    if uploaded_file is None and os.path.exists(ADMISSION_DB_FILE):
+        engine = st.sidebar.radio(
+            "Query engine",
+            ["In-memory (pandas)", "Database (SQL)"],
+            key="admission_engine",
+            help=f"Answer the charts with SQL queries against {ADMISSION_DB_FILE} instead of loading the data into memory"
+        )
+        if engine == "Database (SQL)":
+            db_path = ADMISSION_DB_FILE
+
+    # Partitioned history (built with admission_history.py): only the selected cycle and levels are read
+    partitions = list_partitions(ADMISSION_HISTORY_DIR)
+
     if uploaded_file is not None:
         st.sidebar.success(f"✅ File uploaded: {uploaded_file.name}")
         df = load_data(uploaded_file)
+    elif db_path is not None:
+        st.sidebar.info(f"Querying {ADMISSION_DB_FILE}")
+        df = None
+    elif partitions:
+        years = history_years(partitions)
+        cycle = st.sidebar.selectbox("Admission cycle", years[::-1], key="admission_cycle")
+        cycle_levels = history_levels(select_partitions(partitions, [cycle]))
+        levels = st.sidebar.multiselect("Program levels", cycle_levels, default=cycle_levels, key="admission_cycle_levels")
+        selected = select_partitions(partitions, [cycle], levels)
+        st.sidebar.info(f"Admission history: {cycle} cycle, {len(selected)} of {len(partitions)} partitions")
+        df = load_history(tuple(selected), tuple(partition_version(path) for _, _, path in selected))
     else:
         st.sidebar.info("Using default data file")
         df = load_data()
 
     # Check if data is loaded
-    if df is None:
+    if df is None and db_path is None:
         st.error("❌ No data file found! Please upload a CSV file using the sidebar.")
         st.info("""📋 **Required CSV Columns:**
         - Date of Admission
@@ -232,33 +846,30 @@ def render_admission_dashboard():
         """, unsafe_allow_html=True)
         return
 
+    if df is not None:
+        # Warm the caches for this dataset in the background while the page renders
+        schedule_precompute('admission', dataset_key(df), admission_precompute_tasks(df))
+        show_precompute_progress('admission', dataset_key(df))
+        # Make the dataset available to views that combine datasets (e.g. the funnel)
+        st.session_state['admission_dataset_key'] = register_dataset('admission', df)
+
     # Sidebar filters
     st.sidebar.markdown("---")
     st.sidebar.header("🔍 Filters")
 
     # Initialize variables with default values
-    gender_options = ['All']
-    program_levels = ['All']
     states = ['All']
     categories = ['All']
     religions = ['All']
     sources = ['All']
     status_options = ['All']
-    min_income = 0
-    max_income = 1000000
-    min_score = 0.0
-    max_score = 100.0
 
     # Only process filters if we have valid data
     if df is not None and not df.empty:
-        # Gender filter
-        gender_options = ['All'] + list(df['Gender'].dropna().unique())
-        
-        # Program Level filter
-        program_levels = ['All'] + list(df['Program Level'].dropna().unique())
-        
         # State filter
-        states = ['All'] + list(df['erp20may_State'].dropna().unique())
+        states = ['All'] + admission_options(df, 'erp20may_State')
+    elif db_path is not None:
+        states = ['All'] + distinct_values(db_path, 'erp20may_State')
 
     # State filter
     selected_state = st.sidebar.multiselect(
@@ -287,9 +898,9 @@ def render_admission_dashboard():
 
     # Source filter
     if df is not None and not df.empty and 'Source' in df.columns:
-        sources = ['All'] + list(df['Source'].dropna().unique())
-    else:
-        sources = ['All']
+        sources = ['All'] + admission_options(df, 'Source')
+    elif db_path is not None:
+        sources = ['All'] + distinct_values(db_path, 'Source')
     selected_source = st.sidebar.multiselect(
         "Admission Source",
         options=sources,
@@ -298,30 +909,31 @@ def render_admission_dashboard():
 
     # Student Status filter
     if df is not None and not df.empty and 'Student Status' in df.columns:
-        status_options = ['All'] + list(df['Student Status'].dropna().unique())
-    else:
-        status_options = ['All']
+        status_options = ['All'] + admission_options(df, 'Student Status')
+    elif db_path is not None:
+        status_options = ['All'] + distinct_values(db_path, 'Student Status')
     selected_status = st.sidebar.multiselect(
         "Student Status",
         options=status_options,
         default=['All']
     )
 
+    # Slider and date bounds (from the database indexes or the column statistics)
+    try:
+        if db_path is not None:
+            bounds = cached_aggregate(('admission', database_key(db_path), 'filter_bounds'),
+                                      lambda: admission_db_filter_bounds(db_path), persist=True)
+        else:
+            bounds = admission_filter_bounds(df)
+    except Exception:
+        today = date.today()
+        bounds = {'income': (0, 1000000), 'score': (0.0, 100.0), 'date': (today, today)}
+    min_income, max_income = bounds['income']
+    min_score, max_score = bounds['score']
+
     # Income Range filter
     st.sidebar.markdown("---")
     st.sidebar.subheader("💰 Income Filter")
-    if df is not None and not df.empty and 'Family Annual Income' in df.columns:
-        min_income_val = df['Family Annual Income'].min()
-        max_income_val = df['Family Annual Income'].max()
-        # Safely convert to numeric values
-        min_income_val = pd.to_numeric(min_income_val, errors='coerce')
-        max_income_val = pd.to_numeric(max_income_val, errors='coerce')
-        min_income = int(min_income_val) if pd.notna(min_income_val) else 0
-        max_income = int(max_income_val) if pd.notna(max_income_val) else 1000000
-    else:
-        min_income = 0
-        max_income = 1000000
-        
     income_range = st.sidebar.slider(
         "Family Annual Income (₹)",
         min_value=min_income,
@@ -333,18 +945,6 @@ def render_admission_dashboard():
 
     # Score Range filter
     st.sidebar.subheader("📊 Score Filter")
-    if df is not None and not df.empty and 'Prequalification Percentage' in df.columns:
-        min_score_val = df['Prequalification Percentage'].min()
-        max_score_val = df['Prequalification Percentage'].max()
-        # Safely convert to numeric values
-        min_score_val = pd.to_numeric(min_score_val, errors='coerce')
-        max_score_val = pd.to_numeric(max_score_val, errors='coerce')
-        min_score = float(min_score_val) if pd.notna(min_score_val) else 0.0
-        max_score = float(max_score_val) if pd.notna(max_score_val) else 100.0
-    else:
-        min_score = 0.0
-        max_score = 100.0
-        
     score_range = st.sidebar.slider(
         "Prequalification Score (%)",
         min_value=min_score,
@@ -353,133 +953,62 @@ def render_admission_dashboard():
         step=1.0
     )
 
-    # Date range filter with error handling
-    # Initialize filtered_df
-    filtered_df = df.copy() if df is not None else pd.DataFrame()
-    
-    try:
-        if df is not None and not df.empty:
-            # Safely get min and max dates using a simple approach
-            try:
-                min_date_raw = df['Date of Admission'].min()
-                max_date_raw = df['Date of Admission'].max()
-                
-                # Convert to datetime using pd.Series to ensure it's array-like
-                min_date_dt = pd.to_datetime(pd.Series([min_date_raw]), errors='coerce').iloc[0]
-                max_date_dt = pd.to_datetime(pd.Series([max_date_raw]), errors='coerce').iloc[0]
-                
-                # Use today's date as fallback if min/max dates are invalid
-                today = date.today()
-                min_date = min_date_dt.date() if pd.notna(min_date_dt) else today
-                max_date = max_date_dt.date() if pd.notna(max_date_dt) else today
-                
-                date_range = st.sidebar.date_input(
-                    "Select Date Range",
-                    value=(min_date, max_date),
-                    min_value=min_date,
-                    max_value=max_date
-                )
-                
-                # Apply date range filter
-                # Check if date_range is a tuple (which is what we expect)
-                if isinstance(date_range, tuple) and len(date_range) == 2:
-                    start_date, end_date = date_range
-                    filtered_df = filtered_df[
-                        (filtered_df['Date of Admission'] >= pd.Timestamp(start_date)) &
-                        (filtered_df['Date of Admission'] <= pd.Timestamp(end_date))
-                    ]
-            except Exception as e:
-                # If we can't process dates, use default range
-                today = date.today()
-                date_range = st.sidebar.date_input(
-                    "Select Date Range",
-                    value=(today, today),
-                    min_value=today,
-                    max_value=today
-                )
-    except Exception as e:
-        st.warning(f"Date filter error: {str(e)}")
-        filtered_df = df.copy() if df is not None else pd.DataFrame()
+    # Date range filter
+    min_date, max_date = bounds['date']
+    date_range = st.sidebar.date_input(
+        "Select Date Range",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date
+    )
 
     # Apply all filters
-    try:
-        # Make sure filtered_df is a DataFrame
-        if not isinstance(filtered_df, pd.DataFrame):
-            filtered_df = pd.DataFrame()
-        
-        # State filter
-        if 'All' not in selected_state and selected_state and len(selected_state) > 0 and 'erp20may_State' in filtered_df.columns:
-            # Ensure filtered_df is not empty and has the column
-            if not filtered_df.empty:
-                filtered_df = filtered_df[filtered_df['erp20may_State'].isin(selected_state)]
-        
-        # Category filter
-        if 'All' not in selected_category and selected_category and len(selected_category) > 0 and 'Category' in filtered_df.columns:
-            # Ensure filtered_df is not empty
-            if not filtered_df.empty:
-                filtered_df = filtered_df[filtered_df['Category'].isin(selected_category)]
-        
-        # Religion filter
-        if 'All' not in selected_religion and selected_religion and len(selected_religion) > 0 and 'Religion' in filtered_df.columns:
-            # Ensure filtered_df is not empty
-            if not filtered_df.empty:
-                filtered_df = filtered_df[filtered_df['Religion'].isin(selected_religion)]
-        
-        # Source filter
-        if 'All' not in selected_source and selected_source and len(selected_source) > 0 and 'Source' in filtered_df.columns:
-            # Ensure filtered_df is not empty
-            if not filtered_df.empty:
-                filtered_df = filtered_df[filtered_df['Source'].isin(selected_source)]
-        
-        # Student Status filter
-        if 'All' not in selected_status and selected_status and len(selected_status) > 0 and 'Student Status' in filtered_df.columns:
-            # Ensure filtered_df is not empty
-            if not filtered_df.empty:
-                filtered_df = filtered_df[filtered_df['Student Status'].isin(selected_status)]
-        
-        # Income filter
-        if 'Family Annual Income' in filtered_df.columns and len(income_range) == 2:
-            # Ensure filtered_df is not empty
-            if not filtered_df.empty:
-                filtered_df = filtered_df[
-                    (filtered_df['Family Annual Income'] >= income_range[0]) &
-                    (filtered_df['Family Annual Income'] <= income_range[1])
-                ]
-        
-        # Score filter
-        if 'Prequalification Percentage' in filtered_df.columns and len(score_range) == 2:
-            # Ensure filtered_df is not empty
-            if not filtered_df.empty:
-                filtered_df = filtered_df[
-                    (filtered_df['Prequalification Percentage'] >= score_range[0]) &
-                    (filtered_df['Prequalification Percentage'] <= score_range[1])
-                ]
-    except Exception as e:
-        st.warning(f"Filter application error: {str(e)}")
-        # Reset to original data if filters fail
-        filtered_df = df.copy() if df is not None else pd.DataFrame()
+    filters = {
+        'state': selected_state,
+        'category': selected_category,
+        'religion': selected_religion,
+        'source': selected_source,
+        'status': selected_status,
+        'income_range': income_range,
+        'score_range': score_range,
+        'date_range': date_range,
+    }
+    if db_path is not None:
+        # The filters compile to one parameterised SQL query per aggregation
+        filtered_df = None
+        section = functools.partial(admission_db_section, db_path=db_path, filters=filters)
+    else:
+        try:
+            filtered_df = apply_admission_filters(df, filters)
+        except Exception as e:
+            st.warning(f"Filter application error: {str(e)}")
+            # Reset to original data if filters fail
+            filtered_df = df
+            filters = {}
+        section = functools.partial(admission_section, df=df, filtered_df=filtered_df, filters=filters)
+    has_rows = section('overview')['total_admissions'] > 0
 
     # Main dashboard content
     try:
         # Create tabs for different analysis sections
-        tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9 = st.tabs([
             "📈 Overview", 
             "📊 KPIs", 
             "👥 Demographics", 
             "🎓 Programs", 
             "📈 Trends", 
             "🌍 Geography", 
-            "💰 Financial"
+            "💰 Financial",
+            "🧭 Cohorts",
+            "📅 Year over Year"
         ])
 
         with tab1:
             st.header("Overview")
             
             # Display key metrics in cards
-            if not filtered_df.empty:
-                total_admissions = len(filtered_df)
-                avg_income = filtered_df['Family Annual Income'].mean() if 'Family Annual Income' in filtered_df.columns else 0
-                avg_score = filtered_df['Prequalification Percentage'].mean() if 'Prequalification Percentage' in filtered_df.columns else 0
+            if has_rows:
+                overview = section('overview')
                 
                 col1, col2, col3 = st.columns(3)
                 
@@ -490,7 +1019,7 @@ def render_admission_dashboard():
                             📈
                         </div>
                         <div class="kpi-title">Total Admissions</div>
-                        <div class="kpi-value">{total_admissions:,}</div>
+                        <div class="kpi-value">{overview['total_admissions']:,}</div>
                         <div class="kpi-subtitle">Students admitted</div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -502,7 +1031,7 @@ def render_admission_dashboard():
                             💰
                         </div>
                         <div class="kpi-title">Avg. Family Income</div>
-                        <div class="kpi-value">₹{avg_income:,.0f}</div>
+                        <div class="kpi-value">₹{overview['avg_income']:,.0f}</div>
                         <div class="kpi-subtitle">Annual income</div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -514,45 +1043,48 @@ def render_admission_dashboard():
                             📊
                         </div>
                         <div class="kpi-title">Avg. Score</div>
-                        <div class="kpi-value">{avg_score:.1f}%</div>
+                        <div class="kpi-value">{overview['avg_score']:.1f}%</div>
                         <div class="kpi-subtitle">Prequalification</div>
                     </div>
                     """, unsafe_allow_html=True)
                 
-                # Display filtered data
+                # Display filtered data (paginated; only the visible page is sent to the browser)
                 st.subheader("Filtered Data")
-                st.dataframe(filtered_df)
+                if df is not None:
+                    render_data_grid(df, filtered_df, filters, key="admission_grid")
+                    render_export_panel(df, filtered_df, filters, "admission")
+                else:
+                    st.dataframe(SqlQuery(db_path, filters).preview(), use_container_width=True)
+                    st.caption("First 1,000 matching rows of the admission database.")
             else:
                 st.info("No data available with current filters.")
 
         with tab2:
             st.header("Key Performance Indicators")
-            if not filtered_df.empty:
+            if has_rows:
+                kpis = section('kpis')
+                
                 # Create KPI metrics
                 col1, col2, col3, col4 = st.columns(4)
                 
                 with col1:
-                    total_students = len(filtered_df)
-                    st.metric("Total Students", total_students)
+                    st.metric("Total Students", kpis['total_students'])
                 
                 with col2:
-                    if 'Family Annual Income' in filtered_df.columns:
-                        avg_income = filtered_df['Family Annual Income'].mean()
-                        st.metric("Avg. Family Income", f"₹{avg_income:,.0f}")
+                    if kpis['avg_income'] is not None:
+                        st.metric("Avg. Family Income", f"₹{kpis['avg_income']:,.0f}")
                     else:
                         st.metric("Avg. Family Income", "N/A")
                 
                 with col3:
-                    if 'Prequalification Percentage' in filtered_df.columns:
-                        avg_score = filtered_df['Prequalification Percentage'].mean()
-                        st.metric("Avg. Score", f"{avg_score:.1f}%")
+                    if kpis['avg_score'] is not None:
+                        st.metric("Avg. Score", f"{kpis['avg_score']:.1f}%")
                     else:
                         st.metric("Avg. Score", "N/A")
                 
                 with col4:
-                    if 'Gender' in filtered_df.columns:
-                        male_count = len(filtered_df[filtered_df['Gender'] == 'Male'])
-                        female_count = len(filtered_df[filtered_df['Gender'] == 'Female'])
+                    if kpis['gender_ratio'] is not None:
+                        male_count, female_count = kpis['gender_ratio']
                         st.metric("Gender Ratio (M:F)", f"{male_count}:{female_count}")
                     else:
                         st.metric("Gender Ratio", "N/A")
@@ -562,24 +1094,20 @@ def render_admission_dashboard():
                 kpi_col1, kpi_col2, kpi_col3 = st.columns(3)
                 
                 with kpi_col1:
-                    if 'Days_to_Admission' in filtered_df.columns:
-                        avg_days = filtered_df['Days_to_Admission'].mean()
-                        st.metric("Avg. Days to Admission", f"{avg_days:.1f}")
+                    if kpis['avg_days'] is not None:
+                        st.metric("Avg. Days to Admission", f"{kpis['avg_days']:.1f}")
                     else:
                         st.metric("Avg. Days to Admission", "N/A")
                 
                 with kpi_col2:
-                    if 'Age' in filtered_df.columns:
-                        avg_age = filtered_df['Age'].mean()
-                        st.metric("Avg. Age", f"{avg_age:.1f}")
+                    if kpis['avg_age'] is not None:
+                        st.metric("Avg. Age", f"{kpis['avg_age']:.1f}")
                     else:
                         st.metric("Avg. Age", "N/A")
                 
                 with kpi_col3:
-                    if 'Student Status' in filtered_df.columns:
-                        active_count = len(filtered_df[filtered_df['Student Status'] == 'Active'])
-                        active_pct = (active_count / len(filtered_df)) * 100 if len(filtered_df) > 0 else 0
-                        st.metric("Active Students", f"{active_pct:.1f}%")
+                    if kpis['active_pct'] is not None:
+                        st.metric("Active Students", f"{kpis['active_pct']:.1f}%")
                     else:
                         st.metric("Active Students", "N/A")
                 
@@ -589,28 +1117,18 @@ def render_admission_dashboard():
                 
                 with chart_col1:
                     # Program Level Distribution
-                    if 'Program Level' in filtered_df.columns:
-                        program_counts = filtered_df['Program Level'].value_counts()
-                        fig1 = px.pie(values=program_counts.values, names=program_counts.index, 
-                                     title="Distribution by Program Level")
-                        st.plotly_chart(fig1, use_container_width=True)
+                    if kpis['program_level_fig'] is not None:
+                        st.plotly_chart(kpis['program_level_fig'], use_container_width=True)
                 
                 with chart_col2:
                     # Gender Distribution
-                    if 'Gender' in filtered_df.columns:
-                        gender_counts = filtered_df['Gender'].value_counts()
-                        fig2 = px.bar(x=gender_counts.index, y=gender_counts.values,
-                                     labels={'x': 'Gender', 'y': 'Count'},
-                                     title="Gender Distribution")
-                        st.plotly_chart(fig2, use_container_width=True)
+                    if kpis['gender_fig'] is not None:
+                        st.plotly_chart(kpis['gender_fig'], use_container_width=True)
                 
                 with chart_col3:
                     # Student Status Distribution
-                    if 'Student Status' in filtered_df.columns:
-                        status_counts = filtered_df['Student Status'].value_counts()
-                        fig3 = px.pie(values=status_counts.values, names=status_counts.index,
-                                     title="Student Status Distribution")
-                        st.plotly_chart(fig3, use_container_width=True)
+                    if kpis['status_fig'] is not None:
+                        st.plotly_chart(kpis['status_fig'], use_container_width=True)
                 
                 # Additional Charts
                 st.subheader("Advanced Visualizations")
@@ -618,162 +1136,131 @@ def render_admission_dashboard():
                 
                 with adv_col1:
                     # Age Distribution Histogram
-                    if 'Age' in filtered_df.columns:
-                        fig4 = px.histogram(filtered_df, x='Age', nbins=20,
-                                          title="Age Distribution",
-                                          color_discrete_sequence=['#636EFA'])
-                        st.plotly_chart(fig4, use_container_width=True)
+                    if kpis['age_fig'] is not None:
+                        st.plotly_chart(kpis['age_fig'], use_container_width=True)
                 
                 with adv_col2:
                     # Income vs Score Scatter Plot
-                    if 'Family Annual Income' in filtered_df.columns and 'Prequalification Percentage' in filtered_df.columns:
-                        fig5 = px.scatter(filtered_df, x='Family Annual Income', y='Prequalification Percentage',
-                                         title="Income vs. Prequalification Score",
-                                         color_discrete_sequence=['#EF553B'])
-                        st.plotly_chart(fig5, use_container_width=True)
+                    if kpis['income_score_fig'] is not None:
+                        st.plotly_chart(kpis['income_score_fig'], use_container_width=True)
 
             else:
                 st.info("No data available for KPI analysis.")
 
         with tab3:
             st.header("Demographics Analysis")
-            if not filtered_df.empty:
+            if has_rows:
+                demographics = section('demographics')
+                
                 # Age Distribution
-                if 'Age' in filtered_df.columns:
+                if demographics['age_fig'] is not None:
                     st.subheader("Age Distribution")
-                    fig_age = px.histogram(filtered_df, x='Age', nbins=20,
-                                          title="Distribution of Student Ages")
-                    st.plotly_chart(fig_age, use_container_width=True)
+                    st.plotly_chart(demographics['age_fig'], use_container_width=True)
                 
                 # Category Distribution
-                if 'Category' in filtered_df.columns:
+                if demographics['category_fig'] is not None:
                     st.subheader("Category Distribution")
-                    category_counts = filtered_df['Category'].value_counts()
-                    fig_cat = px.bar(x=category_counts.index, y=category_counts.values,
-                                    labels={'x': 'Category', 'y': 'Count'},
-                                    title="Student Distribution by Category")
-                    st.plotly_chart(fig_cat, use_container_width=True)
+                    st.plotly_chart(demographics['category_fig'], use_container_width=True)
                 
                 # Religion Distribution
-                if 'Religion' in filtered_df.columns:
+                if demographics['religion_fig'] is not None:
                     st.subheader("Religion Distribution")
-                    religion_counts = filtered_df['Religion'].value_counts()
-                    fig_rel = px.pie(values=religion_counts.values, names=religion_counts.index,
-                                    title="Student Distribution by Religion")
-                    st.plotly_chart(fig_rel, use_container_width=True)
+                    st.plotly_chart(demographics['religion_fig'], use_container_width=True)
             else:
                 st.info("No data available for demographics analysis.")
 
         with tab4:
             st.header("Programs Analysis")
-            if not filtered_df.empty:
+            if has_rows:
+                programs = section('programs')
+                
                 # Programmes Analysis
-                if 'Programme Name' in filtered_df.columns:
+                if programs['programme_fig'] is not None:
                     st.subheader("Programme Distribution")
-                    prog_counts = filtered_df['Programme Name'].value_counts().head(10)
-                    fig_prog = px.bar(x=prog_counts.index, y=prog_counts.values,
-                                     labels={'x': 'Programme', 'y': 'Count'},
-                                     title="Top 10 Programmes")
-                    fig_prog.update_layout(xaxis_tickangle=-45)
-                    st.plotly_chart(fig_prog, use_container_width=True)
+                    st.plotly_chart(programs['programme_fig'], use_container_width=True)
                 
                 # Program Level Analysis
-                if 'Program Level' in filtered_df.columns:
+                if programs['level_fig'] is not None:
                     st.subheader("Program Level Analysis")
-                    level_counts = filtered_df['Program Level'].value_counts()
-                    fig_level = px.bar(x=level_counts.index, y=level_counts.values,
-                                      labels={'x': 'Program Level', 'y': 'Count'},
-                                      title="Distribution by Program Level")
-                    st.plotly_chart(fig_level, use_container_width=True)
+                    st.plotly_chart(programs['level_fig'], use_container_width=True)
             else:
                 st.info("No data available for programs analysis.")
 
         with tab5:
             st.header("Trends Analysis")
-            if not filtered_df.empty:
+            if has_rows:
+                trends = section('trends')
+                
                 # Admission Trends over Time
-                if 'Date of Admission' in filtered_df.columns:
+                if trends['trend_fig'] is not None:
                     st.subheader("Admission Trends Over Time")
-                    # Create monthly admission counts
-                    filtered_df['Admission_Month'] = filtered_df['Date of Admission'].dt.to_period('M').astype(str)
-                    monthly_counts = filtered_df['Admission_Month'].value_counts().sort_index()
-                    
-                    fig_trend = px.line(x=monthly_counts.index, y=monthly_counts.values,
-                                       labels={'x': 'Month', 'y': 'Number of Admissions'},
-                                       title="Monthly Admission Trends")
-                    st.plotly_chart(fig_trend, use_container_width=True)
+                    st.plotly_chart(trends['trend_fig'], use_container_width=True)
                 
                 # Score Trends
-                if 'Prequalification Percentage' in filtered_df.columns and 'Date of Admission' in filtered_df.columns:
+                if trends['score_trend_fig'] is not None:
                     st.subheader("Average Score Trends")
-                    # Group by month and calculate average scores
-                    monthly_scores = filtered_df.groupby('Admission_Month')['Prequalification Percentage'].mean()
-                    
-                    fig_score_trend = px.line(x=monthly_scores.index, y=monthly_scores.values,
-                                             labels={'x': 'Month', 'y': 'Average Score'},
-                                             title="Average Prequalification Score Trends")
-                    st.plotly_chart(fig_score_trend, use_container_width=True)
+                    st.plotly_chart(trends['score_trend_fig'], use_container_width=True)
             else:
                 st.info("No data available for trends analysis.")
 
         with tab6:
             st.header("Geographic Analysis")
-            if not filtered_df.empty:
+            if has_rows:
+                geography = section('geography')
+                
                 # State-wise Analysis
-                if 'erp20may_State' in filtered_df.columns:
+                if geography['state_fig'] is not None:
                     st.subheader("State-wise Admission Distribution")
-                    state_counts = filtered_df['erp20may_State'].value_counts().head(10)
-                    fig_state = px.bar(x=state_counts.index, y=state_counts.values,
-                                      labels={'x': 'State', 'y': 'Number of Admissions'},
-                                      title="Top 10 States by Admissions")
-                    fig_state.update_layout(xaxis_tickangle=-45)
-                    st.plotly_chart(fig_state, use_container_width=True)
-                
-                # State-wise Average Income
-                if 'erp20may_State' in filtered_df.columns and 'Family Annual Income' in filtered_df.columns:
-                    st.subheader("Average Family Income by State")
-                    state_income = filtered_df.groupby('erp20may_State')['Family Annual Income'].mean().sort_values(ascending=False).head(10)
-                    fig_income = px.bar(x=state_income.index, y=state_income.values,
-                                       labels={'x': 'State', 'y': 'Average Income (₹)'},
-                                       title="Top 10 States by Average Family Income")
-                    fig_income.update_layout(xaxis_tickangle=-45)
-                    st.plotly_chart(fig_income, use_container_width=True)
+                    st.plotly_chart(geography['state_fig'], use_container_width=True)
+                
+                # State-wise Income
+                if geography['state_income_fig'] is not None:
+                    st.subheader("Family Income by State")
+                    admission_statistic_chart(geography.get('state_income_stats'), geography['state_income_fig'],
+                                              "State", key="admission_state_income_stat", top=10)
             else:
                 st.info("No data available for geographic analysis.")
 
         with tab7:
             st.header("Financial Analysis")
-            if not filtered_df.empty:
+            if has_rows:
+                financial = section('financial')
+                
                 # Income Distribution
-                if 'Family Annual Income' in filtered_df.columns:
+                if financial['income_dist_fig'] is not None:
                     st.subheader("Family Annual Income Distribution")
-                    fig_income_dist = px.histogram(filtered_df, x='Family Annual Income', nbins=30,
-                                                  title="Distribution of Family Annual Income")
-                    st.plotly_chart(fig_income_dist, use_container_width=True)
+                    st.plotly_chart(financial['income_dist_fig'], use_container_width=True)
                 
                 # Income vs Score Correlation
-                if 'Family Annual Income' in filtered_df.columns and 'Prequalification Percentage' in filtered_df.columns:
+                if financial['income_score_fig'] is not None:
                     st.subheader("Income vs. Prequalification Score")
-                    fig_corr = px.scatter(filtered_df, x='Family Annual Income', y='Prequalification Percentage',
-                                         title="Correlation between Family Income and Prequalification Score",
-                                         labels={'Family Annual Income': 'Family Annual Income (₹)',
-                                                'Prequalification Percentage': 'Prequalification Score (%)'})
-                    st.plotly_chart(fig_corr, use_container_width=True)
+                    st.plotly_chart(financial['income_score_fig'], use_container_width=True)
                 
+                # Income and score percentiles
+                if financial['percentiles'] is not None:
+                    st.subheader("Percentiles")
+                    st.dataframe(financial['percentiles'].style.format("{:,.1f}").format("{:,.0f}", subset=['Records']),
+                                 use_container_width=True)
+
                 # Income by Category
-                if 'Family Annual Income' in filtered_df.columns and 'Category' in filtered_df.columns:
-                    st.subheader("Average Income by Category")
-                    category_income = filtered_df.groupby('Category')['Family Annual Income'].mean().sort_values(ascending=False)
-                    fig_cat_income = px.bar(x=category_income.index, y=category_income.values,
-                                           labels={'x': 'Category', 'y': 'Average Income (₹)'},
-                                           title="Average Family Income by Category")
-                    st.plotly_chart(fig_cat_income, use_container_width=True)
+                if financial['category_income_fig'] is not None:
+                    st.subheader("Income by Category")
+                    admission_statistic_chart(financial.get('category_income_stats'), financial['category_income_fig'],
+                                              "Category", key="admission_category_income_stat")
             else:
                 st.info("No data available for financial analysis.")
 
+        with tab8:
+            st.header("Cohort Analysis")
+            admission_cohorts_panel(df, section, has_rows)
+
+        with tab9:
+            st.header("Year over Year")
+            admission_year_over_year_panel(partitions, filters)
+
     except Exception as e:
         st.error(f"Error displaying dashboard content: {str(e)}")
 
 # Allow direct execution for testing
 if __name__ == "__main__":
-    render_admission_dashboard()
\ No newline at end of file
+    render_admission_dashboard()
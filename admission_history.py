@@ -0,0 +1,140 @@
+"""
+Admission History - admission records partitioned by cycle year and program level
+Every admission cycle is kept as one CSV per program level under
+ADMISSION_HISTORY_DIR/year=<cycle>/level=<level>/admissions.csv. A view of one
+cycle (or of some of its levels) reads only those files, and year-over-year
+comparisons walk the cycles one partition at a time, so ten years of
+admissions never have to be in memory together.
+
+Partition admission CSVs (the cycle is the year of Date of Admission unless
+--year is given) with:
+    python admission_history.py 2024.csv 2025.csv
+    python admission_history.py --year 2025 "2025 admissions  - primary only (1).csv"
+"""
+
+import glob
+import os
+import shutil
+import sys
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+# Root of the partitioned admission history
+ADMISSION_HISTORY_DIR = os.environ.get('ADMISSION_HISTORY_DIR', 'admission history')
+
+PARTITION_FILE = 'admissions.csv'
+
+# Partition of the rows without a Program Level
+UNKNOWN_LEVEL = 'Unknown'
+
+
+def partition_path(history_dir, year, level):
+    return os.path.join(history_dir, f"year={int(year)}", f"level={quote(str(level), safe=' ')}", PARTITION_FILE)
+
+
+def list_partitions(history_dir=ADMISSION_HISTORY_DIR):
+    """(year, level, path) of every partition, ordered by year and level"""
+    partitions = []
+    for path in glob.glob(os.path.join(history_dir, 'year=*', 'level=*', PARTITION_FILE)):
+        level_dir = os.path.dirname(path)
+        year_dir = os.path.dirname(level_dir)
+        try:
+            year = int(os.path.basename(year_dir)[len('year='):])
+        except ValueError:
+            continue
+        partitions.append((year, unquote(os.path.basename(level_dir)[len('level='):]), path))
+    return sorted(partitions)
+
+
+def history_years(partitions):
+    return sorted({year for year, _, _ in partitions})
+
+
+def history_levels(partitions):
+    return sorted({level for _, level, _ in partitions})
+
+
+def select_partitions(partitions, years=None, levels=None):
+    """Partitions of the given cycle years and program levels (None selects all)"""
+    return [(year, level, path) for year, level, path in partitions
+            if (years is None or year in years) and (levels is None or level in levels)]
+
+
+def partition_version(path):
+    """(size, modification time) of a partition file - changes whenever it is rewritten"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _partition_keys(chunk, year):
+    """Cycle year and program level of every row of a raw chunk (year None where it cannot be derived)"""
+    if year is not None:
+        years = pd.Series(int(year), index=chunk.index, dtype='Int64')
+    else:
+        years = pd.to_datetime(chunk['Date of Admission'], errors='coerce').dt.year.astype('Int64')
+    levels = chunk['Program Level'] if 'Program Level' in chunk.columns else pd.Series('', index=chunk.index)
+    levels = levels.fillna('').astype(str).str.strip().replace('', UNKNOWN_LEVEL)
+    return years, levels
+
+
+def write_partitions(sources, history_dir=ADMISSION_HISTORY_DIR, year=None, chunksize=100000):
+    """Split admission CSVs into cycle year / program level partitions
+
+    Values are copied verbatim. Every cycle found in the sources is replaced as
+    a whole (its old partitions are removed); other cycles are kept. Files are
+    written next to their final place and renamed once complete. Returns
+    ({(year, level): rows}, rows skipped for lack of a cycle year).
+    """
+    written, headers, skipped = {}, {}, 0
+    try:
+        for source in sources:
+            for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False):
+                years, levels = _partition_keys(chunk, year)
+                skipped += int(years.isna().sum())
+                for (cycle, level), rows in chunk[years.notna()].groupby([years[years.notna()], levels[years.notna()]]):
+                    target = partition_path(history_dir, cycle, level) + '.part'
+                    if (cycle, level) not in headers:
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        headers[(cycle, level)] = list(rows.columns)
+                        rows.to_csv(target, index=False)
+                    else:
+                        rows.reindex(columns=headers[(cycle, level)], fill_value='').to_csv(
+                            target, mode='a', header=False, index=False)
+                    written[(cycle, level)] = written.get((cycle, level), 0) + len(rows)
+    except BaseException:
+        for cycle, level in headers:
+            try:
+                os.remove(partition_path(history_dir, cycle, level) + '.part')
+            except OSError:
+                pass
+        raise
+
+    for cycle in {cycle for cycle, _ in written}:
+        for _, level, path in select_partitions(list_partitions(history_dir), [cycle]):
+            if (cycle, level) not in written:
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+    for cycle, level in written:
+        path = partition_path(history_dir, cycle, level)
+        os.replace(path + '.part', path)
+    return written, skipped
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    year = None
+    if len(argv) >= 2 and argv[0] == '--year':
+        year, argv = int(argv[1]), argv[2:]
+    if not argv:
+        print("usage: python admission_history.py [--year YEAR] CSV [CSV ...]", file=sys.stderr)
+        return 2
+    written, skipped = write_partitions(argv, ADMISSION_HISTORY_DIR, year)
+    for (cycle, level), rows in sorted(written.items()):
+        print(f"{cycle} {level}: {rows:,} records -> {partition_path(ADMISSION_HISTORY_DIR, cycle, level)}")
+    if skipped:
+        print(f"Skipped {skipped:,} records without a Date of Admission", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""
+Admission Query - pandas and embedded-database backends for the admission tabs
+The admission section builders read their data through a small query object
+(row count, value counts, means, grouped means and column slices). FrameQuery
+answers from the filtered DataFrame in memory; SqlQuery compiles the sidebar
+filters into one parameterised WHERE clause and answers with SQL aggregations
+against a local SQLite (or, when installed, DuckDB) file, so multi-year history
+never has to be loaded into RAM. Both return the same values. Percentiles come
+from a quantile sketch cube whenever it can answer the filter state.
+
+Build a database from one or more admission CSVs with:
+    python admission_query.py admission_history.db 2023.csv 2024.csv 2025.csv
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset_registry import fingerprint_sources
+from memory_optimizer import value_counts
+from quantile_sketch import build_sketch_cube, distribution_from_rows, select_cells, sketch_distribution
+
+TABLE = 'admissions'
+
+# Database used by the "Database (SQL)" query engine of the admission dashboard
+ADMISSION_DB_FILE = os.environ.get('ADMISSION_DB', 'admission_history.db')
+
+# Sidebar multiselect filters: filter key -> column ('All' or nothing selected means no filtering)
+ADMISSION_MULTISELECT_FILTERS = [
+    ('state', 'erp20may_State'),
+    ('category', 'Category'),
+    ('religion', 'Religion'),
+    ('source', 'Source'),
+    ('status', 'Student Status'),
+]
+
+# Sidebar range filters: filter key -> column
+ADMISSION_RANGE_FILTERS = [
+    ('income_range', 'Family Annual Income'),
+    ('score_range', 'Prequalification Percentage'),
+]
+
+ADMISSION_DATE_COLUMNS = ['Date of Admission', 'enquiry date', 'Date of Birth']
+
+# Columns summarised by the quantile sketch cube
+ADMISSION_SKETCH_METRICS = ['Family Annual Income', 'Prequalification Percentage', 'Age']
+
+# Timestamps are stored as text in this format, so they compare in date order
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_local = threading.local()
+
+
+# ---------------------------------------------------------------------------
+# Quantile sketches
+# ---------------------------------------------------------------------------
+
+def build_admission_sketch_cube(df):
+    """Sketch cube over the multiselect filter columns and admission month"""
+    return build_sketch_cube(df, [column for _, column in ADMISSION_MULTISELECT_FILTERS], ADMISSION_SKETCH_METRICS,
+                             'Date of Admission')
+
+
+def admission_sketch_distribution(cube, filters, column, by=None):
+    """Distribution table of a column for a filter state, or None when the cube cannot answer it"""
+    cells = cube['cells']
+    for key, range_column in ADMISSION_RANGE_FILTERS:
+        value_range = filters.get(key)
+        if value_range is None or len(value_range) != 2 or range_column not in cells.columns:
+            continue
+        if f'{range_column}__count' not in cells.columns:
+            return None
+        # A range filter is answered only while it keeps every row (rows missing the value drop out)
+        if (value_range[0] > cells[f'{range_column}__min'].min() or value_range[1] < cells[f'{range_column}__max'].max()
+                or cells[f'{range_column}__count'].sum() < cells['_records'].sum()):
+            return None
+
+    selections = {}
+    for key, filter_column in ADMISSION_MULTISELECT_FILTERS:
+        selected = filters.get(key) or []
+        if 'All' not in selected and len(selected) > 0:
+            selections[filter_column] = selected
+    date_range = filters.get('date_range')
+    date_range = date_range if isinstance(date_range, tuple) and len(date_range) == 2 else None
+    selected_cells = select_cells(cube, selections, date_range)
+    if selected_cells is None:
+        return None
+    return sketch_distribution(cube, selected_cells, column, by)
+
+
+class AdmissionQuery:
+    """Methods shared by the query backends"""
+
+    sketch = None
+
+    def distribution(self, column, by=None):
+        """count, mean, percentiles and box statistics of a column (per group of by)
+
+        Answered from the sketch cube when one is attached and covers the
+        filter state, otherwise computed exactly from the rows.
+        """
+        if self.sketch is not None:
+            table = self.sketch(column, by)
+            if table is not None:
+                return table
+        return distribution_from_rows(self.frame([column] + ([by] if by else [])), column, by)
+
+
+# ---------------------------------------------------------------------------
+# In-memory backend
+# ---------------------------------------------------------------------------
+
+class FrameQuery(AdmissionQuery):
+    """Query interface over an already filtered DataFrame"""
+
+    def __init__(self, filtered_df, sketch=None):
+        self.df = filtered_df
+        self.columns = list(filtered_df.columns)
+        self.sketch = sketch
+
+    def __len__(self):
+        return len(self.df)
+
+    def value_counts(self, column):
+        # Ties keep first-appearance order, like the SQL backend's MIN(rowid)
+        return value_counts(self.df[column])
+
+    def mean(self, column):
+        return self.df[column].mean()
+
+    def count_equal(self, column, value):
+        return int((self.df[column] == value).sum())
+
+    def group_mean(self, group, value):
+        return self.df.groupby(group, observed=True)[value].mean()
+
+    def frame(self, columns):
+        return self.df[columns]
+
+
+# ---------------------------------------------------------------------------
+# Embedded database backend
+# ---------------------------------------------------------------------------
+
+def _is_duckdb(path):
+    return str(path).endswith(('.duckdb', '.ddb'))
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def connect(path, read_only=True):
+    """Open the admission database (DuckDB for .duckdb files, SQLite otherwise)"""
+    if _is_duckdb(path):
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("DuckDB databases require the duckdb package")
+        return duckdb.connect(path, read_only=read_only)
+    if read_only:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    return sqlite3.connect(path)
+
+
+def _file_version(path):
+    # build_admission_db swaps in a new file, which changes the inode and the modification time
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _connection(path):
+    """Read-only connection per thread and database file, reopened when the file is replaced"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    version = _file_version(path)
+    current = connections.get(path)
+    if current is not None and current[0] != version:
+        # An open connection keeps reading the replaced file
+        current[1].close()
+        current = None
+    if current is None:
+        current = connections[path] = (version, connect(path))
+    return current[1]
+
+
+def _query(path, sql, params=()):
+    return _connection(path).execute(sql, list(params)).fetchall()
+
+
+def database_key(path):
+    """Dataset key recorded when the database was built (cache key for its results)"""
+    rows = _query(path, "SELECT value FROM meta WHERE name = 'dataset_key'")
+    return rows[0][0] if rows else None
+
+
+def table_columns(path):
+    return [row[1] for row in _query(path, f"PRAGMA table_info('{TABLE}')")]
+
+
+def _timestamp_text(value):
+    return pd.Timestamp(value).strftime(_TIMESTAMP_FORMAT)
+
+
+def compile_admission_filters(filters, columns):
+    """WHERE clause and parameters equivalent to apply_admission_filters"""
+    clauses, params = [], []
+
+    # Date range filter (a half-picked range is ignored)
+    date_range = filters.get('date_range')
+    if isinstance(date_range, tuple) and len(date_range) == 2:
+        clauses.append(f"{_quote('Date of Admission')} >= ? AND {_quote('Date of Admission')} <= ?")
+        params += [_timestamp_text(date_range[0]), _timestamp_text(date_range[1])]
+
+    for key, column in ADMISSION_MULTISELECT_FILTERS:
+        selected = filters.get(key) or []
+        if 'All' not in selected and len(selected) > 0 and column in columns:
+            clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(selected))})")
+            params += [value.item() if isinstance(value, np.generic) else value for value in selected]
+
+    for key, column in ADMISSION_RANGE_FILTERS:
+        value_range = filters.get(key)
+        if column in columns and value_range is not None and len(value_range) == 2:
+            clauses.append(f"{_quote(column)} >= ? AND {_quote(column)} <= ?")
+            params += [float(value_range[0]), float(value_range[1])]
+
+    return ' AND '.join(f"({clause})" for clause in clauses) or '1 = 1', params
+
+
+class SqlQuery(AdmissionQuery):
+    """Query interface over the rows of the admission database matching a filter state"""
+
+    def __init__(self, path, filters, sketch=None):
+        self.path = path
+        self.columns = table_columns(path)
+        self.where, self.params = compile_admission_filters(filters, self.columns)
+        self.sketch = sketch
+
+    def _select(self, select, where='', params=(), tail=''):
+        sql = f"SELECT {select} FROM {_quote(TABLE)} WHERE {self.where}{where} {tail}"
+        return _query(self.path, sql, self.params + list(params))
+
+    def __len__(self):
+        return self._select("COUNT(*)")[0][0]
+
+    def value_counts(self, column):
+        # Ties keep first-appearance order, like FrameQuery
+        rows = self._select(f"{_quote(column)}, COUNT(*) AS n", f" AND {_quote(column)} IS NOT NULL",
+                            tail=f"GROUP BY {_quote(column)} ORDER BY n DESC, MIN(rowid)")
+        return pd.Series([n for _, n in rows], index=pd.Index([value for value, _ in rows], name=column), name='count')
+
+    def mean(self, column):
+        value = self._select(f"AVG({_quote(column)})")[0][0]
+        return np.nan if value is None else value
+
+    def count_equal(self, column, value):
+        return self._select("COUNT(*)", f" AND {_quote(column)} = ?", [value])[0][0]
+
+    def group_mean(self, group, value):
+        rows = self._select(f"{_quote(group)}, AVG({_quote(value)})", f" AND {_quote(group)} IS NOT NULL",
+                            tail=f"GROUP BY {_quote(group)} ORDER BY {_quote(group)}")
+        return pd.Series([np.nan if mean is None else mean for _, mean in rows],
+                         index=pd.Index([key for key, _ in rows], name=group), name=value, dtype='float64')
+
+    def frame(self, columns):
+        rows = self._select(', '.join(_quote(column) for column in columns), tail="ORDER BY rowid")
+        df = pd.DataFrame(rows, columns=columns)
+        for column in columns:
+            if column in ADMISSION_DATE_COLUMNS:
+                df[column] = pd.to_datetime(df[column], format=_TIMESTAMP_FORMAT, errors='coerce')
+        return df
+
+    def preview(self, limit=1000):
+        """First rows of the selection for the Data view"""
+        rows = self._select('*', tail=f"ORDER BY rowid LIMIT {int(limit)}")
+        return pd.DataFrame(rows, columns=self.columns)
+
+
+def distinct_values(path, column):
+    """Non-missing values of a column in order of first appearance (like dropna().unique())"""
+    if column not in table_columns(path):
+        return []
+    rows = _query(path, f"SELECT {_quote(column)} FROM {_quote(TABLE)} WHERE {_quote(column)} IS NOT NULL "
+                        f"GROUP BY {_quote(column)} ORDER BY MIN(rowid)")
+    return [row[0] for row in rows]
+
+
+def database_sketch_cube(path):
+    """Sketch cube of the whole database (one pass over the cube columns)"""
+    columns = table_columns(path)
+    wanted = [column for column in [column for _, column in ADMISSION_MULTISELECT_FILTERS] + ['Date of Admission']
+              + ADMISSION_SKETCH_METRICS if column in columns]
+    rows = _query(path, f"SELECT {', '.join(_quote(column) for column in wanted)} FROM {_quote(TABLE)}")
+    df = pd.DataFrame(rows, columns=wanted)
+    if 'Date of Admission' in df.columns:
+        df['Date of Admission'] = pd.to_datetime(df['Date of Admission'], format=_TIMESTAMP_FORMAT, errors='coerce')
+    return build_admission_sketch_cube(df)
+
+
+def column_bounds(path, column):
+    """(min, max) of a column, answered from its index"""
+    if column not in table_columns(path):
+        return None, None
+    return tuple(_query(path, f"SELECT MIN({_quote(column)}), MAX({_quote(column)}) FROM {_quote(TABLE)}")[0])
+
+
+# ---------------------------------------------------------------------------
+# Database build
+# ---------------------------------------------------------------------------
+
+def _storable(chunk):
+    """Timestamps as sortable text and missing values as NULL"""
+    chunk = chunk.copy()
+    for column in chunk.columns:
+        if pd.api.types.is_datetime64_any_dtype(chunk[column]):
+            text = chunk[column].dt.strftime(_TIMESTAMP_FORMAT)
+            chunk[column] = text.astype(object).where(chunk[column].notna(), None)
+    return chunk
+
+
+def _append(con, chunk, duck):
+    if duck:
+        con.register('chunk', chunk)
+        exists = con.execute(f"SELECT COUNT(*) FROM information_schema.tables WHERE table_name = '{TABLE}'").fetchone()[0]
+        con.execute(f"INSERT INTO {_quote(TABLE)} SELECT * FROM chunk" if exists
+                    else f"CREATE TABLE {_quote(TABLE)} AS SELECT * FROM chunk")
+        con.unregister('chunk')
+    else:
+        chunk.to_sql(TABLE, con, if_exists='append', index=False)
+
+
+def build_admission_db(sources, db_path, prepare, chunksize=100000):
+    """Load admission CSVs chunk by chunk into a database file with indexes on the filter columns
+
+    prepare(chunk) adds the derived columns (the same preprocessing as the
+    in-memory loader). The file is replaced only once it is complete.
+    """
+    partial_path = db_path + '.part'
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    duck = _is_duckdb(db_path)
+    con = connect(partial_path, read_only=False)
+    try:
+        rows = 0
+        for source in sources:
+            for chunk in pd.read_csv(source, chunksize=chunksize):
+                _append(con, _storable(prepare(chunk)), duck)
+                rows += len(chunk)
+
+        columns = [row[1] for row in con.execute(f"PRAGMA table_info('{TABLE}')").fetchall()]
+        indexed = ['Date of Admission'] + [column for _, column in ADMISSION_MULTISELECT_FILTERS + ADMISSION_RANGE_FILTERS]
+        for i, column in enumerate(column for column in indexed if column in columns):
+            con.execute(f"CREATE INDEX idx_{TABLE}_{i} ON {_quote(TABLE)} ({_quote(column)})")
+
+        con.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+        con.execute("INSERT INTO meta VALUES ('dataset_key', ?)", [fingerprint_sources(sources)])
+        con.execute("INSERT INTO meta VALUES ('rows', ?)", [str(rows)])
+        con.commit()
+    finally:
+        con.close()
+    os.replace(partial_path, db_path)
+    return rows
+
+
+def main(argv=None):
+    from admission_dashboard_module import prepare_admission_frame
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("usage: python admission_query.py DATABASE CSV [CSV ...]", file=sys.stderr)
+        return 2
+    db_path, sources = argv[0], argv[1:]
+    rows = build_admission_db(sources, db_path, prepare_admission_frame)
+    print(f"Loaded {rows:,} admission records from {len(sources)} file(s) into {db_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
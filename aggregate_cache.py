@@ -0,0 +1,92 @@
+"""
+Aggregate Cache - process-wide cache for dashboard sections and aggregates
+Entries are keyed by (dashboard, dataset key, filter state, item) so the
+background precompute job and every session share the same results.
+Concurrent requests for the same key compute it once; the others wait.
+Entries created with persist=True are also kept in the disk cache, so they
+survive a server restart.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import disk_cache
+
+# Maximum number of cached entries (sections hold figures, so keep this modest)
+MAX_ENTRIES = 512
+
+_results = OrderedDict()
+_inflight = {}
+_lock = threading.Lock()
+
+
+def freeze(value):
+    """Turn a filter state (dicts, lists, dates, numpy scalars) into a hashable key"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)):
+        items = [freeze(v) for v in value]
+        return tuple(sorted(items, key=repr)) if isinstance(value, set) else tuple(items)
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def cached_aggregate(key, compute, persist=False):
+    """Return the cached value for key, computing it with compute() on a miss
+
+    With persist=True a miss is looked up in the disk cache before computing,
+    and computed values are written to it (use only for picklable results).
+    """
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+        event = _inflight.get(key)
+        owner = event is None
+        if owner:
+            event = threading.Event()
+            _inflight[key] = event
+
+    if not owner:
+        # Another thread (e.g. the background precompute job) is computing it
+        event.wait()
+        with _lock:
+            if key in _results:
+                return _results[key]
+        return compute()
+
+    try:
+        value = disk_cache.load(key) if persist else None
+        if value is None:
+            value = compute()
+            if persist:
+                disk_cache.store(key, value)
+        with _lock:
+            _results[key] = value
+            while len(_results) > MAX_ENTRIES:
+                _results.popitem(last=False)
+        return value
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        event.set()
+
+
+def invalidate(key):
+    """Forget the value cached for key (e.g. a batch of tasks that failed), so the next request computes it again"""
+    with _lock:
+        _results.pop(key, None)
+
+
+def is_cached(key):
+    """Return True when key has a cached value"""
+    with _lock:
+        return key in _results
+
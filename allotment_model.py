@@ -0,0 +1,194 @@
+"""
+Allotment Model - likelihood of allotment for every applicant
+A logistic regression (scikit-learn) is trained on the applicants whose
+Allotment Status is known, from one-hot Level, Discipline, College and Program
+plus the numeric columns. Training runs as a task in the analytics worker
+pool and ends by scoring every applicant of the dataset with one
+predict_proba call; the model and the scores are kept per dataset key, so a
+dataset is trained once and the dashboard only sums scores per group.
+"""
+
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+import disk_cache
+from aggregate_cache import cached_aggregate, invalidate
+from analytics_workers import submit_task
+from dataset_registry import dataset_key
+
+TARGET_COLUMN = 'Allotment Status'
+POSITIVE_STATUS = 'Allotted'
+NEGATIVE_STATUS = 'Not Allotted'
+
+# Categorical features (one-hot encoded); numeric columns of the dataset are added to them
+CATEGORICAL_FEATURES = ['Level', 'Discipline', 'College', 'Program']
+
+# Share of the labelled applicants held out to measure the model
+HOLDOUT_SHARE = 0.2
+
+# Label of missing categorical values
+MISSING_LABEL = 'Unknown'
+
+# Likelihood bands of the breakdown
+LIKELIHOOD_BANDS = [0, 0.25, 0.5, 0.75, 1.0]
+LIKELIHOOD_LABELS = ['Unlikely (<25%)', 'Possible (25-50%)', 'Likely (50-75%)', 'Very likely (75%+)']
+
+
+def model_features(df):
+    """Categorical and numeric feature columns of an applicant frame"""
+    categorical = [column for column in CATEGORICAL_FEATURES if column in df.columns]
+    numeric = [column for column in df.columns
+               if column != TARGET_COLUMN and pd.api.types.is_numeric_dtype(df[column])
+               and not pd.api.types.is_bool_dtype(df[column])]
+    return categorical, numeric
+
+
+def _feature_frame(df, categorical, numeric):
+    # The encoder needs uniform string categories; numeric columns become float64 with NaN gaps
+    frame = {column: df[column].astype(object).where(df[column].notna(), MISSING_LABEL).astype(str).to_numpy()
+             for column in categorical}
+    frame.update({column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+                  for column in numeric})
+    return pd.DataFrame(frame)
+
+
+def _pipeline(categorical, numeric):
+    encoder = ColumnTransformer([
+        ('categories', OneHotEncoder(handle_unknown='ignore'), categorical),
+        ('numbers', make_pipeline(SimpleImputer(strategy='median'), StandardScaler()), numeric),
+    ])
+    return Pipeline([('features', encoder), ('model', LogisticRegression(max_iter=1000))])
+
+
+def _factor_name(name, categorical):
+    # 'categories__College_College 4' -> 'College: College 4', 'numbers__Merit Score' -> 'Merit Score'
+    step, name = name.split('__', 1)
+    if step == 'categories':
+        for column in categorical:
+            if name.startswith(column + '_'):
+                return f"{column}: {name[len(column) + 1:]}"
+    return name
+
+
+def _strongest_factors(pipeline, categorical, top=10):
+    names = pipeline.named_steps['features'].get_feature_names_out()
+    coefficients = pipeline.named_steps['model'].coef_[0]
+    factors = pd.DataFrame({
+        'Feature': [_factor_name(name, categorical) for name in names],
+        'Effect': coefficients,
+    })
+    return factors.reindex(factors['Effect'].abs().sort_values(ascending=False).index).head(top).reset_index(drop=True)
+
+
+def train_allotment_model(frame, categorical, numeric):
+    """Train on the labelled rows of frame and score every row (runs in a worker process)
+
+    Returns the fitted pipeline, the allotment likelihood of every row (float32,
+    in frame order) and hold-out quality figures; 'error' explains a model that
+    could not be trained.
+    """
+    status = frame[TARGET_COLUMN].astype(object) if TARGET_COLUMN in frame.columns else pd.Series(np.nan, index=frame.index)
+    labelled = status.isin([POSITIVE_STATUS, NEGATIVE_STATUS]).to_numpy()
+    target = (status[labelled] == POSITIVE_STATUS).to_numpy(dtype='int8')
+    result = {'model': None, 'probabilities': None, 'labelled': int(labelled.sum()), 'unlabelled': int((~labelled).sum()),
+              'base_rate': float(target.mean()) if len(target) else np.nan, 'auc': np.nan, 'accuracy': np.nan,
+              'factors': None, 'error': None}
+    if not categorical and not numeric:
+        result['error'] = "The applicant data has no Level, Discipline, College, Program or numeric columns."
+        return result
+    if len(np.unique(target)) < 2:
+        result['error'] = f"Both {POSITIVE_STATUS} and {NEGATIVE_STATUS} applicants are needed to train the model."
+        return result
+
+    features = _feature_frame(frame, categorical, numeric)
+    train = features[labelled]
+    counts = np.bincount(target)
+    if counts.min() >= 2 and len(target) >= 10:
+        fit_rows, test_rows, fit_target, test_target = train_test_split(
+            train, target, test_size=HOLDOUT_SHARE, stratify=target, random_state=0)
+        holdout = _pipeline(categorical, numeric).fit(fit_rows, fit_target)
+        scores = holdout.predict_proba(test_rows)[:, 1]
+        result['auc'] = float(roc_auc_score(test_target, scores))
+        result['accuracy'] = float(accuracy_score(test_target, scores >= 0.5))
+
+    # The scored model learns from every labelled applicant
+    pipeline = _pipeline(categorical, numeric).fit(train, target)
+    result.update({
+        'model': pipeline,
+        'probabilities': pipeline.predict_proba(features)[:, 1].astype('float32'),
+        'factors': _strongest_factors(pipeline, categorical),
+    })
+    return result
+
+
+def _resolved(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def start_allotment_model(df):
+    """Future of the allotment model of a dataset, submitted once per dataset key (returns at once)"""
+    key = ('applicant', dataset_key(df), 'allotment_model')
+
+    def submit():
+        stored = disk_cache.load(key)
+        if stored is not None:
+            return _resolved(stored)
+        categorical, numeric = model_features(df)
+        columns = [column for column in [TARGET_COLUMN] + categorical + numeric if column in df.columns]
+        return submit_task(train_allotment_model, df[columns], categorical, numeric)
+    return cached_aggregate(key + ('future',), submit)
+
+
+def allotment_model(df):
+    """Trained allotment model of a dataset, or None while it is still training
+
+    Raises the error of a failed training task and drops the task, so the next
+    call trains again; a model that cannot be trained (e.g. only one class) is
+    a result with an 'error' and is kept like any other.
+    """
+    future = start_allotment_model(df)
+    if not future.done():
+        return None
+    if future.cancelled() or future.exception() is not None:
+        invalidate(('applicant', dataset_key(df), 'allotment_model', 'future'))
+        future.result()
+    return cached_aggregate(('applicant', dataset_key(df), 'allotment_model'), future.result, persist=True)
+
+
+def predicted_allotment(model, df, filtered_df, by):
+    """Applicants, actual and predicted allotments and likelihood bands per group of the selected rows"""
+    positions = df.index.get_indexer(filtered_df.index)
+    probabilities = model['probabilities'][positions].astype('float64')
+    status = filtered_df[TARGET_COLUMN].astype(object).to_numpy() if TARGET_COLUMN in filtered_df.columns else None
+    frame = pd.DataFrame({
+        by: filtered_df[by].astype(object).fillna(MISSING_LABEL).to_numpy(),
+        'Applicants': 1,
+        'Allotted': (status == POSITIVE_STATUS).astype(int) if status is not None else 0,
+        'Predicted Allotted': probabilities,
+    })
+    table = frame.groupby(by, sort=False).sum()
+    table['Actual Rate %'] = (table['Allotted'] / table['Applicants'] * 100).round(1)
+    table['Predicted Rate %'] = (table['Predicted Allotted'] / table['Applicants'] * 100).round(1)
+    table['Predicted Allotted'] = table['Predicted Allotted'].round(1)
+    table = table.sort_values('Applicants', ascending=False, kind='stable')
+
+    bands = pd.cut(probabilities, LIKELIHOOD_BANDS, labels=LIKELIHOOD_LABELS, include_lowest=True)
+    band_status = pd.Series(status if status is not None else MISSING_LABEL, name=TARGET_COLUMN)
+    return {
+        'table': table,
+        'bands': pd.crosstab(pd.Series(bands, name='Likelihood'), band_status).reindex(LIKELIHOOD_LABELS, fill_value=0),
+        'expected': float(probabilities.sum()),
+        'actual': int(frame['Allotted'].sum()),
+        'applicants': len(frame),
+    }
@@ -0,0 +1,381 @@
+"""
+Analytics API - dashboard metrics as JSON over HTTP
+A small asyncio HTTP/1.1 server (keep-alive, GET only) that answers from the
+datasets registered by the dashboards and the shared aggregate cache. Filters
+are query parameters named like the dashboards' filter keys; every response
+body is cached per (dataset, filter state) together with its ETag, so repeated
+and conditional (If-None-Match) requests never recompute anything.
+
+Run standalone with `python analytics_api.py --enquiry enquiries.csv`, or set
+ANALYTICS_API_PORT to serve it from the Streamlit process next to the dashboards.
+
+Endpoints:
+    /health
+    /api                                  dashboards, views and filter parameters
+    /api/admission/summary                total admissions, average income and score
+    /api/applicant/summary                applicant KPIs and the overall allotment rate
+    /api/applicant/allotment-rates?by=college
+    /api/enquiry/summary                  enquiry KPIs
+    /api/<dashboard>/counts?by=College&top=10
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+from datetime import date, datetime
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cache import cached_aggregate, freeze
+from dataset_registry import dataset_key, get_dataset, register_dataset
+from memory_optimizer import value_counts
+from admission_dashboard_module import default_admission_filters, apply_admission_filters, admission_section
+from applicant_dashboard_module import default_applicant_filters, apply_applicant_filters, applicant_kpis, applicant_crosstab
+from enquiry_dashboard_module import default_enquiry_filters, apply_enquiry_filters, enquiry_section
+
+DEFAULT_PORT = 8765
+
+# Query parameters read by the views themselves (everything else must be a filter key)
+VIEW_PARAMETERS = {'by', 'top'}
+
+# Crosstabs behind /api/applicant/allotment-rates?by=...
+RATE_DIMENSIONS = {
+    'level': 'level_status',
+    'discipline': 'discipline_status',
+    'college': 'college_status',
+}
+
+_server_thread = None
+_server_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    """Request error reported to the client with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------------------------------------------------------------------
+# Filter parsing and JSON encoding
+# ---------------------------------------------------------------------------
+
+def _convert(text, like):
+    """Parse a query value to the type of the matching default filter value"""
+    try:
+        if isinstance(like, bool):
+            return text.lower() in ('1', 'true', 'yes')
+        if isinstance(like, int):
+            return int(float(text))
+        if isinstance(like, float):
+            return float(text)
+        if isinstance(like, (date, datetime)):
+            return date.fromisoformat(text)
+    except ValueError:
+        raise ApiError(400, f"Invalid value: {text}")
+    return text
+
+
+def parse_filters(defaults, query):
+    """Filter state from query parameters; unspecified filters keep their defaults
+
+    List filters take repeated or comma-separated values, range filters a
+    "low,high" pair and single-value filters one value.
+    """
+    unknown = set(query) - set(defaults) - VIEW_PARAMETERS
+    if unknown:
+        raise ApiError(400, f"Unknown parameters: {', '.join(sorted(unknown))}")
+    filters = dict(defaults)
+    for key, default in defaults.items():
+        if key not in query:
+            continue
+        values = [part for value in query[key] for part in value.split(',') if part != '']
+        if isinstance(default, tuple):
+            if len(values) != 2:
+                raise ApiError(400, f"{key} expects two comma-separated values")
+            filters[key] = tuple(_convert(value, bound) for value, bound in zip(values, default))
+        elif isinstance(default, list):
+            like = default[0] if default else ''
+            filters[key] = [_convert(value, like) for value in values]
+        else:
+            filters[key] = _convert(values[0], default) if values else default
+    return filters
+
+
+def to_json(value):
+    """JSON-compatible copy of section values (frames, series, numpy and date types)"""
+    if isinstance(value, pd.DataFrame):
+        return {'columns': [to_json(c) for c in value.columns], 'index': [to_json(i) for i in value.index],
+                'data': [[to_json(v) for v in row] for row in value.itertuples(index=False, name=None)]}
+    if isinstance(value, pd.Series):
+        return {str(to_json(k)): to_json(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_json(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if pd.isna(value):
+        return None
+    return str(value)
+
+
+# ---------------------------------------------------------------------------
+# Views - each returns a JSON-compatible dict for one filter state
+# ---------------------------------------------------------------------------
+
+def _query_value(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _counts_view(apply_filters, df, filters, query):
+    by = _query_value(query, 'by')
+    if by not in df.columns:
+        raise ApiError(400, f"'by' must be one of the columns: {', '.join(map(str, df.columns))}")
+    try:
+        top = int(_query_value(query, 'top', 0))
+    except ValueError:
+        raise ApiError(400, "'top' must be an integer")
+    filtered_df = apply_filters(df, filters)
+    counts = value_counts(filtered_df[by])
+    return {'by': by, 'total': len(filtered_df), 'counts': counts.head(top) if top > 0 else counts}
+
+
+def _admission_summary(df, filters, query):
+    filtered_df = apply_admission_filters(df, filters)
+    return admission_section('overview', df, filtered_df, filters)
+
+
+def _applicant_summary(df, filters, query):
+    kpis = applicant_kpis(df, filters)
+    return dict(kpis, allotment_rate=kpis['allotted'] / kpis['total'] * 100 if kpis['total'] else None)
+
+
+def _applicant_rates(df, filters, query):
+    by = _query_value(query, 'by', 'discipline')
+    if by not in RATE_DIMENSIONS:
+        raise ApiError(400, f"'by' must be one of: {', '.join(RATE_DIMENSIONS)}")
+    filtered_df = apply_applicant_filters(df, filters)
+    table = applicant_crosstab(df, filtered_df, filters, RATE_DIMENSIONS[by])
+    return {'by': by, 'rates': table['rates'], 'counts': table['counts']}
+
+
+def _enquiry_summary(df, filters, query):
+    filtered_df = apply_enquiry_filters(df, filters)
+    return enquiry_section('metrics', df, filtered_df, filters)
+
+
+# Dashboard -> default filters and views
+API_DASHBOARDS = {
+    'admission': (default_admission_filters, {
+        'summary': _admission_summary,
+        'counts': functools.partial(_counts_view, apply_admission_filters),
+    }),
+    'applicant': (default_applicant_filters, {
+        'summary': _applicant_summary,
+        'allotment-rates': _applicant_rates,
+        'counts': functools.partial(_counts_view, apply_applicant_filters),
+    }),
+    'enquiry': (default_enquiry_filters, {
+        'summary': _enquiry_summary,
+        'counts': functools.partial(_counts_view, apply_enquiry_filters),
+    }),
+}
+
+
+def _default_filters(dashboard, df):
+    key = ('api', dataset_key(df), 'default_filters', dashboard)
+    return cached_aggregate(key, lambda: API_DASHBOARDS[dashboard][0](df), persist=True)
+
+
+def _encode(payload):
+    """Response body and its ETag"""
+    body = json.dumps(to_json(payload), separators=(',', ':')).encode('utf-8')
+    return body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _api_index():
+    index = {}
+    for dashboard, (default_filters, views) in API_DASHBOARDS.items():
+        df = get_dataset(dashboard)
+        index[dashboard] = {
+            'loaded': df is not None,
+            'dataset_key': dataset_key(df) if df is not None else None,
+            'rows': len(df) if df is not None else 0,
+            'views': list(views),
+            'filters': _default_filters(dashboard, df) if df is not None else None,
+        }
+    return index
+
+
+def handle_request(path, query):
+    """(status, body, etag) for a GET request; cached per dataset and filter state"""
+    parts = [part for part in path.split('/') if part]
+    if parts == ['health']:
+        return (200, *_encode({'status': 'ok'}))
+    if parts == ['api']:
+        return (200, *_encode(_api_index()))
+    if len(parts) != 3 or parts[0] != 'api' or parts[1] not in API_DASHBOARDS:
+        raise ApiError(404, f"Not found: {path}")
+
+    dashboard, view_name = parts[1], parts[2]
+    views = API_DASHBOARDS[dashboard][1]
+    if view_name not in views:
+        raise ApiError(404, f"Unknown view '{view_name}' (available: {', '.join(views)})")
+    df = get_dataset(dashboard)
+    if df is None:
+        raise ApiError(503, f"The {dashboard} dataset is not loaded")
+
+    filters = parse_filters(_default_filters(dashboard, df), query)
+    view_params = {name: values for name, values in query.items() if name in VIEW_PARAMETERS}
+    key = ('api', dataset_key(df), freeze(filters), dashboard, view_name, freeze(view_params))
+    return (200, *cached_aggregate(key, lambda: _encode(views[view_name](df, filters, query)), persist=True))
+
+
+# ---------------------------------------------------------------------------
+# HTTP server
+# ---------------------------------------------------------------------------
+
+_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _response(status, body=b'', etag=None, keep_alive=True):
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Cache-Control: no-cache",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if etag is not None:
+        headers.append(f"ETag: {etag}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body
+
+
+async def _read_request(reader):
+    """(method, target, version, headers) of the next request, or None at end of stream"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise ApiError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if int(headers.get('content-length', 0) or 0):
+        # Request bodies are not used; skip them to keep the connection in sync
+        await reader.readexactly(int(headers['content-length']))
+    return method, target, version, headers
+
+
+async def _handle_connection(reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ApiError as e:
+                writer.write(_response(e.status, _encode({'error': str(e)})[0], keep_alive=False))
+                break
+            if request is None:
+                break
+            method, target, version, headers = request
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+            try:
+                if method not in ('GET', 'HEAD'):
+                    raise ApiError(405, f"Method {method} not allowed")
+                url = urlsplit(target)
+                # Aggregations may take a while on a cache miss; keep the event loop free
+                status, body, etag = await loop.run_in_executor(
+                    None, handle_request, url.path, parse_qs(url.query, keep_blank_values=False))
+            except ApiError as e:
+                status, body, etag = e.status, _encode({'error': str(e)})[0], None
+            except Exception as e:
+                status, body, etag = 500, _encode({'error': str(e)})[0], None
+
+            if etag is not None and etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+                status, body = 304, b''
+            response = _response(status, body, etag, keep_alive)
+            if method == 'HEAD':
+                response = response[:len(response) - len(body)]
+            writer.write(response)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT):
+    """Serve the API until cancelled"""
+    server = await asyncio.start_server(_handle_connection, host, port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+def start_api_server(host='127.0.0.1', port=DEFAULT_PORT):
+    """Serve the API from a daemon thread (once per process); used from the Streamlit app"""
+    global _server_thread
+    with _server_lock:
+        if _server_thread is not None and _server_thread.is_alive():
+            return _server_thread
+        _server_thread = threading.Thread(target=asyncio.run, args=(serve(host, port),),
+                                          name="analytics-api", daemon=True)
+        _server_thread.start()
+        return _server_thread
+
+
+def main(argv=None):
+    from generate_reports import load_datasets
+    from admission_dashboard_module import DEFAULT_DATA_FILE
+    from applicant_dashboard_module import APPLICANT_DATA_GLOB
+
+    parser = argparse.ArgumentParser(description="Serve the dashboard metrics as JSON")
+    parser.add_argument('--admission', default=DEFAULT_DATA_FILE, help="admission CSV file")
+    parser.add_argument('--applicant', default=APPLICANT_DATA_GLOB, help="glob of applicant CSV files")
+    parser.add_argument('--enquiry', help="enquiry CSV file")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('ANALYTICS_API_PORT', DEFAULT_PORT)))
+    args = parser.parse_args(argv)
+
+    datasets, problems = load_datasets(args.admission, args.applicant, args.enquiry)
+    for problem in problems:
+        print(f"warning: {problem}", file=sys.stderr)
+    for name, df in datasets.items():
+        register_dataset(name, df)
+    print(f"Serving {', '.join(datasets) or 'no datasets'} on http://{args.host}:{args.port}/api")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""
+Analytics Worker Pool - shared-memory dataset hand-off for heavy aggregations
+
+A dataset is published once per dataset key into a single shared memory block
+as column arrays (sorted categorical codes for text columns, float64 for
+numeric columns). Jobs reference the block by name and receive the current row
+selection through a second shared block, so whole frames are never pickled.
+Jobs return small results (label lists and count/correlation matrices) through
+concurrent.futures Futures, which lets the dashboards submit every heavy
+aggregation up front and collect the results while the page renders.
+"""
+
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from contingency import contingency_table
+from dataset_registry import dataset_key
+
+# Below this many rows the IPC round trip costs more than the job itself
+INLINE_ROW_LIMIT = 50000
+
+# Set ANALYTICS_WORKERS=0 to run every job on the calling thread
+MAX_WORKERS = int(os.environ.get('ANALYTICS_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+
+# Number of published datasets kept in shared memory per process
+MAX_PUBLISHED_FRAMES = 4
+
+_ALIGNMENT = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+_published = OrderedDict()
+_published_lock = threading.Lock()
+
+# Worker-side cache of attached blocks: shm name -> (SharedMemory, columns)
+_attached = OrderedDict()
+_MAX_ATTACHED = 2
+
+
+# ---------------------------------------------------------------------------
+# Column encoding (shared by the inline path and the shared-memory path)
+# ---------------------------------------------------------------------------
+
+def encode_column(series):
+    """Encode a column as (array, labels): float64 values or sorted int32 codes"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan), None
+    codes, labels = pd.factorize(series, sort=True)
+    return codes.astype('int32', copy=False), list(labels)
+
+
+def encode_columns(df, columns):
+    """Encode the requested columns of a DataFrame for the job functions"""
+    return {col: encode_column(df[col]) for col in columns if col in df.columns}
+
+
+def selection_positions(df, filtered_df):
+    """Return row positions of filtered_df within df, or None when all rows are selected"""
+    if filtered_df is None or len(filtered_df) == len(df):
+        return None
+    if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1:
+        return filtered_df.index.to_numpy(dtype='int64').astype('int32', copy=False)
+    return df.index.get_indexer(filtered_df.index).astype('int32', copy=False)
+
+
+# ---------------------------------------------------------------------------
+# Job functions - operate on encoded columns and an optional row selection
+# ---------------------------------------------------------------------------
+
+def _selected(array, rows):
+    return array if rows is None else array[rows]
+
+
+def crosstab_job(columns, rows, row, column, top_rows=None, top_cols=None, as_sparse=False):
+    """Contingency counts of two categorical columns (NaN rows are dropped, like pd.crosstab)
+
+    top_rows/top_cols keep only the largest labels of an axis; the result also
+    carries the full row and column totals (see crosstab_totals).
+    """
+    row_codes, row_labels = columns[row]
+    col_codes, col_labels = columns[column]
+    result = contingency_table(_selected(row_codes, rows), row_labels, _selected(col_codes, rows), col_labels,
+                               top_rows=top_rows, top_cols=top_cols, as_sparse=as_sparse)
+    result['index_name'] = row
+    result['columns_name'] = column
+    return result
+
+
+def correlation_job(columns, rows, numeric, encodings=None):
+    """Pearson correlation over numeric columns plus label-encoded categorical columns
+
+    encodings maps an output column name to (source column, mapping); a mapping of
+    None numbers the categories in order of first appearance in the selection.
+    """
+    data = OrderedDict()
+    for col in numeric:
+        values, _ = columns[col]
+        data[col] = _selected(values, rows)
+    for name, (source, mapping) in (encodings or {}).items():
+        codes, labels = columns[source]
+        codes = _selected(codes, rows)
+        if mapping is None:
+            present = pd.unique(codes[codes >= 0])
+            lookup = np.full(len(labels), np.nan)
+            lookup[present] = np.arange(len(present))
+        else:
+            lookup = np.array([mapping.get(label, np.nan) for label in labels], dtype='float64')
+        encoded = np.full(len(codes), np.nan)
+        valid = codes >= 0
+        encoded[valid] = lookup[codes[valid]]
+        data[name] = encoded
+    matrix = pd.DataFrame(data).corr()
+    return {'index': list(matrix.index), 'columns': list(matrix.columns), 'values': matrix.to_numpy()}
+
+
+JOBS = {
+    'crosstab': crosstab_job,
+    'correlation': correlation_job,
+}
+
+
+# ---------------------------------------------------------------------------
+# Shared memory publishing (parent process)
+# ---------------------------------------------------------------------------
+
+def _aligned(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _write_block(arrays):
+    """Copy a dict of arrays into one shared memory block; returns (shm, layout)"""
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = (offset, array.dtype.str, len(array))
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, array in arrays.items():
+        start, dtype, length = layout[name]
+        np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=start)[:] = array
+    return shm, layout
+
+
+def _release(shm):
+    try:
+        shm.close()
+        shm.unlink()
+    except (FileNotFoundError, OSError):
+        pass
+
+
+def _publish(df, columns):
+    """Publish the requested columns of a dataset; reuses the block for the same dataset key"""
+    key = dataset_key(df) or id(df)
+    columns = tuple(sorted(col for col in columns if col in df.columns))
+    with _published_lock:
+        entry = _published.get(key)
+        if entry is not None and set(columns) <= set(entry['spec']['labels']):
+            _published.move_to_end(key)
+            entry['pending'] += 1
+            return entry
+        if entry is not None:
+            columns = tuple(sorted(set(columns) | set(entry['spec']['labels'])))
+    encoded = encode_columns(df, columns)
+    shm, layout = _write_block({col: array for col, (array, _) in encoded.items()})
+    spec = {
+        'name': shm.name,
+        'layout': layout,
+        'labels': {col: labels for col, (_, labels) in encoded.items()},
+    }
+    with _published_lock:
+        old = _published.pop(key, None)
+        if old is not None:
+            old['stale'] = True
+            if old['pending'] == 0:
+                _release(old['shm'])
+        entry = {'shm': shm, 'spec': spec, 'pending': 1, 'stale': False}
+        _published[key] = entry
+        # Evict idle datasets beyond the limit
+        for other_key in list(_published):
+            if len(_published) <= MAX_PUBLISHED_FRAMES:
+                break
+            other = _published[other_key]
+            if other is not entry and other['pending'] == 0:
+                del _published[other_key]
+                _release(other['shm'])
+    return entry
+
+
+def _job_finished(entry, selection_shm):
+    if selection_shm is not None:
+        _release(selection_shm)
+    with _published_lock:
+        entry['pending'] -= 1
+        if entry['stale'] and entry['pending'] == 0:
+            _release(entry['shm'])
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _attach(name):
+    """Attach to a shared memory block owned by the parent process"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: pool workers share the parent's resource tracker, which
+        # already holds the registration that the parent removes on unlink
+        return shared_memory.SharedMemory(name=name)
+
+
+def _frame_columns(spec):
+    cached = _attached.get(spec['name'])
+    if cached is not None:
+        _attached.move_to_end(spec['name'])
+        return cached[1]
+    shm = _attach(spec['name'])
+    columns = {}
+    for col, (offset, dtype, length) in spec['layout'].items():
+        array = np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)
+        array.flags.writeable = False
+        columns[col] = (array, spec['labels'][col])
+    _attached[spec['name']] = (shm, columns)
+    while len(_attached) > _MAX_ATTACHED:
+        _, (old_shm, _) = _attached.popitem(last=False)
+        try:
+            old_shm.close()
+        except BufferError:
+            pass
+    return columns
+
+
+def _run_shared(job_name, spec, selection, params):
+    """Entry point executed in the worker process"""
+    columns = _frame_columns(spec)
+    rows = None
+    if selection is not None:
+        sel_name, length = selection
+        sel_shm = _attach(sel_name)
+        try:
+            rows = np.ndarray(length, dtype='int32', buffer=sel_shm.buf).copy()
+        finally:
+            sel_shm.close()
+    return JOBS[job_name](columns, rows, **params)
+
+
+# ---------------------------------------------------------------------------
+# Pool and job submission
+# ---------------------------------------------------------------------------
+
+def get_analytics_pool():
+    """Return the process-wide worker pool, or None when workers are disabled"""
+    global _pool
+    if MAX_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = ProcessPoolExecutor(
+                    max_workers=MAX_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            except (OSError, ValueError, NotImplementedError):
+                return None
+        return _pool
+
+
+def _pool_submit(pool, fn, *args):
+    """Submit to the pool without letting new workers re-run the Streamlit script
+
+    Streamlit registers the running script as __main__, and spawn-started workers
+    re-import __main__ from its file. Pool workers are started lazily inside
+    submit(), so the script module is swapped for a bare module while submitting.
+    """
+    with _pool_lock:
+        main_module = sys.modules.get('__main__')
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            return pool.submit(fn, *args)
+        finally:
+            sys.modules['__main__'] = main_module
+
+
+def _shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+    with _published_lock:
+        for entry in _published.values():
+            _release(entry['shm'])
+        _published.clear()
+
+
+atexit.register(_shutdown)
+
+
+def _run_inline(fn, *args, **kwargs):
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _run_job_inline(job_name, df, rows, columns, params):
+    return _run_inline(JOBS[job_name], encode_columns(df, columns), rows, **params)
+
+
+def submit_job(job_name, df, filtered_df, columns, **params):
+    """Submit a heavy aggregation over the selected rows of df; returns a Future
+
+    columns lists the dataset columns the job reads. Large datasets go to the
+    worker pool through shared memory; small ones run inline.
+    """
+    rows = selection_positions(df, filtered_df)
+    pool = get_analytics_pool()
+    if pool is None or len(df) < INLINE_ROW_LIMIT:
+        return _run_job_inline(job_name, df, rows, columns, params)
+
+    entry = _publish(df, columns)
+    selection_shm = None
+    selection = None
+    try:
+        if rows is not None:
+            selection_shm, _ = _write_block({'rows': rows})
+            selection = (selection_shm.name, len(rows))
+        future = _pool_submit(pool, _run_shared, job_name, entry['spec'], selection, params)
+    except Exception:
+        # A broken pool (e.g. a worker was killed) falls back to the inline path
+        _job_finished(entry, selection_shm)
+        return _run_job_inline(job_name, df, rows, columns, params)
+    future.add_done_callback(lambda _: _job_finished(entry, selection_shm))
+    return future
+
+
+def submit_task(fn, *args):
+    """Run a module-level function on small picklable arguments in the worker pool; returns a Future
+
+    For work that needs no dataset hand-off (e.g. fitting one model per group).
+    Runs inline when workers are disabled or the pool is broken.
+    """
+    pool = get_analytics_pool()
+    if pool is not None:
+        try:
+            return _pool_submit(pool, fn, *args)
+        except Exception:
+            pass
+    return _run_inline(fn, *args)
+
+
+# ---------------------------------------------------------------------------
+# Result helpers
+# ---------------------------------------------------------------------------
+
+def crosstab_frame(result, margins=False):
+    """Convert a crosstab job result into a DataFrame shaped like pd.crosstab"""
+    counts = result['counts']
+    table = pd.DataFrame(
+        counts.toarray() if hasattr(counts, 'toarray') else counts,
+        index=pd.Index(result['index'], name=result.get('index_name')),
+        columns=pd.Index(result['columns'], name=result.get('columns_name')),
+    )
+    if margins:
+        table['All'] = table.sum(axis=1)
+        table.loc['All'] = table.sum(axis=0)
+    return table
+
+
+def crosstab_totals(result, axis='index'):
+    """Full row ('index') or column ('columns') totals of a crosstab result, largest first"""
+    labels, totals = result['row_totals'] if axis == 'index' else result['column_totals']
+    name = result.get('index_name') if axis == 'index' else result.get('columns_name')
+    return pd.Series(totals, index=pd.Index(labels, name=name), name='count').sort_values(ascending=False, kind='stable')
+
+
+def crosstab_summary(result, positive=None):
+    """Counts, margins, shares and (optionally) rates of a crosstab result in one dict
+
+    rates is the percentage of each row falling in the `positive` column,
+    largest first (None when that column does not occur).
+    """
+    counts = crosstab_frame(result)
+    total = int(counts.values.sum())
+    rates = None
+    if positive is not None and positive in counts.columns:
+        rates = (counts[positive] / counts.sum(axis=1) * 100).sort_values(ascending=False, kind='stable')
+    return {
+        'counts': counts,
+        'margins': crosstab_frame(result, margins=True),
+        'row_totals': crosstab_totals(result),
+        'column_totals': crosstab_totals(result, axis='columns'),
+        'total': total,
+        'shares': counts / total if total else counts,
+        'rates': rates,
+    }
+
+
+def correlation_frame(result):
+    """Convert a correlation job result into a DataFrame"""
+    return pd.DataFrame(result['values'], index=result['index'], columns=result['columns'])
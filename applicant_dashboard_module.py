@@ -1,10 +1,645 @@
 import streamlit as st
 import pandas as pd
 import os
-import glob
+import functools
+from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
+from dataset_registry import fingerprint_sources, tag_dataset, dataset_key, register_dataset, previous_dataset
+from analytics_workers import submit_job, crosstab_summary
+from memory_optimizer import optimize_dataset, drop_unused_categories, value_counts
+from column_stats import build_column_stats, dataset_column_stats, stat_values
+from aggregate_cache import cached_aggregate, freeze
+import disk_cache
+from background_precompute import preempts_background, schedule_precompute, show_precompute_progress
+from ui_fragments import fragment, in_fragment_rerun
+from data_grid import render_data_grid
+from data_export import render_export_panel
+from correlation_engine import (build_moment_cube, select_moment_cells, merge_moments, correlation_matrix,
+                                cramers_v_matrix)
+from distribution_charts import CHART_TYPES, numeric_columns, box_summaries, distribution_figure
+from folder_watcher import watch_folder, follow_folder_updates
+from kpi_deltas import COMPARISON_MODES, build_cube, slice_cube, kpi_deltas, track_previous
+from allotment_model import CATEGORICAL_FEATURES, start_allotment_model, allotment_model, predicted_allotment
 
+# CSV files loaded when nothing is uploaded (the folder is watched for new ERP exports)
+APPLICANT_DATA_GLOB = "applicant data/*.csv"
+
+# Multiselect filters of the sidebar: filter key -> column
+APPLICANT_FILTER_COLUMNS = {
+    'allotment_status': 'Allotment Status',
+    'level': 'Level',
+    'discipline': 'Discipline',
+    'college': 'College',
+}
+
+
+def read_applicant_file(source):
+    """Read one applicant CSV export and strip its ="..." quoting"""
+    df = pd.read_csv(source)
+    # Clean column names - remove extra quotes and equal signs
+    df.columns = df.columns.str.replace('="', '').str.replace('""', '').str.replace('"', '')
+    # Clean data - remove extra quotes from string columns
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].astype(str).str.replace('="', '').str.replace('""', '').str.replace('"', '').str.replace('=', '')
+    return df
+
+
+def load_applicant_data(sources, on_error=None):
+    """Read and combine applicant CSVs (paths or uploaded files); empty frame when none load
+
+    on_error(source, exception) is called for every file that cannot be read.
+    The combined frame is kept in the disk cache when every file loaded.
+    """
+    key = fingerprint_sources(sources)
+    cached = disk_cache.load(('applicant', key, 'dataset'))
+    if cached is not None:
+        return ingest_applicant_frame(cached, key)
+
+    dataframes = []
+    for source in sources:
+        try:
+            dataframes.append(read_applicant_file(source))
+        except Exception as e:
+            if on_error is not None:
+                on_error(source, e)
+            continue
+
+    if not dataframes:
+        return pd.DataFrame()
+    combined_df = pd.concat(dataframes, ignore_index=True)
+    # Further clean data values to remove any remaining quotes
+    for col in combined_df.columns:
+        if combined_df[col].dtype == 'object':
+            combined_df[col] = combined_df[col].astype(str).str.replace('=', '').str.replace('"', '').str.replace('""', '')
+    combined_df = optimize_dataset('applicant', key, combined_df)
+    if len(dataframes) == len(sources):
+        disk_cache.store(('applicant', key, 'dataset'), combined_df)
+    return ingest_applicant_frame(combined_df, key)
+
+
+def ingest_applicant_frame(df, key):
+    """Tag a loaded frame and record the column statistics of its filter columns"""
+    df = tag_dataset(df, key)
+    applicant_column_stats(df)
+    return df
+
+
+def applicant_column_stats(df):
+    """Zone maps of the filter columns (built on the spot for an untagged frame)"""
+    columns = list(APPLICANT_FILTER_COLUMNS.values())
+    stats = dataset_column_stats('applicant', df, columns)
+    return stats if stats is not None else build_column_stats(df, columns)
+
+
+def applicant_options(df, column):
+    """Distinct values of a filter column (missing values included, like Series.unique())"""
+    values = stat_values(applicant_column_stats(df), column, dropna=False)
+    return values if values is not None else list(df[column].unique())
+
+
+def default_applicant_filters(df):
+    """Filter state produced by the sidebar multiselects (everything selected)"""
+    return {key: applicant_options(df, column) for key, column in APPLICANT_FILTER_COLUMNS.items()}
+
+
+def apply_applicant_filters(df, filters):
+    """Apply a sidebar filter state to the applicant data"""
+    mask = pd.Series(True, index=df.index)
+    for key, column in APPLICANT_FILTER_COLUMNS.items():
+        mask &= df[column].isin(filters[key])
+    return df if mask.all() else drop_unused_categories(df[mask])
+
+
+def applicant_kpi_cube(df):
+    """Applicant counts per filter combination (and Program, for the distinct count)"""
+    key = ('applicant', dataset_key(df), 'kpi_cube')
+    return cached_aggregate(key, lambda: build_cube(df, list(APPLICANT_FILTER_COLUMNS.values()) + ['Program']),
+                            persist=True)
+
+
+def applicant_kpis(df, filters):
+    """Key metrics of a filter state, read from the KPI cube instead of the full data"""
+    def compute():
+        cube = slice_cube(applicant_kpi_cube(df),
+                          {column: filters[key] for key, column in APPLICANT_FILTER_COLUMNS.items()})
+        status = cube['Allotment Status']
+        return {
+            'total': int(cube['records'].sum()),
+            'allotted': int(cube.loc[status == 'Allotted', 'records'].sum()),
+            'not_allotted': int(cube.loc[status == 'Not Allotted', 'records'].sum()),
+            'programs': int(cube['Program'].nunique()) if 'Program' in cube.columns else 0,
+        }
+    return cached_aggregate(('applicant', dataset_key(df), freeze(filters), 'kpis'), compute, persist=True)
+
+
+def submit_applicant_jobs(df, filtered_df):
+    """Submit the heavy crosstab aggregations to the analytics worker pool"""
+    return {
+        'level_status': submit_job('crosstab', df, filtered_df, ['Level', 'Allotment Status'],
+                                   row='Level', column='Allotment Status'),
+        'discipline_status': submit_job('crosstab', df, filtered_df, ['Discipline', 'Allotment Status'],
+                                        row='Discipline', column='Allotment Status'),
+        'college_status': submit_job('crosstab', df, filtered_df, ['College', 'Allotment Status'],
+                                     row='College', column='Allotment Status'),
+    }
+
+
+# Categorical columns entering the correlation matrix as one-hot features
+APPLICANT_ONE_HOT_COLUMNS = ['Allotment Status', 'Level']
+
+
+def applicant_moment_cube(df):
+    """Correlation sufficient statistics per filter combination"""
+    key = ('applicant', dataset_key(df), 'moment_cube')
+    return cached_aggregate(key, lambda: build_moment_cube(df, list(APPLICANT_FILTER_COLUMNS.values()),
+                                                           numeric_columns(df),
+                                                           APPLICANT_ONE_HOT_COLUMNS), persist=True)
+
+
+def applicant_correlation(df, filters):
+    """Pearson correlation of the numeric and one-hot features for a filter state, merged from the moment cube"""
+    cube = applicant_moment_cube(df)
+    cells = select_moment_cells(cube, {column: filters[key] for key, column in APPLICANT_FILTER_COLUMNS.items()})
+    return correlation_matrix(merge_moments(cube, cells), cube['features'])
+
+
+def applicant_association(df, filters):
+    """Cramér's V between the categorical columns for a filter state, from the KPI cube"""
+    cube = slice_cube(applicant_kpi_cube(df), {column: filters[key] for key, column in APPLICANT_FILTER_COLUMNS.items()})
+    return cramers_v_matrix(cube, list(APPLICANT_FILTER_COLUMNS.values()) + ['Program'])
+
+
+def _style_figure(fig, **layout):
+    """Apply the transparent background and title styling used across this dashboard"""
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color="#2c3e50"),
+        title=dict(font=dict(size=16)),
+        **layout
+    )
+    return fig
+
+
+# Crosstab jobs and the column whose share of each row is the allotment rate
+APPLICANT_CROSSTABS = {
+    'level_status': 'Allotted',
+    'discipline_status': 'Allotted',
+    'college_status': 'Allotted',
+}
+
+
+def applicant_crosstab(df, filtered_df, filters, name):
+    """Counts, margins and allotment rates of a crosstab, built once per filter state"""
+    key = ('applicant', dataset_key(df), freeze(filters), 'crosstab', name)
+    return cached_aggregate(key, lambda: crosstab_summary(applicant_jobs(df, filtered_df, filters)[name].result(),
+                                                          positive=APPLICANT_CROSSTABS[name]))
+
+
+# Tables merged from cubes instead of the filtered rows
+APPLICANT_CUBE_TABLES = {
+    'correlation': applicant_correlation,
+    'association': applicant_association,
+}
+
+
+def applicant_table(df, filtered_df, filters, name):
+    """Named aggregate table of a filter state: a crosstab summary or a cube-merged matrix"""
+    if name in APPLICANT_CUBE_TABLES:
+        key = ('applicant', dataset_key(df), freeze(filters), 'table', name)
+        return cached_aggregate(key, lambda: APPLICANT_CUBE_TABLES[name](df, filters))
+    return applicant_crosstab(df, filtered_df, filters, name)
+
+
+# ---------------------------------------------------------------------------
+# Section builders - shared by the page and the background warm-up.
+# Each gets the filtered data, the worker-pool futures and tables(name),
+# which returns the shared crosstab summary (counts, margins, rates).
+# ---------------------------------------------------------------------------
+
+def build_overview_section(filtered_df, jobs, tables):
+    """Charts for the Overview tab"""
+    try:
+        allotment_counts = tables('level_status')['column_totals']
+    except Exception:
+        allotment_counts = pd.Series()
+    fig_allotment = _style_figure(px.pie(
+        values=allotment_counts.values,
+        names=allotment_counts.index,
+        title="Applicant Distribution by Allotment Status",
+        color_discrete_sequence=px.colors.sequential.Viridis
+    ))
+
+    try:
+        level_counts = tables('level_status')['row_totals']
+    except Exception:
+        level_counts = pd.Series()
+    fig_level = _style_figure(px.bar(
+        x=level_counts.index,
+        y=level_counts.values,
+        title="Applicant Distribution by Level",
+        labels={"x": "Level", "y": "Number of Applicants"},
+        color_discrete_sequence=px.colors.sequential.Plasma
+    ))
+    return {'allotment_fig': fig_allotment, 'level_fig': fig_level}
+
+
+def build_charts_section(filtered_df, jobs, tables):
+    """Charts for the Charts tab"""
+    try:
+        discipline_counts = tables('discipline_status')['row_totals'].head(10)
+    except Exception:
+        discipline_counts = pd.Series()
+    fig_discipline = _style_figure(px.bar(
+        x=discipline_counts.values,
+        y=discipline_counts.index,
+        orientation='h',
+        title="Top 10 Disciplines by Number of Applicants",
+        labels={"x": "Number of Applicants", "y": "Discipline"},
+        color_discrete_sequence=px.colors.sequential.Inferno
+    ))
+
+    try:
+        college_counts = tables('college_status')['row_totals']
+    except Exception:
+        college_counts = pd.Series()
+    fig_college = _style_figure(px.bar(
+        x=college_counts.index,
+        y=college_counts.values,
+        title="Applicant Distribution by College",
+        labels={"x": "College", "y": "Number of Applicants"},
+        color_discrete_sequence=px.colors.sequential.Magma
+    ), xaxis_tickangle=-45)
+
+    allotment_by_level = tables('level_status')['counts']
+    fig_allotment_level = _style_figure(px.bar(
+        allotment_by_level,
+        title="Allotment Status Distribution by Level",
+        labels={"value": "Number of Applicants"},
+        color_discrete_sequence=px.colors.sequential.Cividis
+    ))
+    return {'discipline_fig': fig_discipline, 'college_fig': fig_college, 'allotment_level_fig': fig_allotment_level}
+
+
+def build_rates_section(filtered_df, jobs, tables):
+    """Charts for the Rate Analysis sub-tab"""
+    section = {'discipline_rate_fig': None, 'college_rate_fig': None, 'programs_fig': None}
+
+    # Allotment Rate by Discipline
+    discipline_allotment = tables('discipline_status')
+    if discipline_allotment['rates'] is not None and 'Not Allotted' in discipline_allotment['counts'].columns:
+        discipline_rate = discipline_allotment['rates'].head(10)
+        section['discipline_rate_fig'] = _style_figure(px.bar(
+            x=discipline_rate.values,
+            y=discipline_rate.index,
+            orientation='h',
+            title="Top 10 Disciplines by Allotment Rate",
+            labels={"x": "Allotment Rate (%)", "y": "Discipline"},
+            color_discrete_sequence=px.colors.sequential.Inferno
+        ))
+
+    # Allotment Rate by College
+    college_allotment = tables('college_status')
+    if college_allotment['rates'] is not None and 'Not Allotted' in college_allotment['counts'].columns:
+        college_rate = college_allotment['rates'].head(10)
+        section['college_rate_fig'] = _style_figure(px.bar(
+            x=college_rate.values,
+            y=college_rate.index,
+            orientation='h',
+            title="Top 10 Colleges by Allotment Rate",
+            labels={"x": "Allotment Rate (%)", "y": "College"},
+            color_discrete_sequence=px.colors.sequential.Magma
+        ))
+
+    # Program Popularity Analysis
+    if "Program" in filtered_df.columns:
+        try:
+            program_counts = value_counts(filtered_df["Program"]).head(10)
+        except Exception:
+            program_counts = pd.Series()
+        section['programs_fig'] = _style_figure(px.bar(
+            x=program_counts.values,
+            y=program_counts.index,
+            orientation='h',
+            title="Top 10 Most Popular Programs",
+            labels={"x": "Number of Applicants", "y": "Program"},
+            color_discrete_sequence=px.colors.sequential.Viridis
+        ))
+    return section
+
+
+def build_correlation_section(filtered_df, jobs, tables):
+    """Correlation and association matrices for the Correlation Analysis sub-tab"""
+    section = {'corr_fig': None, 'association_fig': None, 'error': False}
+    try:
+        correlation = tables('correlation')
+        association = tables('association')
+    except Exception:
+        section['error'] = True
+        return section
+    if len(correlation.columns) > 1:
+        section['corr_fig'] = _style_figure(px.imshow(
+            correlation,
+            title="Correlation Matrix (numeric and one-hot encoded columns)",
+            color_continuous_scale=px.colors.sequential.Viridis,
+            zmin=-1, zmax=1
+        ))
+    if len(association.columns) > 1:
+        section['association_fig'] = _style_figure(px.imshow(
+            association.round(3),
+            title="Association between Categorical Columns (Cramér's V)",
+            color_continuous_scale='Blues',
+            zmin=0, zmax=1,
+            text_auto=True
+        ))
+    return section
+
+
+def build_predictive_section(filtered_df, jobs, tables):
+    """Charts and summaries for the Predictive Insights sub-tab"""
+    section = {}
+
+    # Discipline Success Rate Analysis - share of all selected applicants
+    section['discipline_success_fig'] = None
+    section['discipline_success_error'] = False
+    try:
+        discipline_success = tables('discipline_status')['shares']
+        if 'Allotted' in discipline_success.columns:
+            discipline_success_rate = discipline_success['Allotted'] * 100
+            discipline_success_df = pd.DataFrame({
+                'Discipline': discipline_success_rate.index,
+                'Success Rate (%)': discipline_success_rate.values
+            }).sort_values('Success Rate (%)', ascending=False).head(10)
+            section['discipline_success_fig'] = _style_figure(px.bar(
+                discipline_success_df,
+                x='Success Rate (%)',
+                y='Discipline',
+                orientation='h',
+                title="Top 10 Disciplines by Success Rate",
+                labels={"Success Rate (%)": "Success Rate (%)"},
+                color='Success Rate (%)',
+                color_continuous_scale=px.colors.sequential.Viridis
+            ))
+    except Exception:
+        section['discipline_success_error'] = True
+
+    # Top disciplines and colleges by allotment rate (row-normalised crosstabs)
+    for name, table in [('top_disciplines', 'discipline_status'), ('top_colleges', 'college_status')]:
+        section[name] = None
+        try:
+            rates = tables(table)['rates']
+            if rates is not None:
+                section[name] = (rates / 100).head(5)
+        except Exception:
+            pass
+
+    # Program diversity analysis
+    section['program_diversity'] = None
+    if 'Program' in filtered_df.columns:
+        try:
+            unique_programs = pd.Series(filtered_df['Program']).nunique()
+            total_applicants = len(filtered_df)
+            diversity_ratio = unique_programs / total_applicants if total_applicants > 0 else 0
+            section['program_diversity'] = (unique_programs, diversity_ratio)
+        except Exception:
+            pass
+
+    # Data Insights - Level, Discipline and College distributions
+    level_dist = tables('level_status')['row_totals']
+    section['level_dist_fig'] = px.bar(x=level_dist.index, y=level_dist.values,
+                                       title="Applicant Distribution by Level",
+                                       color_discrete_sequence=['#00CC96'])
+    discipline_dist = tables('discipline_status')['row_totals'].head(10)
+    section['discipline_dist_fig'] = px.bar(x=discipline_dist.index, y=discipline_dist.values,
+                                            title="Top 10 Disciplines",
+                                            color_discrete_sequence=['#AB63FA'])
+    section['discipline_dist_fig'].update_layout(xaxis_tickangle=-45)
+    college_dist = tables('college_status')['row_totals'].head(10)
+    section['college_dist_fig'] = px.bar(x=college_dist.index, y=college_dist.values,
+                                         title="Top 10 Colleges",
+                                         color_discrete_sequence=['#FFA15A'])
+    section['college_dist_fig'].update_layout(xaxis_tickangle=-45)
+
+    # Allotment Status Analysis with Multiple Chart Types
+    status_counts = tables('level_status')['column_totals']
+    section['status_bar_fig'] = px.bar(x=status_counts.index, y=status_counts.values,
+                                       title="Allotment Status Distribution (Bar)",
+                                       color_discrete_sequence=['#636EFA'])
+    section['status_pie_fig'] = px.pie(values=status_counts.values, names=status_counts.index,
+                                       title="Allotment Status Distribution (Pie)")
+
+    # Level vs Allotment Status heatmap
+    section['heatmap_fig'] = None
+    try:
+        section['heatmap_fig'] = px.imshow(tables('level_status')['counts'],
+                                           title="Level vs Allotment Status Heatmap",
+                                           color_continuous_scale='RdBu')
+    except Exception:
+        pass
+    return section
+
+
+APPLICANT_SECTIONS = {
+    'overview': build_overview_section,
+    'charts': build_charts_section,
+    'rates': build_rates_section,
+    'correlation': build_correlation_section,
+    'predictive': build_predictive_section,
+}
+
+
+def applicant_jobs(df, filtered_df, filters):
+    """Worker-pool futures for a filter state (submitted once, shared by all sections)"""
+    key = ('applicant', dataset_key(df), freeze(filters), 'jobs')
+    return cached_aggregate(key, lambda: submit_applicant_jobs(df, filtered_df))
+
+
+def applicant_section(name, df, filtered_df, filters):
+    """Return a dashboard section from the aggregate cache, building it on a miss"""
+    key = ('applicant', dataset_key(df), freeze(filters), name)
+    tables = functools.partial(applicant_table, df, filtered_df, filters)
+    return cached_aggregate(key, lambda: APPLICANT_SECTIONS[name](filtered_df, applicant_jobs(df, filtered_df, filters),
+                                                                  tables), persist=True)
+
+
+def applicant_distribution(df, filtered_df, filters, value, by):
+    """Box/violin summaries of a numeric column per group, built once per filter state"""
+    key = ('applicant', dataset_key(df), freeze(filters), 'distribution', value, by)
+    return cached_aggregate(key, lambda: box_summaries(filtered_df, value, by), persist=True)
+
+
+def applicant_predicted_allotment(df, filtered_df, filters, by):
+    """Predicted allotment breakdown of a filter state (None while the model is still training)"""
+    model = allotment_model(df)
+    if model is None or model['error'] is not None:
+        return None
+    key = ('applicant', dataset_key(df), freeze(filters), 'predicted_allotment', by)
+    return cached_aggregate(key, lambda: predicted_allotment(model, df, filtered_df, by), persist=True)
+
+
+def load_applicant_folder(paths):
+    """Loader for the watched applicant data folder: (DataFrame, problems)"""
+    problems = []
+    df = load_applicant_data(paths, on_error=lambda source, e: problems.append(f"Error loading file {source}: {str(e)}"))
+    return df, problems
+
+
+def warm_applicant_dataset(df):
+    """Register a newly ingested folder version and warm its caches before sessions rerun"""
+    if all(column in df.columns for column in APPLICANT_FILTER_COLUMNS.values()):
+        register_dataset('applicant', df)
+        schedule_precompute('applicant', dataset_key(df), applicant_precompute_tasks(df))
+
+
+def applicant_precompute_tasks(df):
+    """Background warm-up: default selection, worker jobs and every tab's section"""
+    state = {}
+
+    def warm_selection():
+        state['filters'] = default_applicant_filters(df)
+        state['filtered_df'] = apply_applicant_filters(df, state['filters'])
+
+    def warm_jobs():
+        jobs = applicant_jobs(df, state['filtered_df'], state['filters'])
+        for future in jobs.values():
+            future.result()
+
+    def warm_section(name):
+        return lambda: applicant_section(name, df, state['filtered_df'], state['filters'])
+
+    tasks = [("default filter selection", warm_selection), ("analytics worker jobs", warm_jobs),
+             ("key metrics", lambda: applicant_kpis(df, state['filters']))]
+    tasks += [(f"{name} section", warm_section(name)) for name in APPLICANT_SECTIONS]
+    return tasks
+
+
+@fragment
+def applicant_kpi_panel(df, filters):
+    """Key metrics with deltas against the selected comparison window; reruns on its own"""
+    metrics = applicant_kpis(df, filters)
+    comparison = st.radio("Compare with", list(COMPARISON_MODES), format_func=COMPARISON_MODES.get,
+                          horizontal=True, key="applicant_comparison")
+    previous_filters = track_previous(st.session_state.setdefault('applicant_filter_history', {}), freeze(filters))
+    if comparison == 'previous_filters':
+        previous_metrics = applicant_kpis(df, dict(previous_filters)) if previous_filters is not None else None
+        missing_comparison = "Change a filter to compare with the previous selection."
+    else:
+        previous_df = previous_dataset('applicant', dataset_key(df))
+        previous_metrics = applicant_kpis(previous_df, filters) if previous_df is not None else None
+        missing_comparison = "Upload a new applicant file to compare with the previous one."
+    deltas = kpi_deltas(metrics, previous_metrics)
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Total Applicants", metrics['total'], delta=deltas['total'], delta_color="normal")
+
+    with col2:
+        st.metric("Allotted Applicants", metrics['allotted'], delta=deltas['allotted'], delta_color="normal")
+
+    with col3:
+        st.metric("Not Allotted", metrics['not_allotted'], delta=deltas['not_allotted'], delta_color="inverse")
+
+    with col4:
+        st.metric("Programs Applied", metrics['programs'], delta=deltas['programs'], delta_color="normal")
+    if previous_metrics is None:
+        st.caption(missing_comparison)
+
+
+@fragment
+def applicant_distribution_panel(df, filtered_df, filters):
+    """Distribution of any numeric column by any dimension; its selectors rerun only this panel"""
+    value_columns = numeric_columns(filtered_df)
+    dimensions = [col for col in list(APPLICANT_FILTER_COLUMNS.values()) + ['Program'] if col in filtered_df.columns]
+    if not value_columns or not dimensions:
+        st.info("No numeric columns available for a distribution summary.")
+        return
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        value = st.selectbox("Value", value_columns, key="applicant_distribution_value")
+    with col2:
+        by = st.selectbox("Group by", dimensions, index=dimensions.index('Level') if 'Level' in dimensions else 0,
+                          key="applicant_distribution_by")
+    with col3:
+        chart_type = st.radio("Chart", CHART_TYPES, horizontal=True, key="applicant_distribution_chart")
+
+    summary = applicant_distribution(df, filtered_df, filters, value, by)
+    if summary is None:
+        st.info(f"No numeric values in {value} for the current selection.")
+        return
+    st.plotly_chart(distribution_figure(summary, chart_type, title=f"Distribution of {value} by {by}"),
+                    use_container_width=True)
+    if summary['hidden_groups']:
+        st.caption(f"Showing the {len(summary['stats'])} largest groups; {summary['hidden_groups']} smaller groups are not drawn.")
+
+
+@fragment(run_every=2)
+def allotment_training_notice(df):
+    """Shown while the allotment model trains; reruns the page once it is ready (or has failed)"""
+    if start_allotment_model(df).done():
+        if in_fragment_rerun():
+            st.rerun(scope='app')
+        return
+    st.info("⏳ Training the allotment model in the background; the predicted allotment appears here when it is ready.")
+
+
+@fragment
+def applicant_allotment_panel(df, filtered_df, filters):
+    """Predicted allotment per group of the selected applicants; its selector reruns only this panel"""
+    try:
+        model = allotment_model(df)
+    except Exception as e:
+        st.warning(f"Unable to train the allotment model: {str(e)}. It is trained again on the next run.")
+        return
+    if model is None:
+        allotment_training_notice(df)
+        return
+    if model['error'] is not None:
+        st.info(model['error'])
+        return
+
+    dimensions = [col for col in CATEGORICAL_FEATURES if col in filtered_df.columns]
+    by = st.selectbox("Break down by", dimensions, index=dimensions.index('College') if 'College' in dimensions else 0,
+                      key="applicant_allotment_by")
+    breakdown = applicant_predicted_allotment(df, filtered_df, filters, by)
+    if not breakdown['applicants']:
+        st.info("No applicants in the current selection.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Predicted Allotments", f"{breakdown['expected']:,.0f}")
+    with col2:
+        st.metric("Actual Allotments", f"{breakdown['actual']:,}")
+    with col3:
+        st.metric("Model AUC (hold-out)", f"{model['auc']:.2f}" if pd.notna(model['auc']) else "N/A")
+    with col4:
+        st.metric("Model Accuracy (hold-out)", f"{model['accuracy']:.1%}" if pd.notna(model['accuracy']) else "N/A")
+
+    table = breakdown['table']
+    top = table.head(15).reset_index()
+    breakdown_fig = _style_figure(px.bar(top, x=by, y=['Allotted', 'Predicted Allotted'], barmode='group',
+                                         title=f"Actual vs Predicted Allotments by {by}"),
+                                  yaxis_title="Applicants", xaxis_tickangle=-45)
+    st.plotly_chart(breakdown_fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        bands = breakdown['bands']
+        bands_fig = _style_figure(px.bar(bands, x=bands.index, y=list(bands.columns), barmode='stack',
+                                         title="Applicants by Allotment Likelihood"),
+                                  xaxis_title="Predicted likelihood", yaxis_title="Applicants")
+        st.plotly_chart(bands_fig, use_container_width=True)
+    with col2:
+        st.write("**Strongest factors** (positive raises the likelihood of allotment)")
+        st.dataframe(model['factors'].round(3), use_container_width=True, hide_index=True)
+    st.dataframe(table, use_container_width=True)
+    st.caption(f"Logistic regression on Level, Discipline, College, Program and the numeric columns, trained on "
+               f"{model['labelled']:,} applicants with a known Allotment Status.")
+
+
+@preempts_background
 def render_applicant_dashboard():
     """Render the applicant dashboard content"""
     
@@ -90,69 +725,24 @@ def render_applicant_dashboard():
     st.sidebar.markdown("<br>", unsafe_allow_html=True)
     st.sidebar.markdown('<div class="sidebar-header">🔍 Filters</div>', unsafe_allow_html=True)
 
-    # Function to load and clean data
+    # Function to load and clean uploaded data
     @st.cache_data
-    def load_data(uploaded_files=None):
-        if uploaded_files and len(uploaded_files) > 0:
-            # Load uploaded files
-            dataframes = []
-            for uploaded_file in uploaded_files:
-                try:
-                    df = pd.read_csv(uploaded_file)
-                    # Clean column names - remove extra quotes and equal signs
-                    df.columns = df.columns.str.replace('="', '').str.replace('""', '').str.replace('"', '')
-                    # Clean data - remove extra quotes from string columns
-                    for col in df.columns:
-                        if df[col].dtype == 'object':
-                            df[col] = df[col].astype(str).str.replace('="', '').str.replace('""', '').str.replace('"', '').str.replace('=', '')
-                    dataframes.append(df)
-                except Exception as e:
-                    st.warning(f"Error loading file {uploaded_file.name}: {str(e)}")
-                    continue
-            
-            # Combine all dataframes
-            if dataframes:
-                combined_df = pd.concat(dataframes, ignore_index=True)
-                # Further clean data values to remove any remaining quotes
-                for col in combined_df.columns:
-                    if combined_df[col].dtype == 'object':
-                        combined_df[col] = combined_df[col].astype(str).str.replace('=', '').str.replace('"', '').str.replace('""', '')
-                return combined_df
-            else:
-                return pd.DataFrame()
-        else:
-            # Get all CSV files in the applicant data directory
-            csv_files = glob.glob("applicant data/*.csv")
-            
-            # Load all CSV files and combine them
-            dataframes = []
-            for file in csv_files:
-                try:
-                    df = pd.read_csv(file)
-                    # Clean column names - remove extra quotes and equal signs
-                    df.columns = df.columns.str.replace('="', '').str.replace('""', '').str.replace('"', '')
-                    # Clean data - remove extra quotes from string columns
-                    for col in df.columns:
-                        if df[col].dtype == 'object':
-                            df[col] = df[col].astype(str).str.replace('="', '').str.replace('""', '').str.replace('"', '').str.replace('=', '')
-                    dataframes.append(df)
-                except Exception as e:
-                    st.warning(f"Error loading file {file}: {str(e)}")
-                    continue
-            
-            # Combine all dataframes
-            if dataframes:
-                combined_df = pd.concat(dataframes, ignore_index=True)
-                # Further clean data values to remove any remaining quotes
-                for col in combined_df.columns:
-                    if combined_df[col].dtype == 'object':
-                        combined_df[col] = combined_df[col].astype(str).str.replace('=', '').str.replace('"', '').str.replace('""', '')
-                return combined_df
-            else:
-                return pd.DataFrame()
-
-    # Load the data
-    df = load_data(uploaded_files)
+    def load_data(uploaded_files):
+        return load_applicant_data(uploaded_files, on_error=lambda source, e: st.warning(
+            f"Error loading file {getattr(source, 'name', source)}: {str(e)}"))
+
+    # Uploaded files take precedence over the CSV files in the applicant data directory
+    if uploaded_files and len(uploaded_files) > 0:
+        df = load_data(uploaded_files)
+    else:
+        # The folder is ingested in the background; this session reruns when a new version is swapped in
+        watched = watch_folder('applicant', APPLICANT_DATA_GLOB, load_applicant_folder, on_change=warm_applicant_dataset)
+        df = watched['df']
+        for problem in watched['problems']:
+            st.warning(problem)
+        st.sidebar.caption(f"📂 {watched['files']} file(s) in 'applicant data', "
+                           f"loaded {datetime.fromtimestamp(watched['loaded_at']).strftime('%H:%M:%S')}")
+        follow_folder_updates('applicant', watched['version'])
 
     if df.empty:
         st.info("No data found. Please upload CSV files using the uploader in the sidebar, or check the 'applicant data' directory for existing files.")
@@ -179,48 +769,61 @@ def render_applicant_dashboard():
             st.error(f"Missing required columns: {missing_columns}")
             st.write("Available columns:", df.columns.tolist())
         else:
+            # Warm the caches for this dataset in the background while the page renders
+            schedule_precompute('applicant', dataset_key(df), applicant_precompute_tasks(df))
+            show_precompute_progress('applicant', dataset_key(df))
+            # Make the dataset available to views that combine datasets (e.g. the funnel)
+            st.session_state['applicant_dataset_key'] = register_dataset('applicant', df)
+            
             # Sidebar filters
             st.sidebar.header("Filters")
             
             # Filter by Allotment Status
             allotment_status = st.sidebar.multiselect(
                 "Select Allotment Status:",
-                options=df["Allotment Status"].unique(),
-                default=df["Allotment Status"].unique(),
+                options=applicant_options(df, "Allotment Status"),
+                default=applicant_options(df, "Allotment Status"),
                 key="applicant_allotment_status"
             )
             
             # Filter by Level
             level = st.sidebar.multiselect(
                 "Select Level:",
-                options=df["Level"].unique(),
-                default=df["Level"].unique(),
+                options=applicant_options(df, "Level"),
+                default=applicant_options(df, "Level"),
                 key="applicant_level"
             )
             
             # Filter by Discipline
             discipline = st.sidebar.multiselect(
                 "Select Discipline:",
-                options=df["Discipline"].unique(),
-                default=df["Discipline"].unique(),
+                options=applicant_options(df, "Discipline"),
+                default=applicant_options(df, "Discipline"),
                 key="applicant_discipline"
             )
             
             # Filter by College
             college = st.sidebar.multiselect(
                 "Select College:",
-                options=df["College"].unique(),
-                default=df["College"].unique(),
+                options=applicant_options(df, "College"),
+                default=applicant_options(df, "College"),
                 key="applicant_college"
             )
             
             # Apply filters
-            filtered_df = df[
-                (df["Allotment Status"].isin(allotment_status)) &
-                (df["Level"].isin(level)) &
-                (df["Discipline"].isin(discipline)) &
-                (df["College"].isin(college))
-            ]
+            filters = {
+                'allotment_status': allotment_status,
+                'level': level,
+                'discipline': discipline,
+                'college': college,
+            }
+            filtered_df = apply_applicant_filters(df, filters)
+            
+            # Submit the heavy aggregations to the analytics worker pool up front;
+            # the sections below collect the results while the rest of the page renders
+            applicant_jobs(df, filtered_df, filters)
+            # The allotment model trains in the worker pool once per dataset
+            start_allotment_model(df)
             
             # Main dashboard with professional styling
             st.markdown("""
@@ -229,30 +832,8 @@ def render_applicant_dashboard():
             </div>
             """, unsafe_allow_html=True)
             
-            # Key metrics with improved styling
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Applicants", len(filtered_df), delta_color="normal")
-            
-            with col2:
-                allotted_count = len(filtered_df[filtered_df["Allotment Status"] == "Allotted"])
-                st.metric("Allotted Applicants", allotted_count, delta=allotted_count - len(filtered_df) // 2, delta_color="normal")
-            
-            with col3:
-                not_allotted_count = len(filtered_df[filtered_df["Allotment Status"] == "Not Allotted"])
-                st.metric("Not Allotted", not_allotted_count, delta=not_allotted_count - len(filtered_df) // 2, delta_color="inverse")
-            
-            with col4:
-                # Fix type checking issue for nunique by using pandas functions explicitly
-                if "Program" in filtered_df.columns:
-                    try:
-                        unique_programs = pd.Series(filtered_df["Program"]).nunique()
-                    except Exception:
-                        unique_programs = 0
-                else:
-                    unique_programs = 0
-                st.metric("Programs Applied", int(unique_programs), delta_color="normal")
+            # Key metrics with deltas against the selected comparison window
+            applicant_kpi_panel(df, filters)
             
             # Professional tabs styling
             st.markdown("""
@@ -270,118 +851,34 @@ def render_applicant_dashboard():
             
             with tab1:
                 st.subheader("Applicant Distribution")
+                overview = applicant_section('overview', df, filtered_df, filters)
                 
                 # Allotment Status Distribution
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     st.write("### By Allotment Status")
-                    # Fix type checking issue by using pandas functions explicitly
-                    try:
-                        allotment_counts = pd.Series(filtered_df["Allotment Status"]).value_counts()
-                    except Exception:
-                        allotment_counts = pd.Series()
-                    fig_allotment = px.pie(
-                        values=allotment_counts.values,
-                        names=allotment_counts.index,
-                        title="Applicant Distribution by Allotment Status",
-                        color_discrete_sequence=px.colors.sequential.Viridis
-                    )
-                    fig_allotment.update_layout(
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color="#2c3e50"),
-                        title=dict(font=dict(size=16))
-                    )
-                    st.plotly_chart(fig_allotment, use_container_width=True)
+                    st.plotly_chart(overview['allotment_fig'], use_container_width=True)
                 
                 with col2:
                     st.write("### By Level")
-                    # Fix type checking issue by using pandas functions explicitly
-                    try:
-                        level_counts = pd.Series(filtered_df["Level"]).value_counts()
-                    except Exception:
-                        level_counts = pd.Series()
-                    fig_level = px.bar(
-                        x=level_counts.index,
-                        y=level_counts.values,
-                        title="Applicant Distribution by Level",
-                        labels={"x": "Level", "y": "Number of Applicants"},
-                        color_discrete_sequence=px.colors.sequential.Plasma
-                    )
-                    fig_level.update_layout(
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color="#2c3e50"),
-                        title=dict(font=dict(size=16))
-                    )
-                    st.plotly_chart(fig_level, use_container_width=True)
+                    st.plotly_chart(overview['level_fig'], use_container_width=True)
             
             with tab2:
                 st.subheader("Detailed Analysis")
+                charts = applicant_section('charts', df, filtered_df, filters)
                 
                 # Discipline Distribution
                 st.write("### By Discipline")
-                # Fix type checking issue by using pandas functions explicitly
-                try:
-                    discipline_counts = pd.Series(filtered_df["Discipline"]).value_counts().head(10)
-                except Exception:
-                    discipline_counts = pd.Series()
-                fig_discipline = px.bar(
-                    x=discipline_counts.values,
-                    y=discipline_counts.index,
-                    orientation='h',
-                    title="Top 10 Disciplines by Number of Applicants",
-                    labels={"x": "Number of Applicants", "y": "Discipline"},
-                    color_discrete_sequence=px.colors.sequential.Inferno
-                )
-                fig_discipline.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color="#2c3e50"),
-                    title=dict(font=dict(size=16))
-                )
-                st.plotly_chart(fig_discipline, use_container_width=True)
+                st.plotly_chart(charts['discipline_fig'], use_container_width=True)
                 
                 # College Distribution
                 st.write("### By College")
-                # Fix type checking issue by using pandas functions explicitly
-                try:
-                    college_counts = pd.Series(filtered_df["College"]).value_counts()
-                except Exception:
-                    college_counts = pd.Series()
-                fig_college = px.bar(
-                    x=college_counts.index,
-                    y=college_counts.values,
-                    title="Applicant Distribution by College",
-                    labels={"x": "College", "y": "Number of Applicants"},
-                    color_discrete_sequence=px.colors.sequential.Magma
-                )
-                fig_college.update_layout(
-                    xaxis_tickangle=-45,
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color="#2c3e50"),
-                    title=dict(font=dict(size=16))
-                )
-                st.plotly_chart(fig_college, use_container_width=True)
+                st.plotly_chart(charts['college_fig'], use_container_width=True)
                 
                 # Allotment Status by Level
                 st.write("### Allotment Status by Level")
-                allotment_by_level = pd.crosstab(filtered_df["Level"], filtered_df["Allotment Status"])
-                fig_allotment_level = px.bar(
-                    allotment_by_level,
-                    title="Allotment Status Distribution by Level",
-                    labels={"value": "Number of Applicants"},
-                    color_discrete_sequence=px.colors.sequential.Cividis
-                )
-                fig_allotment_level.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color="#2c3e50"),
-                    title=dict(font=dict(size=16))
-                )
-                st.plotly_chart(fig_allotment_level, use_container_width=True)
+                st.plotly_chart(charts['allotment_level_fig'], use_container_width=True)
             
             with tab3:
                 st.subheader("Advanced Analysis")
@@ -390,219 +887,72 @@ def render_applicant_dashboard():
                 analysis_tab1, analysis_tab2, analysis_tab3 = st.tabs(["📈 Rate Analysis", "📊 Correlation Analysis", "🔮 Predictive Insights"])
                 
                 with analysis_tab1:
+                    rates = applicant_section('rates', df, filtered_df, filters)
                     col1, col2 = st.columns(2)
                     
                     with col1:
                         # Allotment Rate by Discipline
                         st.write("### Allotment Rate by Discipline")
-                        discipline_allotment = pd.crosstab(filtered_df["Discipline"], filtered_df["Allotment Status"], margins=True)
-                        if 'Allotted' in discipline_allotment.columns and 'Not Allotted' in discipline_allotment.columns:
-                            discipline_allotment['Allotment Rate'] = discipline_allotment['Allotted'] / discipline_allotment['All'] * 100
-                            discipline_rate = discipline_allotment.sort_values('Allotment Rate', ascending=False)['Allotment Rate'].head(10)
-                            fig_discipline_rate = px.bar(
-                                x=discipline_rate.values,
-                                y=discipline_rate.index,
-                                orientation='h',
-                                title="Top 10 Disciplines by Allotment Rate",
-                                labels={"x": "Allotment Rate (%)", "y": "Discipline"},
-                                color_discrete_sequence=px.colors.sequential.Inferno
-                            )
-                            fig_discipline_rate.update_layout(
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                font=dict(color="#2c3e50"),
-                                title=dict(font=dict(size=16))
-                            )
-                            st.plotly_chart(fig_discipline_rate, use_container_width=True)
+                        if rates['discipline_rate_fig'] is not None:
+                            st.plotly_chart(rates['discipline_rate_fig'], use_container_width=True)
                     
                     with col2:
                         # Allotment Rate by College
                         st.write("### Allotment Rate by College")
-                        college_allotment = pd.crosstab(filtered_df["College"], filtered_df["Allotment Status"], margins=True)
-                        if 'Allotted' in college_allotment.columns and 'Not Allotted' in college_allotment.columns:
-                            college_allotment['Allotment Rate'] = college_allotment['Allotted'] / college_allotment['All'] * 100
-                            college_rate = college_allotment.sort_values('Allotment Rate', ascending=False)['Allotment Rate'].head(10)
-                            fig_college_rate = px.bar(
-                                x=college_rate.values,
-                                y=college_rate.index,
-                                orientation='h',
-                                title="Top 10 Colleges by Allotment Rate",
-                                labels={"x": "Allotment Rate (%)", "y": "College"},
-                                color_discrete_sequence=px.colors.sequential.Magma
-                            )
-                            fig_college_rate.update_layout(
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                font=dict(color="#2c3e50"),
-                                title=dict(font=dict(size=16))
-                            )
-                            st.plotly_chart(fig_college_rate, use_container_width=True)
+                        if rates['college_rate_fig'] is not None:
+                            st.plotly_chart(rates['college_rate_fig'], use_container_width=True)
                     
                     # Program Popularity Analysis
-                    if "Program" in filtered_df.columns:
+                    if rates['programs_fig'] is not None:
                         st.write("### Program Popularity Analysis")
-                        # Fix type checking issue by using pandas functions explicitly
-                        try:
-                            program_counts = pd.Series(filtered_df["Program"]).value_counts().head(10)
-                        except Exception:
-                            program_counts = pd.Series()
-                        fig_programs = px.bar(
-                            x=program_counts.values,
-                            y=program_counts.index,
-                            orientation='h',
-                            title="Top 10 Most Popular Programs",
-                            labels={"x": "Number of Applicants", "y": "Program"},
-                            color_discrete_sequence=px.colors.sequential.Viridis
-                        )
-                        fig_programs.update_layout(
-                            paper_bgcolor='rgba(0,0,0,0)',
-                            plot_bgcolor='rgba(0,0,0,0)',
-                            font=dict(color="#2c3e50"),
-                            title=dict(font=dict(size=16))
-                        )
-                        st.plotly_chart(fig_programs, use_container_width=True)
+                        st.plotly_chart(rates['programs_fig'], use_container_width=True)
                 
                 with analysis_tab2:
                     # Level vs Discipline Heatmap and Correlation Analysis
                     st.write("### Level vs Discipline Analysis")
                     
-                    # Create a copy of the filtered data for correlation analysis
-                    corr_df = filtered_df.copy()
-                    
-                    # Convert categorical variables to numerical for correlation analysis
-                    if 'Allotment Status' in corr_df.columns:
-                        # Fix map issue by using pandas functions explicitly
-                        try:
-                            allotment_mapping = {'Allotted': 1, 'Not Allotted': 0}
-                            corr_df['Allotment_Status_Num'] = pd.Series(corr_df['Allotment Status']).map(allotment_mapping)
-                        except Exception:
-                            corr_df['Allotment_Status_Num'] = pd.Series([0] * len(corr_df))
-                    
-                    if 'Level' in corr_df.columns:
-                        # Fix unique and map issues by using pandas functions explicitly
-                        try:
-                            level_series = pd.Series(corr_df['Level'])
-                            level_mapping = {level: idx for idx, level in enumerate(level_series.unique())}
-                            corr_df['Level_Num'] = level_series.map(level_mapping)
-                        except Exception:
-                            corr_df['Level_Num'] = pd.Series([0] * len(corr_df))
-                    
-                    # Select only numerical columns for correlation analysis
-                    numerical_cols = corr_df.select_dtypes(include=['number']).columns.tolist()
-                    
-                    if len(numerical_cols) > 1:
-                        try:
-                            # Fix corr issue by ensuring we're working with a DataFrame
-                            correlation_matrix = pd.DataFrame(corr_df[numerical_cols]).corr()
-                            fig_corr = px.imshow(
-                                correlation_matrix,
-                                title="Correlation Matrix of Numerical Variables",
-                                color_continuous_scale=px.colors.sequential.Viridis
-                            )
-                            fig_corr.update_layout(
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                font=dict(color="#2c3e50"),
-                                title=dict(font=dict(size=16))
-                            )
-                            st.plotly_chart(fig_corr, use_container_width=True)
-                        except Exception as e:
-                            st.warning("Unable to compute correlation matrix.")
+                    # Correlation of the numerical columns plus one-hot Allotment Status and
+                    # Level, and Cramér's V between the categorical columns (merged from cubes)
+                    correlation = applicant_section('correlation', df, filtered_df, filters)
+                    if correlation['corr_fig'] is not None:
+                        st.plotly_chart(correlation['corr_fig'], use_container_width=True)
+                    elif correlation['error']:
+                        st.warning("Unable to compute correlation matrix.")
                     else:
                         st.info("Not enough numerical variables for correlation analysis.")
+                    if correlation['association_fig'] is not None:
+                        st.plotly_chart(correlation['association_fig'], use_container_width=True)
                 
                 with analysis_tab3:
+                    predictive = applicant_section('predictive', df, filtered_df, filters)
+                    
                     # Predictive Insights and Recommendations
                     st.write("### Predictive Insights")
                     
                     # Discipline Success Rate Analysis
                     st.write("### Discipline Success Rate")
-                    # Fix crosstab normalize parameter issue
-                    try:
-                        discipline_success = pd.crosstab(
-                            pd.Series(filtered_df['Discipline']), 
-                            pd.Series(filtered_df['Allotment Status']), 
-                            normalize=True
-                        )
-                        if 'Allotted' in discipline_success.columns:
-                            discipline_success_rate = discipline_success['Allotted'] * 100
-                            discipline_success_df = pd.DataFrame({
-                                'Discipline': discipline_success_rate.index,
-                                'Success Rate (%)': discipline_success_rate.values
-                            }).sort_values('Success Rate (%)', ascending=False).head(10)
-                            
-                            fig_discipline_success = px.bar(
-                                discipline_success_df,
-                                x='Success Rate (%)',
-                                y='Discipline',
-                                orientation='h',
-                                title="Top 10 Disciplines by Success Rate",
-                                labels={"Success Rate (%)": "Success Rate (%)"},
-                                color='Success Rate (%)',
-                                color_continuous_scale=px.colors.sequential.Viridis
-                            )
-                            fig_discipline_success.update_layout(
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                font=dict(color="#2c3e50"),
-                                title=dict(font=dict(size=16))
-                            )
-                            st.plotly_chart(fig_discipline_success, use_container_width=True)
-                    except Exception as e:
+                    if predictive['discipline_success_fig'] is not None:
+                        st.plotly_chart(predictive['discipline_success_fig'], use_container_width=True)
+                    elif predictive['discipline_success_error']:
                         st.warning("Unable to compute discipline success rate analysis.")
                     
                     # Calculate success factors
-                    if 'Allotment Status' in filtered_df.columns and 'Discipline' in filtered_df.columns:
-                        # Discipline success rate
-                        try:
-                            # Fix crosstab normalize parameter issue
-                            discipline_crosstab = pd.crosstab(
-                                pd.Series(filtered_df['Discipline']), 
-                                pd.Series(filtered_df['Allotment Status'])
-                            )
-                            # Normalize manually
-                            discipline_success = discipline_crosstab.div(discipline_crosstab.sum(axis=1), axis=0)
-                            
-                            if 'Allotted' in discipline_success.columns:
-                                top_disciplines = discipline_success['Allotted'].sort_values(ascending=False).head(5)
-                                st.write("**Top 5 Disciplines by Allotment Rate:**")
-                                for discipline, rate in top_disciplines.items():
-                                    st.write(f"- {discipline}: {rate:.2%}")
-                        except Exception as e:
-                            pass
+                    if predictive['top_disciplines'] is not None:
+                        st.write("**Top 5 Disciplines by Allotment Rate:**")
+                        for discipline, rate in predictive['top_disciplines'].items():
+                            st.write(f"- {discipline}: {rate:.2%}")
                     
-                    if 'Allotment Status' in filtered_df.columns and 'College' in filtered_df.columns:
-                        # College success rate
-                        try:
-                            # Fix crosstab normalize parameter issue
-                            college_crosstab = pd.crosstab(
-                                pd.Series(filtered_df['College']), 
-                                pd.Series(filtered_df['Allotment Status'])
-                            )
-                            # Normalize manually
-                            college_success = college_crosstab.div(college_crosstab.sum(axis=1), axis=0)
-                             
-                            if 'Allotted' in college_success.columns:
-                                top_colleges = college_success['Allotted'].sort_values(ascending=False).head(5)
-                                st.write("**Top 5 Colleges by Allotment Rate:**")
-                                for college, rate in top_colleges.items():
-                                    st.write(f"- {college}: {rate:.2%}")
-                        except Exception as e:
-                            pass
+                    if predictive['top_colleges'] is not None:
+                        st.write("**Top 5 Colleges by Allotment Rate:**")
+                        for college, rate in predictive['top_colleges'].items():
+                            st.write(f"- {college}: {rate:.2%}")
                      
                     # Program diversity analysis
-                    if 'Program' in filtered_df.columns:
-                        try:
-                            # Fix nunique issue by using pandas functions explicitly
-                            unique_programs = pd.Series(filtered_df['Program']).nunique()
-                            total_applicants = len(filtered_df)
-                            diversity_ratio = unique_programs / total_applicants if total_applicants > 0 else 0
-                            
-                            st.write("**Program Diversity Metrics:**")
-                            st.write(f"- Unique Programs: {unique_programs}")
-                            st.write(f"- Diversity Ratio: {diversity_ratio:.2%}")
-                        except Exception as e:
-                            pass
+                    if predictive['program_diversity'] is not None:
+                        unique_programs, diversity_ratio = predictive['program_diversity']
+                        st.write("**Program Diversity Metrics:**")
+                        st.write(f"- Unique Programs: {unique_programs}")
+                        st.write(f"- Diversity Ratio: {diversity_ratio:.2%}")
 
                     # Data Insights Section
                     st.subheader("Data Insights")
@@ -612,32 +962,15 @@ def render_applicant_dashboard():
                     
                     with col1:
                         # Level distribution analysis
-                        if 'Level' in filtered_df.columns:
-                            level_dist = filtered_df['Level'].value_counts()
-                            fig_level = px.bar(x=level_dist.index, y=level_dist.values,
-                                              title="Applicant Distribution by Level",
-                                              color_discrete_sequence=['#00CC96'])
-                            st.plotly_chart(fig_level, use_container_width=True)
+                        st.plotly_chart(predictive['level_dist_fig'], use_container_width=True)
                     
                     with col2:
                         # Discipline distribution analysis
-                        if 'Discipline' in filtered_df.columns:
-                            discipline_dist = filtered_df['Discipline'].value_counts().head(10)
-                            fig_discipline = px.bar(x=discipline_dist.index, y=discipline_dist.values,
-                                                   title="Top 10 Disciplines",
-                                                   color_discrete_sequence=['#AB63FA'])
-                            fig_discipline.update_layout(xaxis_tickangle=-45)
-                            st.plotly_chart(fig_discipline, use_container_width=True)
+                        st.plotly_chart(predictive['discipline_dist_fig'], use_container_width=True)
                     
                     with col3:
                         # College distribution analysis
-                        if 'College' in filtered_df.columns:
-                            college_dist = filtered_df['College'].value_counts().head(10)
-                            fig_college = px.bar(x=college_dist.index, y=college_dist.values,
-                                                title="Top 10 Colleges",
-                                                color_discrete_sequence=['#FFA15A'])
-                            fig_college.update_layout(xaxis_tickangle=-45)
-                            st.plotly_chart(fig_college, use_container_width=True)
+                        st.plotly_chart(predictive['college_dist_fig'], use_container_width=True)
                     
                     # Advanced Visualizations
                     st.subheader("Advanced Analysis")
@@ -645,36 +978,25 @@ def render_applicant_dashboard():
                     
                     with adv_col1:
                         # Allotment Status Analysis with Multiple Chart Types
-                        if 'Allotment Status' in filtered_df.columns:
-                            status_counts = filtered_df['Allotment Status'].value_counts()
-                            
-                            # Bar Chart
-                            fig_status_bar = px.bar(x=status_counts.index, y=status_counts.values,
-                                                   title="Allotment Status Distribution (Bar)",
-                                                   color_discrete_sequence=['#636EFA'])
-                            st.plotly_chart(fig_status_bar, use_container_width=True)
-                            
-                            # Pie Chart
-                            fig_status_pie = px.pie(values=status_counts.values, names=status_counts.index,
-                                                   title="Allotment Status Distribution (Pie)")
-                            st.plotly_chart(fig_status_pie, use_container_width=True)
+                        st.plotly_chart(predictive['status_bar_fig'], use_container_width=True)
+                        st.plotly_chart(predictive['status_pie_fig'], use_container_width=True)
                     
                     with adv_col2:
                         # Heatmap Analysis
-                        if 'Level' in filtered_df.columns and 'Allotment Status' in filtered_df.columns:
-                            try:
-                                # Create a crosstab for heatmap
-                                crosstab = pd.crosstab(filtered_df['Level'], filtered_df['Allotment Status'])
-                                fig_heatmap = px.imshow(crosstab, 
-                                                       title="Level vs Allotment Status Heatmap",
-                                                       color_continuous_scale='RdBu')
-                                st.plotly_chart(fig_heatmap, use_container_width=True)
-                            except Exception as e:
-                                st.info("Unable to create heatmap analysis.")
-                        
-                        # Box Plot for Numerical Analysis
-                        if 'Level' in filtered_df.columns:
-                            fig_box = px.box(filtered_df, x='Level', y=filtered_df.index,
-                                            title="Distribution of Applications by Level",
-                                            color_discrete_sequence=['#FECB52'])
-                            st.plotly_chart(fig_box, use_container_width=True)
+                        if predictive['heatmap_fig'] is not None:
+                            st.plotly_chart(predictive['heatmap_fig'], use_container_width=True)
+                        else:
+                            st.info("Unable to create heatmap analysis.")
+
+                    # Box/violin plots from server-side summaries
+                    st.subheader("Distribution Summary")
+                    applicant_distribution_panel(df, filtered_df, filters)
+
+                    # Allotment likelihood of every applicant, scored by the background-trained model
+                    st.subheader("🤖 Predicted Allotment")
+                    applicant_allotment_panel(df, filtered_df, filters)
+            
+            with tab4:
+                st.subheader("Filtered Data")
+                render_data_grid(df, filtered_df, filters, key="applicant_grid")
+                render_export_panel(df, filtered_df, filters, "applicant")
@@ -0,0 +1,139 @@
+"""
+Background Precompute - warms dashboard caches as soon as a dataset is ingested
+Each dashboard schedules a list of (label, callable) tasks for a dataset key.
+A daemon thread runs them one at a time and pauses whenever a dashboard is
+rendering in the foreground, so user interactions always come first.
+"""
+
+import functools
+import threading
+import time
+
+import streamlit as st
+
+from ui_fragments import fragment, in_fragment_rerun
+
+# How often a paused background job re-checks for foreground activity (seconds)
+_IDLE_POLL_SECONDS = 0.05
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+_foreground_count = 0
+_foreground_lock = threading.Lock()
+_foreground_idle = threading.Event()
+_foreground_idle.set()
+
+
+def begin_foreground():
+    """Mark the start of a foreground render; background tasks pause until it ends"""
+    global _foreground_count
+    with _foreground_lock:
+        _foreground_count += 1
+        _foreground_idle.clear()
+
+
+def end_foreground():
+    """Mark the end of a foreground render"""
+    global _foreground_count
+    with _foreground_lock:
+        _foreground_count = max(0, _foreground_count - 1)
+        if _foreground_count == 0:
+            _foreground_idle.set()
+
+
+def preempts_background(render):
+    """Decorator for dashboard render functions: background work pauses while they run"""
+    @functools.wraps(render)
+    def wrapper(*args, **kwargs):
+        begin_foreground()
+        try:
+            return render(*args, **kwargs)
+        finally:
+            end_foreground()
+    return wrapper
+
+
+def _wait_for_idle(job):
+    while not job['cancelled']:
+        if _foreground_idle.wait(timeout=_IDLE_POLL_SECONDS):
+            return True
+    return False
+
+
+def _run_job(job):
+    for label, task in job['tasks']:
+        if not _wait_for_idle(job):
+            return
+        job['label'] = label
+        try:
+            task()
+        except Exception as e:
+            # A failing task must not stop the remaining warm-up work
+            job['errors'].append(f"{label}: {e}")
+        job['done'] += 1
+    job['label'] = None
+    job['finished_at'] = time.time()
+
+
+def schedule_precompute(dashboard, dataset_key, tasks):
+    """Start warming caches for a newly ingested dataset (no-op if already scheduled)"""
+    if dataset_key is None:
+        return
+    with _jobs_lock:
+        current = _jobs.get(dashboard)
+        if current is not None and current['dataset_key'] == dataset_key:
+            return
+        if current is not None:
+            # A newer dataset supersedes the one still being warmed
+            current['cancelled'] = True
+        job = {
+            'dataset_key': dataset_key,
+            'tasks': list(tasks),
+            'done': 0,
+            'label': None,
+            'errors': [],
+            'cancelled': False,
+            'finished_at': None,
+        }
+        _jobs[dashboard] = job
+    thread = threading.Thread(target=_run_job, args=(job,), name=f"precompute-{dashboard}", daemon=True)
+    thread.start()
+
+
+def precompute_status(dashboard):
+    """Return the progress of a dashboard's background job, or None"""
+    with _jobs_lock:
+        job = _jobs.get(dashboard)
+        if job is None:
+            return None
+        return {
+            'dataset_key': job['dataset_key'],
+            'done': job['done'],
+            'total': len(job['tasks']),
+            'label': job['label'],
+            'finished': job['finished_at'] is not None,
+            'errors': list(job['errors']),
+        }
+
+
+@fragment(run_every=1)
+def _progress_indicator(dashboard, dataset_key):
+    status = precompute_status(dashboard)
+    if status is None or status['dataset_key'] != dataset_key:
+        return
+    if status['finished']:
+        # The full rerun no longer draws this timed fragment, so it stops polling
+        if in_fragment_rerun():
+            st.rerun(scope='app')
+        return
+    fraction = status['done'] / status['total'] if status['total'] else 1.0
+    st.progress(fraction, text=f"⏳ Precomputing {status['label'] or 'dashboard'} ({status['done']}/{status['total']})")
+
+
+def show_precompute_progress(dashboard, dataset_key):
+    """Show a small progress bar while the background job for this dataset is running"""
+    status = precompute_status(dashboard)
+    if status is None or status['dataset_key'] != dataset_key or status['finished']:
+        return
+    _progress_indicator(dashboard, dataset_key)
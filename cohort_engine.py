@@ -0,0 +1,102 @@
+"""
+Cohort Engine - cumulative conversion curves for enquiry cohorts
+Enquiries are bucketed by enquiry week or month; the day deltas from enquiry
+to conversion are histogrammed per cohort in a single np.bincount pass and
+cumulated into conversion curves. Everything works on NumPy arrays, so a few
+million enquiries take well under a second.
+"""
+
+import numpy as np
+import pandas as pd
+
+from time_bucketing import bucket_codes, bucket_starts
+
+COHORT_FREQUENCIES = {
+    'Weekly': 'W',
+    'Monthly': 'M',
+}
+
+# Days after enquiry covered by the curves
+DEFAULT_MAX_DAYS = 180
+
+def _to_day(value):
+    return pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype(np.int64)
+
+
+def cohort_codes(dates, freq='M'):
+    """Integer cohort code per date (weeks start on Monday) and a validity mask"""
+    return bucket_codes(dates, freq)
+
+
+def cohort_start(code, freq='M'):
+    """First day of the cohort with the given code"""
+    return bucket_starts(int(code), 1, freq)[0]
+
+
+def cohort_label(code, freq='M'):
+    """Display label for a cohort code"""
+    start = cohort_start(code, freq)
+    if freq == 'W':
+        return f"Week of {start:%d %b %Y}"
+    return f"{start:%b %Y}"
+
+
+def cohort_curves(enquiry_dates, days_to_convert, freq='M', max_days=DEFAULT_MAX_DAYS, as_of=None):
+    """
+    Cumulative conversion curves per enquiry cohort.
+    days_to_convert is NaN for enquiries that have not converted. Points a cohort
+    could not have reached yet (cohort start + day > as_of) are NaN.
+    """
+    codes, valid = cohort_codes(enquiry_dates, freq)
+    days = np.asarray(pd.to_numeric(pd.Series(days_to_convert), errors='coerce'), dtype='float64')
+    codes, days = codes[valid], days[valid]
+    if len(codes) == 0:
+        return None
+
+    first = codes.min()
+    codes = codes - first
+    n_cohorts = int(codes.max()) + 1
+    n_days = int(max_days) + 1
+
+    sizes = np.bincount(codes, minlength=n_cohorts)
+    converted = np.isfinite(days) & (days >= 0) & (days <= max_days)
+    # Histogram of (cohort, day) pairs: one flat bincount instead of a loop over cohorts
+    flat = codes[converted] * n_days + np.floor(days[converted]).astype(np.int64)
+    counts = np.bincount(flat, minlength=n_cohorts * n_days).reshape(n_cohorts, n_days)
+    total_converted = np.bincount(codes[np.isfinite(days) & (days >= 0)], minlength=n_cohorts)
+
+    present = sizes > 0
+    cohort_ids = np.flatnonzero(present) + first
+    sizes, counts, total_converted = sizes[present], counts[present], total_converted[present]
+
+    curves = np.cumsum(counts, axis=1) / sizes[:, None] * 100.0
+    if as_of is not None:
+        starts = np.array([_to_day(cohort_start(c, freq)) for c in cohort_ids])
+        observed = (_to_day(as_of) - starts)[:, None] >= np.arange(n_days)[None, :]
+        curves = np.where(observed, curves, np.nan)
+
+    return {
+        'freq': freq,
+        'cohorts': [cohort_label(c, freq) for c in cohort_ids],
+        'cohort_starts': [cohort_start(c, freq) for c in cohort_ids],
+        'sizes': sizes,
+        'converted': total_converted,
+        'days': np.arange(n_days),
+        'curves': curves,
+    }
+
+
+def cohort_summary(curves, checkpoints=(7, 30, 60, 90)):
+    """Table of cohort size, total conversion and conversion by each checkpoint day"""
+    if curves is None:
+        return pd.DataFrame()
+    summary = pd.DataFrame({
+        'Cohort': curves['cohorts'],
+        'Cohort Size': curves['sizes'],
+        'Converted': curves['converted'],
+        'Conversion %': np.round(curves['converted'] / curves['sizes'] * 100.0, 1),
+    })
+    for day in checkpoints:
+        if day < curves['curves'].shape[1]:
+            summary[f'By Day {day} %'] = np.round(curves['curves'][:, day], 1)
+    return summary
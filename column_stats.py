@@ -0,0 +1,127 @@
+"""
+Column Stats - column statistics (zone maps) recorded when a dataset is ingested
+For every requested column the dataset keeps its null count, distinct values
+(in order of first appearance) and, for numeric and date columns, the minimum
+and maximum overall and per row group of ROW_GROUP_ROWS rows. The sidebars
+read their options and slider bounds from these statistics instead of scanning
+the frame, and range filters skip row groups whose [min, max] cannot match.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cache import cached_aggregate
+from dataset_registry import dataset_key
+
+# Rows per row group (the unit a range filter can skip)
+ROW_GROUP_ROWS = 16384
+
+# Columns with more distinct values than this keep no value list
+MAX_DISTINCT = 5000
+
+
+def _ordered_values(series):
+    """Float view of a numeric or datetime column (NaN where missing), or None for other columns"""
+    if pd.api.types.is_datetime64_any_dtype(series) and getattr(series.dt, 'tz', None) is None:
+        values = series.to_numpy(dtype='datetime64[ns]').astype('int64').astype('float64')
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype='float64', na_value=np.nan)
+    return None
+
+
+def _scalar(value, kind):
+    if np.isnan(value):
+        return None
+    return pd.Timestamp(int(value)) if kind == 'datetime' else float(value)
+
+
+def build_column_stats(df, columns):
+    """Null counts, distinct values and overall / per-row-group extremes of the given columns"""
+    starts = np.arange(0, len(df), ROW_GROUP_ROWS)
+    stats = {'rows': len(df), 'row_group_rows': ROW_GROUP_ROWS, 'columns': {}}
+    for column in columns:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        distinct = pd.unique(series.dropna())
+        entry = {
+            'nulls': int(series.isna().sum()),
+            'distinct': len(distinct),
+            'values': list(distinct) if len(distinct) <= MAX_DISTINCT else None,
+            'kind': None, 'min': None, 'max': None,
+        }
+        values = _ordered_values(series)
+        if values is not None and len(values):
+            kind = 'datetime' if pd.api.types.is_datetime64_any_dtype(series) else 'numeric'
+            # fmin/fmax skip NaN, so a row group is NaN only when all of its values are missing
+            group_min = np.fmin.reduceat(values, starts)
+            group_max = np.fmax.reduceat(values, starts)
+            entry.update({
+                'kind': kind,
+                'min': _scalar(np.fmin.reduce(group_min), kind),
+                'max': _scalar(np.fmax.reduce(group_max), kind),
+                'group_min': group_min,
+                'group_max': group_max,
+            })
+        stats['columns'][column] = entry
+    return stats
+
+
+def dataset_column_stats(name, df, columns):
+    """Column statistics of a tagged dataset, computed once and kept on disk (None for an untagged frame)"""
+    key = dataset_key(df)
+    if key is None:
+        return None
+    return cached_aggregate((name, key, 'column_stats', tuple(columns)), lambda: build_column_stats(df, columns),
+                            persist=True)
+
+
+def stat_bounds(stats, column):
+    """(min, max) of a numeric or date column, (None, None) when unknown"""
+    entry = (stats or {}).get('columns', {}).get(column)
+    if entry is None:
+        return None, None
+    return entry['min'], entry['max']
+
+
+def stat_values(stats, column, dropna=True):
+    """Distinct values of a column in order of first appearance (None when unknown or too many)
+
+    With dropna=False a trailing NaN stands for the missing values, like Series.unique().
+    """
+    entry = (stats or {}).get('columns', {}).get(column)
+    if entry is None or entry['values'] is None:
+        return None
+    return entry['values'] + ([np.nan] if not dropna and entry['nulls'] else [])
+
+
+def prune_row_groups(df, stats, ranges):
+    """Rows of df in the row groups that can match every (low, high) range of {column: range}
+
+    Returns df itself when no group can be skipped or the statistics do not
+    describe df (an untagged or already filtered frame).
+    """
+    if stats is None or len(df) != stats['rows'] or not len(df):
+        return df
+    keep = None
+    for column, (low, high) in ranges.items():
+        entry = stats['columns'].get(column)
+        if entry is None or entry['kind'] is None:
+            continue
+        if entry['kind'] == 'datetime':
+            low, high = pd.Timestamp(low).value, pd.Timestamp(high).value
+        # NaN extremes (all values missing) compare False, so such groups are skipped
+        matches = (entry['group_max'] >= low) & (entry['group_min'] <= high)
+        keep = matches if keep is None else keep & matches
+    if keep is None or keep.all():
+        return df
+    # Runs of consecutive kept groups; a single run is a cheap slice, several are gathered
+    size = stats['row_group_rows']
+    edges = np.diff(np.r_[0, keep.astype(np.int8), 0])
+    runs = [(start * size, min(stop * size, len(df))) for start, stop in zip(np.flatnonzero(edges == 1),
+                                                                             np.flatnonzero(edges == -1))]
+    if len(runs) == 1:
+        return df.iloc[runs[0][0]:runs[0][1]]
+    return df.iloc[np.concatenate([np.arange(start, stop) for start, stop in runs] or [np.empty(0, dtype=np.int64)])]
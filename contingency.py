@@ -0,0 +1,69 @@
+"""
+Contingency Matrices - two-way counts built straight from categorical codes
+The (row, column) code pairs are combined into one integer per pair and counted
+with a single np.bincount (or a scipy.sparse COO sum for very wide matrices),
+so no pivot_table or intermediate frames are needed. Full row/column totals are
+kept alongside the (optionally top-N truncated, optionally sparse) matrix, so
+"top college" style summaries read the same result as the heatmaps.
+"""
+
+import numpy as np
+from scipy import sparse as sp
+
+# Above this many cells the matrix is built as a sparse COO sum instead of a dense bincount
+SPARSE_BUILD_CELLS = 4_000_000
+
+
+def contingency_counts(row_codes, col_codes, n_rows, n_cols, as_sparse=False, weights=None):
+    """Count (row, column) code pairs; rows with a negative (missing) code are dropped
+
+    weights (one per pair) sums pre-aggregated counts, e.g. the records of a cube.
+    """
+    valid = (row_codes >= 0) & (col_codes >= 0)
+    rows, cols = row_codes[valid].astype('int64'), col_codes[valid].astype('int64')
+    weights = weights[valid] if weights is not None else None
+    if n_rows * n_cols > SPARSE_BUILD_CELLS:
+        data = weights if weights is not None else np.ones(len(rows), dtype='int64')
+        counts = sp.coo_matrix((data, (rows, cols)), shape=(n_rows, n_cols)).tocsr()
+        return counts if as_sparse else counts.toarray()
+    counts = np.bincount(rows * n_cols + cols, weights=weights, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+    return sp.csr_matrix(counts) if as_sparse else counts
+
+
+def _top_positions(totals, top_n):
+    """Positions of the labels to keep: all that occur, or the top_n largest by total"""
+    present = np.flatnonzero(totals > 0)
+    if top_n is None or len(present) <= top_n:
+        return present, False
+    # Stable sort so ties keep label order
+    order = present[np.argsort(-totals[present], kind='stable')]
+    return order[:top_n], True
+
+
+def contingency_table(row_codes, row_labels, col_codes, col_labels, top_rows=None, top_cols=None, as_sparse=False):
+    """Contingency matrix with full margins, truncated to the top rows/columns if requested
+
+    Without truncation labels keep their (sorted) code order, like pd.crosstab;
+    truncated axes are ordered by descending total.
+    """
+    n_rows, n_cols = len(row_labels), len(col_labels)
+    counts = contingency_counts(row_codes, col_codes, n_rows, n_cols, as_sparse=as_sparse)
+
+    # Margins count every row with a valid label on that axis (like value_counts)
+    row_totals = np.bincount(row_codes[row_codes >= 0], minlength=n_rows)
+    col_totals = np.bincount(col_codes[col_codes >= 0], minlength=n_cols)
+
+    pair_rows = np.asarray(counts.sum(axis=1)).ravel()
+    pair_cols = np.asarray(counts.sum(axis=0)).ravel()
+    keep_rows, rows_truncated = _top_positions(np.where(pair_rows > 0, row_totals, 0), top_rows)
+    keep_cols, cols_truncated = _top_positions(np.where(pair_cols > 0, col_totals, 0), top_cols)
+    counts = counts[keep_rows][:, keep_cols] if as_sparse else counts[np.ix_(keep_rows, keep_cols)]
+
+    return {
+        'index': [row_labels[i] for i in keep_rows],
+        'columns': [col_labels[i] for i in keep_cols],
+        'counts': counts,
+        'row_totals': ([row_labels[i] for i in np.flatnonzero(row_totals)], row_totals[row_totals > 0]),
+        'column_totals': ([col_labels[i] for i in np.flatnonzero(col_totals)], col_totals[col_totals > 0]),
+        'truncated': rows_truncated or cols_truncated,
+    }
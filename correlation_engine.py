@@ -0,0 +1,142 @@
+"""
+Correlation Engine - correlation matrices merged from per-cell sufficient statistics
+For every combination of the filter dimensions (a cell) the engine keeps the
+pairwise sums needed for Pearson correlation: counts of rows where both
+features are present, sums, sums of squares and cross products. The
+correlation or covariance matrix of any filter state is the sum of its cells'
+statistics, so no row is read after the cube is built. Categorical columns
+enter as one-hot indicator features; categorical pairs are summarised with
+Cramér's V from weighted contingency tables.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+
+from contingency import contingency_counts
+
+
+def one_hot_features(df, columns):
+    """Indicator features (name, values) for every label of the given categorical columns"""
+    features = []
+    for column in columns:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        missing = series.isna().to_numpy()
+        for label in sorted(series.dropna().unique(), key=str):
+            values = (series == label).to_numpy(dtype='float64')
+            values[missing] = np.nan
+            features.append((f"{column}: {label}", values))
+    return features
+
+
+def build_moment_cube(df, dimensions, numeric, categorical=()):
+    """Pairwise sufficient statistics of numeric and one-hot features per dimension combination"""
+    dimensions = [column for column in dimensions if column in df.columns]
+    codes = df.groupby([df[column] for column in dimensions], dropna=False, observed=True, sort=False).ngroup().to_numpy()
+    n_cells = int(codes.max()) + 1 if len(codes) else 0
+    cells = pd.DataFrame({column: df[column].to_numpy() for column in dimensions})
+    cells['_cell'] = codes
+    cells = cells.drop_duplicates('_cell').set_index('_cell').sort_index()
+
+    features = [(column, pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64'))
+                for column in numeric if column in df.columns]
+    features += one_hot_features(df, categorical)
+    names = [name for name, _ in features]
+    k = len(names)
+    values = np.column_stack([values for _, values in features]) if features else np.empty((len(df), 0))
+    # Shifting by the overall mean leaves correlations unchanged and keeps the sums well conditioned
+    shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(k)
+
+    stats = {name: np.zeros((n_cells, k, k)) for name in ('count', 'sum', 'sum_sq', 'cross')}
+    # Rows sorted by cell, so each cell's statistics are k x k matrix products of a contiguous block
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_cells + 1))
+    filled = values[order]
+    del values, features
+    filled -= shift
+    present = ~np.isnan(filled)
+    mask = present.astype('float64')
+    filled[~present] = 0.0
+    for cell in range(n_cells):
+        block = slice(bounds[cell], bounds[cell + 1])
+        cell_filled, cell_mask = filled[block], mask[block]
+        # Entry (i, j) only counts rows where both feature i and feature j are present
+        stats['count'][cell] = cell_mask.T @ cell_mask
+        stats['sum'][cell] = cell_filled.T @ cell_mask
+        stats['sum_sq'][cell] = (cell_filled ** 2).T @ cell_mask
+        stats['cross'][cell] = cell_filled.T @ cell_filled
+    return {'cells': cells, 'features': names, 'stats': stats}
+
+
+def select_moment_cells(cube, selections):
+    """Cell codes matching a {column: selected values} filter state"""
+    cells = cube['cells']
+    mask = pd.Series(True, index=cells.index)
+    for column, values in selections.items():
+        if column in cells.columns:
+            mask &= cells[column].isin(values)
+    return cells.index[mask].to_numpy()
+
+
+def merge_moments(cube, cells):
+    """Sum of the sufficient statistics of the selected cells"""
+    return {name: value[cells].sum(axis=0) for name, value in cube['stats'].items()}
+
+
+def _pairwise(moments):
+    n = moments['count']
+    sum_x, sum_y = moments['sum'], moments['sum'].T
+    sum_xx, sum_yy = moments['sum_sq'], moments['sum_sq'].T
+    return n, sum_x, sum_y, sum_xx, sum_yy, moments['cross']
+
+
+def covariance_matrix(moments, features):
+    """Sample covariance over pairwise complete rows (like DataFrame.cov)"""
+    n, sum_x, sum_y, _, _, cross = _pairwise(moments)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (cross - sum_x * sum_y / n) / (n - 1)
+    cov[n < 2] = np.nan
+    return pd.DataFrame(cov, index=features, columns=features)
+
+
+def correlation_matrix(moments, features):
+    """Pearson correlation over pairwise complete rows (like DataFrame.corr)"""
+    n, sum_x, sum_y, sum_xx, sum_yy, cross = _pairwise(moments)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_x = n * sum_xx - sum_x ** 2
+        var_y = n * sum_yy - sum_y ** 2
+        corr = (n * cross - sum_x * sum_y) / np.sqrt(var_x * var_y)
+    # A column that is constant over the pair's rows (up to rounding) has no correlation
+    constant = var_x <= 1e-10 * np.abs(n * sum_xx)
+    corr[(n < 2) | constant | constant.T] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+    return pd.DataFrame(corr, index=features, columns=features)
+
+
+def cramers_v(counts):
+    """Cramér's V of a contingency matrix (empty rows and columns are ignored)"""
+    counts = np.asarray(counts, dtype='float64')
+    counts = counts[counts.sum(axis=1) > 0][:, counts.sum(axis=0) > 0]
+    total = counts.sum()
+    if total == 0 or min(counts.shape) < 2:
+        return np.nan
+    expected = np.outer(counts.sum(axis=1), counts.sum(axis=0)) / total
+    chi2 = ((counts - expected) ** 2 / expected).sum()
+    return float(np.sqrt(chi2 / total / (min(counts.shape) - 1)))
+
+
+def cramers_v_matrix(cube, columns, weight='records'):
+    """Cramér's V for every pair of categorical columns of a count cube (one row per combination)"""
+    columns = [column for column in columns if column in cube.columns]
+    encoded = {column: pd.factorize(cube[column], sort=True) for column in columns}
+    weights = cube[weight].to_numpy(dtype='float64')
+    matrix = pd.DataFrame(np.eye(len(columns)), index=columns, columns=columns)
+    for i, first in enumerate(columns):
+        for second in columns[i + 1:]:
+            (row_codes, row_labels), (col_codes, col_labels) = encoded[first], encoded[second]
+            counts = contingency_counts(row_codes, col_codes, len(row_labels), len(col_labels), weights=weights)
+            matrix.loc[first, second] = matrix.loc[second, first] = cramers_v(
+                counts.toarray() if sp.issparse(counts) else counts)
+    return matrix
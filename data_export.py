@@ -0,0 +1,317 @@
+"""
+Data Export - streaming CSV / Excel / Parquet export of the filtered rows
+Rows are written chunk by chunk straight to a file (write-only workbook mode
+for Excel, row groups for Parquet), so an export never builds the whole file
+as one string or frame. Small selections are written when the download button
+is clicked; large ones run as a background job of the browser session that
+leaves a ready-to-download artifact in its own file on disk.
+"""
+
+import functools
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import pandas as pd
+import streamlit as st
+from openpyxl import Workbook
+
+from aggregate_cache import freeze
+from analytics_workers import selection_positions
+from dataset_registry import dataset_key
+from ui_fragments import fragment, in_fragment_rerun
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Format label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+# Rows converted and written per step
+EXPORT_CHUNK_ROWS = 50000
+
+# Selections larger than this are exported by a background job
+# (openpyxl writes a few thousand rows per second, CSV and Parquet far more)
+BACKGROUND_EXPORT_ROWS = {
+    'CSV': 200000,
+    'Excel': 20000,
+    'Parquet': 1000000,
+}
+
+# Excel allows 1,048,576 rows per sheet including the header row
+EXCEL_MAX_ROWS = 1048575
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'admission_app_exports')
+
+_exports = {}
+_exports_lock = threading.Lock()
+
+
+def available_formats():
+    """Export formats usable in this environment (Parquet needs pyarrow)"""
+    return [name for name in EXPORT_FORMATS if name != 'Parquet' or pq is not None]
+
+
+def iter_chunks(df, positions=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield the selected rows of df in chunks of at most chunk_rows"""
+    total = len(df) if positions is None else len(positions)
+    if total == 0:
+        # An empty selection still produces a file with the header
+        yield df.iloc[:0]
+    for start in range(0, total, chunk_rows):
+        if positions is None:
+            yield df.iloc[start:start + chunk_rows]
+        else:
+            yield df.iloc[positions[start:start + chunk_rows]]
+
+
+def write_csv(chunks, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=i == 0, index=False)
+
+
+def _excel_rows(chunk):
+    """Plain Python rows with missing values as empty cells"""
+    values = chunk.astype(object)
+    values = values.where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_xlsx(chunks, path):
+    # Write-only mode streams rows to disk instead of keeping every cell object
+    wb = Workbook(write_only=True)
+    ws = None
+    sheet_rows = 0
+    for chunk in chunks:
+        header = [str(col) for col in chunk.columns]
+        if ws is None:
+            ws = wb.create_sheet("Data")
+            ws.append(header)
+        for row in _excel_rows(chunk):
+            if sheet_rows >= EXCEL_MAX_ROWS:
+                # Continue on a new sheet once a sheet is full
+                ws = wb.create_sheet(f"Data ({len(wb.worksheets) + 1})")
+                ws.append(header)
+                sheet_rows = 0
+            ws.append(row)
+            sheet_rows += 1
+    wb.save(path)
+
+
+def _arrow_chunk(chunk):
+    """Text-like columns as strings so every row group has the same schema"""
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        series = chunk[col]
+        if not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+                or pd.api.types.is_datetime64_any_dtype(series)):
+            chunk[col] = series.astype('string')
+    chunk.columns = [str(col) for col in chunk.columns]
+    return pa.Table.from_pandas(chunk, preserve_index=False)
+
+
+def write_parquet(chunks, path):
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    writer = None
+    try:
+        for chunk in chunks:
+            table = _arrow_chunk(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_WRITERS = {
+    'CSV': write_csv,
+    'Excel': write_xlsx,
+    'Parquet': write_parquet,
+}
+
+
+def export_to_file(df, positions, fmt, path, progress=None):
+    """Stream the selected rows of df to path; the file appears only when complete"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial_path = path + '.part'
+    total = len(df) if positions is None else len(positions)
+
+    def chunks():
+        written = 0
+        for chunk in iter_chunks(df, positions):
+            yield chunk
+            written += len(chunk)
+            if progress is not None:
+                progress(written, total)
+
+    try:
+        _WRITERS[fmt](chunks(), partial_path)
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return path
+
+
+def export_bytes(df, positions, fmt):
+    """Export to a temporary file and return its contents (used for direct downloads)"""
+    extension = EXPORT_FORMATS[fmt][0]
+    fd, path = tempfile.mkstemp(suffix=f'.{extension}')
+    os.close(fd)
+    try:
+        export_to_file(df, positions, fmt, path)
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_artifact(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# ---------------------------------------------------------------------------
+# Background exports
+# ---------------------------------------------------------------------------
+
+def _run_export(job, df, positions):
+    def progress(written, total):
+        job['written'] = written
+
+    try:
+        export_to_file(df, positions, job['format'], job['path'], progress=progress)
+    except Exception as e:
+        job['error'] = str(e)
+    with _exports_lock:
+        job['finished_at'] = time.time()
+        if job['discarded'] and os.path.exists(job['path']):
+            os.remove(job['path'])
+
+
+def _session_id():
+    # Export jobs belong to the browser session that started them
+    return st.session_state.setdefault('export_session_id', uuid.uuid4().hex)
+
+
+def _discard(job):
+    if job['finished_at'] is not None and os.path.exists(job['path']):
+        os.remove(job['path'])
+    else:
+        # The running export removes its file when it ends
+        job['discarded'] = True
+
+
+def start_export(session, name, df, positions, fmt, signature):
+    """Start a background export of the selected rows (replaces the session's previous artifact)"""
+    extension = EXPORT_FORMATS[fmt][0]
+    with _exports_lock:
+        current = _exports.get((session, name, signature))
+        if current is not None and current['error'] is None:
+            # Already running or ready for this selection
+            return current
+        # One artifact per dashboard and session: drop the ones of other selections
+        for key in [key for key in _exports if key[:2] == (session, name)]:
+            _discard(_exports.pop(key))
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=f"{name}_", suffix=f".{extension}", dir=EXPORT_DIR)
+        os.close(fd)
+        job = {
+            'signature': signature,
+            'format': fmt,
+            'path': path,
+            'rows': len(df) if positions is None else len(positions),
+            'written': 0,
+            'error': None,
+            'finished_at': None,
+            'discarded': False,
+        }
+        _exports[(session, name, signature)] = job
+    thread = threading.Thread(target=_run_export, args=(job, df, positions), name=f"export-{name}", daemon=True)
+    thread.start()
+    return job
+
+
+def export_status(session, name, signature):
+    """Return the progress of a session's background export of a selection, or None"""
+    with _exports_lock:
+        job = _exports.get((session, name, signature))
+        return dict(job) if job is not None else None
+
+
+@fragment(run_every=1)
+def _export_progress(session, name, signature):
+    status = export_status(session, name, signature)
+    if status is None or status['finished_at'] is not None:
+        # The full rerun shows the result and no longer draws this timed fragment
+        if in_fragment_rerun():
+            st.rerun(scope='app')
+        return
+    fraction = status['written'] / status['rows'] if status['rows'] else 1.0
+    st.progress(fraction, text=f"⏳ Exporting {status['written']:,} of {status['rows']:,} rows")
+
+
+def _export_artifact(status, name, file_name):
+    if status['error']:
+        st.warning(f"Export failed: {status['error']}")
+        return
+    st.download_button(
+        f"📥 Download {status['rows']:,} rows ({status['format']})",
+        data=functools.partial(read_artifact, status['path']),
+        file_name=file_name,
+        mime=EXPORT_FORMATS[status['format']][1],
+        key=f"{name}_export_artifact",
+        on_click='ignore',
+    )
+
+
+@fragment
+def render_export_panel(df, filtered_df, filters, name):
+    """Format selector and download button for the filtered rows of a dashboard"""
+    positions = selection_positions(df, filtered_df)
+    if positions is not None:
+        positions = positions[positions >= 0]
+    total = len(df) if positions is None else len(positions)
+
+    fmt = st.selectbox("Export format", available_formats(), key=f"{name}_export_format")
+    extension, mime = EXPORT_FORMATS[fmt]
+    file_name = f"{name}_filtered_data.{extension}"
+
+    if total <= BACKGROUND_EXPORT_ROWS[fmt]:
+        # Written only when the button is clicked
+        st.download_button(
+            f"📥 Download {total:,} rows as {fmt}",
+            data=functools.partial(export_bytes, df, positions, fmt),
+            file_name=file_name,
+            mime=mime,
+            key=f"{name}_export_download",
+            on_click='ignore',
+        )
+        return
+
+    session = _session_id()
+    signature = (dataset_key(df), freeze(filters), fmt)
+    status = export_status(session, name, signature)
+    if status is None:
+        st.caption(f"{total:,} rows are exported in the background; the file is kept ready for download.")
+        if st.button(f"Prepare {fmt} export", key=f"{name}_export_start"):
+            start_export(session, name, df, positions, fmt, signature)
+            _export_progress(session, name, signature)
+        return
+    if status['finished_at'] is None:
+        _export_progress(session, name, signature)
+    elif status['signature'] == signature:
+        _export_artifact(status, name, file_name)
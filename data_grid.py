@@ -0,0 +1,113 @@
+"""
+Data Grid - paginated, server-side view of a dataset
+Sorting, search and column projection run on the server against the full
+dataset: every column gets a cached sort order (computed once per dataset),
+the current selection is a boolean mask over it, and only the rows and
+columns of the visible page are sent to the browser.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregate_cache import cached_aggregate, freeze
+from analytics_workers import selection_positions
+from dataset_registry import dataset_key
+from ui_fragments import fragment
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def sort_order(df, column, ascending=True):
+    """Row positions of df ordered by column (missing values last, ties in row order), cached per dataset"""
+    def compute():
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            values = series.to_numpy()
+            if pd.api.types.is_datetime64_any_dtype(series):
+                values = values.astype('datetime64[ns]').astype('int64').astype('float64')
+                values[series.isna().to_numpy()] = np.nan
+            values = values.astype('float64')
+            # argsort puts NaN last; negating keeps them there for a descending order
+            order = np.argsort(values if ascending else -values, kind='stable')
+        else:
+            codes, labels = pd.factorize(series, sort=True)
+            if not ascending:
+                codes = np.where(codes < 0, codes, len(labels) - 1 - codes)
+            codes = np.where(codes < 0, len(labels), codes)
+            order = np.argsort(codes, kind='stable')
+        return order.astype('int32')
+    key = dataset_key(df)
+    if key is None:
+        return compute()
+    return cached_aggregate(('grid', key, 'sort_order', column, ascending), compute)
+
+
+def search_mask(df, columns, term):
+    """Rows where any of the given text columns contains term (case-insensitive)"""
+    mask = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series):
+            continue
+        mask |= series.astype('string').str.contains(term, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+def grid_positions(df, filtered_df, filters, columns, search='', sort_by=None, ascending=True):
+    """Row positions (in display order) of the filtered rows matching the search"""
+    def compute():
+        selected = np.ones(len(df), dtype=bool)
+        rows = selection_positions(df, filtered_df)
+        if rows is not None:
+            selected[:] = False
+            selected[rows[rows >= 0]] = True
+        if search:
+            selected &= search_mask(df, columns, search)
+        if sort_by is None:
+            return np.flatnonzero(selected).astype('int32')
+        order = sort_order(df, sort_by, ascending)
+        return order[selected[order]]
+    key = ('grid', dataset_key(df), freeze(filters), freeze(list(columns)), search, sort_by, ascending)
+    if dataset_key(df) is None:
+        return compute()
+    return cached_aggregate(key, compute)
+
+
+@fragment
+def render_data_grid(df, filtered_df, filters, key):
+    """Paginated table with search, sorting and column selection; reruns on its own"""
+    all_columns = list(df.columns)
+    col1, col2 = st.columns([2, 3])
+    with col1:
+        search = st.text_input("🔍 Search", key=f"{key}_search", placeholder="Search text columns").strip()
+    with col2:
+        columns = st.multiselect("Columns", all_columns, default=all_columns, key=f"{key}_columns")
+    columns = columns or all_columns
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("Sort by", ['(original order)'] + columns, key=f"{key}_sort")
+    with col2:
+        ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True, key=f"{key}_order") == "Ascending"
+    with col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    positions = grid_positions(df, filtered_df, filters, columns, search,
+                               None if sort_by == '(original order)' else sort_by, ascending)
+    total = len(positions)
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        # The selection shrank below the current page
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    page = min(int(page), pages)
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+    # Only the visible page is materialised and sent to the browser
+    st.dataframe(df.iloc[positions[start:end]][columns], use_container_width=True)
+    if total:
+        st.caption(f"Showing rows {start + 1:,}–{end:,} of {total:,}")
+    else:
+        st.caption("No rows match the current filters and search.")
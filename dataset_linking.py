@@ -0,0 +1,317 @@
+"""
+Dataset Linking - joins the enquiry, applicant and admission datasets
+Each dataset is reduced to a small link frame (normalised keys + stage dates),
+indexed by the shared keys (enquiry number, applicant ID, college/program) and
+joined with vectorised index joins. Link frames, key indexes and pairwise joins
+are cached per dataset key, so when one source changes only the parts that
+involve it are recomputed.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cache import cached_aggregate
+from dataset_registry import dataset_key
+
+STAGES = ['enquiry', 'applicant', 'admission']
+
+STAGE_LABELS = {
+    'enquiry': 'Enquiries',
+    'applicant': 'Applicants',
+    'admission': 'Admissions',
+}
+
+# Candidate column names for each shared key (matched ignoring case and punctuation)
+LINK_KEY_COLUMNS = {
+    'enquiry_no': ['Enquiry No.', 'Enquiry Number', 'Enquiry ID'],
+    'applicant_id': ['Applicant ID', 'Application No.', 'Application Number', 'Application ID', 'Applicant No.', 'Form No.'],
+    'college': ['College', 'College Name'],
+    'program': ['Program', 'Programme Name', 'Program Name'],
+}
+
+# Keys used to match individual records, and dimensions used for the breakdown
+RECORD_KEYS = ['enquiry_no', 'applicant_id']
+DIMENSION_KEYS = ['college', 'program']
+
+# Key that identifies one record of each stage (first one present wins)
+STAGE_RECORD_KEYS = {
+    'enquiry': ['enquiry_no'],
+    'applicant': ['applicant_id', 'enquiry_no'],
+    'admission': ['applicant_id', 'enquiry_no'],
+}
+
+# Date of the event that puts a record into each stage
+STAGE_DATE_COLUMNS = {
+    'enquiry': ['Enquiry Date'],
+    'applicant': ['Application Date', 'Date of Application', 'Applied On', 'Registration Date'],
+    'admission': ['Date of Admission', 'Admission Date'],
+}
+
+# First-touch date carried by later stages (e.g. the admission data's `enquiry date`)
+ENQUIRY_DATE_COLUMNS = ['Enquiry Date']
+
+_MISSING_KEYS = {'', 'NAN', 'NONE', 'NULL', 'NA', 'N/A', '<NA>', 'NAT'}
+
+
+def _column_token(name):
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+def find_column(df, candidates):
+    """Return the first column of df matching one of the candidate names, or None"""
+    tokens = {_column_token(col): col for col in df.columns}
+    for candidate in candidates:
+        column = tokens.get(_column_token(candidate))
+        if column is not None:
+            return column
+    return None
+
+
+def normalize_keys(series):
+    """Normalise key values for matching: strip Excel quoting/whitespace, upper-case"""
+    keys = series.astype('string').str.strip()
+    keys = keys.str.replace(r'^="?|"$', '', regex=True).str.replace(r'\s+', ' ', regex=True).str.upper()
+    return keys.mask(keys.isin(_MISSING_KEYS))
+
+
+def _to_dates(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, errors='coerce')
+
+
+def _build_link_frame(stage, df):
+    link = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for key, candidates in LINK_KEY_COLUMNS.items():
+        column = find_column(df, candidates)
+        if column is None:
+            continue
+        link[key] = normalize_keys(df[column]).to_numpy()
+        if key in DIMENSION_KEYS:
+            link[f'{key}_label'] = df[column].astype('string').str.strip().to_numpy()
+
+    date_column = find_column(df, STAGE_DATE_COLUMNS[stage])
+    if date_column is not None:
+        link['event_date'] = _to_dates(df[date_column]).to_numpy()
+    enquiry_column = find_column(df, ENQUIRY_DATE_COLUMNS)
+    if enquiry_column is not None and stage != 'enquiry':
+        link['enquiry_date'] = _to_dates(df[enquiry_column]).to_numpy()
+    return link
+
+
+def link_frame(stage, df):
+    """Return the link frame (normalised keys and stage dates) for a dataset"""
+    key = dataset_key(df)
+    if key is None:
+        return _build_link_frame(stage, df)
+    return cached_aggregate(('linking', stage, key, 'link_frame'), lambda: _build_link_frame(stage, df))
+
+
+def _build_key_index(link, key):
+    keyed = link[link[key].notna()]
+    grouped = keyed.groupby(key, sort=False)
+    index = pd.DataFrame({'records': grouped.size()})
+    for column in ('event_date', 'enquiry_date'):
+        if column in keyed.columns:
+            # Earliest event per key (first application, first admission, ...)
+            index[column] = grouped[column].min()
+    return index
+
+
+def key_index(stage, df, key):
+    """Return a frame indexed by the normalised key (one row per key value), or None"""
+    link = link_frame(stage, df)
+    if key not in link.columns:
+        return None
+    ds_key = dataset_key(df)
+    if ds_key is None:
+        return _build_key_index(link, key)
+    return cached_aggregate(('linking', stage, ds_key, 'key_index', key), lambda: _build_key_index(link, key))
+
+
+def _build_join(left, right):
+    date_columns = ('event_date', 'enquiry_date')
+    left_part = left[[c for c in date_columns if c in left.columns]].add_prefix('left_')
+    right_part = right[[c for c in ('records',) + date_columns if c in right.columns]].add_prefix('right_')
+    # Index-aligned join: pandas matches the keys through the hash table of the index
+    joined = left_part.join(right_part, how='left')
+    joined['matched'] = joined['right_records'].notna()
+    return joined
+
+
+def join_stages(left_stage, left_df, right_stage, right_df, key):
+    """Left-join two datasets on a shared record key; None if either lacks the key"""
+    left = key_index(left_stage, left_df, key)
+    right = key_index(right_stage, right_df, key)
+    if left is None or right is None:
+        return None
+    left_key, right_key = dataset_key(left_df), dataset_key(right_df)
+    if left_key is None or right_key is None:
+        return _build_join(left, right)
+    cache_key = ('linking', 'join', left_stage, left_key, right_stage, right_key, key)
+    return cached_aggregate(cache_key, lambda: _build_join(left, right))
+
+
+def _days_between(start, end):
+    if start is None or end is None:
+        return pd.Series(dtype='float64')
+    days = (end - start).dt.total_seconds() / 86400.0
+    days = days[days.notna() & (days >= 0)]
+    return days.reset_index(drop=True)
+
+
+def _stage_size(stage, df):
+    link = link_frame(stage, df)
+    for key in STAGE_RECORD_KEYS[stage]:
+        if key in link.columns:
+            return int(link[key].nunique())
+    return len(link)
+
+
+def _link_stage(prev_stage, prev_df, stage, df, datasets):
+    """Find the best record-level link from an earlier stage to this one"""
+    # Prefer matching on the enquiry number against the enquiry data itself
+    if datasets.get('enquiry') is not None:
+        joined = join_stages('enquiry', datasets['enquiry'], stage, df, 'enquiry_no')
+        if joined is not None:
+            return joined, 'enquiry_no', 'enquiry'
+    for key in RECORD_KEYS:
+        joined = join_stages(prev_stage, prev_df, stage, df, key)
+        if joined is not None:
+            return joined, key, prev_stage
+    return None, None, None
+
+
+def _reached_keys(stage, df, reached, key):
+    """Values of key held by the records of a stage that came through every earlier stage
+
+    reached is (key, matched flags per key value) of the join that led to the
+    stage; None when the records cannot be traced by this key.
+    """
+    reached_key, matched = reached
+    values = matched.index[matched.to_numpy()]
+    if reached_key == key:
+        return values
+    link = link_frame(stage, df)
+    if key not in link.columns or reached_key not in link.columns:
+        return None
+    return pd.Index(link.loc[link[reached_key].isin(values), key].dropna().unique())
+
+
+def _enquiry_dates(joined, left_stage):
+    """Best available first-enquiry date for each joined record"""
+    if left_stage == 'enquiry' and 'left_event_date' in joined.columns:
+        return joined['left_event_date']
+    for column in ('right_enquiry_date', 'left_enquiry_date'):
+        if column in joined.columns:
+            return joined[column]
+    return None
+
+
+def _build_breakdown(datasets):
+    """Counts per college (or program) for each stage, joined on the dimension key"""
+    for dimension in DIMENSION_KEYS:
+        links = {stage: link_frame(stage, df) for stage, df in datasets.items() if df is not None}
+        links = {stage: link for stage, link in links.items() if dimension in link.columns}
+        if len(links) < 2:
+            continue
+        counts = []
+        labels = []
+        for stage in STAGES:
+            if stage not in links:
+                continue
+            link = links[stage]
+            counts.append(link[dimension].value_counts().rename(STAGE_LABELS[stage]))
+            labels.append(link.dropna(subset=[dimension]).groupby(dimension)[f'{dimension}_label'].first())
+        breakdown = pd.concat(counts, axis=1).fillna(0).astype(int)
+        label_map = pd.concat(labels)
+        label_map = label_map[~label_map.index.duplicated()]
+        breakdown.index = pd.Index([label_map.get(k, k) for k in breakdown.index])
+        breakdown.index.name = 'College' if dimension == 'college' else 'Program'
+        columns = list(breakdown.columns)
+        for earlier, later in zip(columns, columns[1:]):
+            breakdown[f'{earlier} → {later} %'] = (breakdown[later] / breakdown[earlier].replace(0, np.nan) * 100).round(1)
+        return breakdown.sort_values(columns[0], ascending=False)
+    return None
+
+
+def _build_funnel(datasets):
+    stages = []
+    days = {}
+    prev_stage, prev_df = None, None
+    reached = None
+
+    for stage in STAGES:
+        df = datasets.get(stage)
+        if df is None:
+            continue
+        count = _stage_size(stage, df)
+        linked_by = None
+        if prev_df is not None:
+            joined, linked_by, left_stage = _link_stage(prev_stage, prev_df, stage, df, datasets)
+            if joined is not None:
+                matched = joined['matched']
+                if reached is not None:
+                    # Nested funnel: only records that also reached the previous stage count
+                    allowed = _reached_keys(prev_stage, prev_df, reached, linked_by)
+                    if allowed is not None:
+                        matched = matched & joined.index.isin(allowed)
+                count = int(matched.sum())
+                if 'right_event_date' in joined.columns:
+                    linked = joined[matched]
+                    days[stage] = _days_between(_enquiry_dates(linked, left_stage), linked['right_event_date'])
+            reached = (linked_by, matched) if joined is not None else None
+
+        if stage != 'enquiry' and (stage not in days or days[stage].empty):
+            # No record link: fall back to the stage's own first-touch date
+            link = link_frame(stage, df)
+            if 'enquiry_date' in link.columns and 'event_date' in link.columns:
+                days[stage] = _days_between(link['enquiry_date'], link['event_date'])
+
+        previous_count = stages[-1]['count'] if stages else None
+        stages.append({
+            'stage': stage,
+            'label': STAGE_LABELS[stage],
+            'count': count,
+            'linked_by': linked_by,
+            'conversion': (count / previous_count * 100) if previous_count else None,
+        })
+        prev_stage, prev_df = stage, df
+
+    first = stages[0]['count'] if stages else 0
+    for entry in stages:
+        entry['overall'] = (entry['count'] / first * 100) if first else None
+
+    return {
+        'stages': stages,
+        'days': {stage: values for stage, values in days.items() if values is not None and not values.empty},
+        'breakdown': _build_breakdown(datasets),
+    }
+
+
+def funnel_metrics(enquiry_df=None, applicant_df=None, admission_df=None):
+    """Enquiry -> applicant -> admission funnel counts, conversion rates and time-to-convert"""
+    datasets = {
+        'enquiry': enquiry_df if enquiry_df is not None and not enquiry_df.empty else None,
+        'applicant': applicant_df if applicant_df is not None and not applicant_df.empty else None,
+        'admission': admission_df if admission_df is not None and not admission_df.empty else None,
+    }
+    keys = tuple(dataset_key(df) if df is not None else None for df in datasets.values())
+    if any(df is not None and key is None for df, key in zip(datasets.values(), keys)):
+        return _build_funnel(datasets)
+    # Only the assembly is keyed on all three datasets; the expensive parts are cached per source
+    return cached_aggregate(('linking', 'funnel') + keys, lambda: _build_funnel(datasets))
+
+
+def summarize_days(days):
+    """Mean, median and 90th percentile of a time-to-convert series (in days)"""
+    if days is None or len(days) == 0:
+        return None
+    return {
+        'count': int(len(days)),
+        'mean': float(days.mean()),
+        'median': float(days.median()),
+        'p90': float(days.quantile(0.9)),
+    }
@@ -0,0 +1,91 @@
+"""
+Dataset Registry - content fingerprints for the datasets loaded by the dashboards
+Every loaded frame is tagged with a dataset key so caches and worker processes
+can refer to the same dataset without hashing the frame again.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Key under which the dataset fingerprint is stored in DataFrame.attrs
+DATASET_KEY_ATTR = 'dataset_key'
+
+_READ_CHUNK_BYTES = 1 << 20
+
+
+def fingerprint_sources(sources):
+    """Return a content hash for a list of uploaded files and/or file paths"""
+    digest = hashlib.blake2b(digest_size=16)
+    for source in sources:
+        if source is None:
+            continue
+        if hasattr(source, 'getvalue'):
+            # Streamlit UploadedFile (BytesIO) - hash the buffer, not the stream position
+            digest.update(source.getvalue())
+        else:
+            with open(source, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(_READ_CHUNK_BYTES), b''):
+                    digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def tag_dataset(df, dataset_key):
+    """Attach a dataset key to a DataFrame (propagates through filtering and copies)"""
+    if df is not None:
+        df.attrs[DATASET_KEY_ATTR] = dataset_key
+    return df
+
+
+def dataset_key(df):
+    """Return the dataset key of a tagged DataFrame, or None"""
+    if df is None:
+        return None
+    return df.attrs.get(DATASET_KEY_ATTR)
+
+
+# ---------------------------------------------------------------------------
+# Process-wide registry of loaded datasets, so views that combine datasets
+# (e.g. the enquiry -> applicant -> admission funnel) can find them by key
+# ---------------------------------------------------------------------------
+
+# Datasets kept per dashboard (older versions are dropped first)
+MAX_DATASETS_PER_NAME = 4
+
+_datasets = {}
+_datasets_lock = threading.Lock()
+
+
+def register_dataset(name, df):
+    """Register a tagged dataset under a dashboard name; returns its dataset key"""
+    key = dataset_key(df)
+    if key is None:
+        return None
+    with _datasets_lock:
+        versions = _datasets.setdefault(name, OrderedDict())
+        versions[key] = df
+        versions.move_to_end(key)
+        while len(versions) > MAX_DATASETS_PER_NAME:
+            versions.popitem(last=False)
+    return key
+
+
+def get_dataset(name, key=None):
+    """Return a registered dataset by key, or the most recently registered one"""
+    with _datasets_lock:
+        versions = _datasets.get(name)
+        if not versions:
+            return None
+        if key is None:
+            return next(reversed(versions.values()))
+        return versions.get(key)
+
+
+def previous_dataset(name, key):
+    """Return the dataset registered under name just before the one with the given key"""
+    with _datasets_lock:
+        keys = list(_datasets.get(name, ()))
+        if key not in keys or keys.index(key) == 0:
+            return None
+        return _datasets[name][keys[keys.index(key) - 1]]
@@ -0,0 +1,173 @@
+"""
+Disk Cache - persistent second tier for parsed datasets and dashboard sections
+Entries are pickled to one file each under CACHE_DIR, named by a hash of the
+cache key and the code version (the app's source files plus the library
+versions), so a restarted server picks up warm results for unchanged data and
+code while any edit invalidates them. Files are written to a temporary name
+and renamed into place; reads refresh the file time, and the least recently
+used files are removed once the directory grows past MAX_BYTES.
+"""
+
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cache directory (shared by the dashboard, the report generator and the API server)
+CACHE_DIR = os.environ.get('ANALYTICS_CACHE_DIR', os.path.join(APP_DIR, '.analytics_cache'))
+
+# Size limit of the cache directory; 0 disables the disk cache
+MAX_BYTES = int(float(os.environ.get('ANALYTICS_CACHE_MB', '1024')) * 1024 * 1024)
+
+_SUFFIX = '.pkl'
+
+_lock = threading.Lock()
+_total_bytes = None
+_code_version = None
+
+
+def code_version():
+    """Hash of the app's source files and the versions of the libraries whose objects are pickled"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{sys.version_info[:2]} {pd.__version__} {np.__version__} {plotly.__version__}".encode())
+        for path in sorted(glob.glob(os.path.join(APP_DIR, '*.py'))):
+            digest.update(os.path.basename(path).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def enabled():
+    return MAX_BYTES > 0
+
+
+def persistable(key):
+    """Only keys tied to a content hash are stored (an untagged dataset has no key)"""
+    return enabled() and not any(part is None for part in key)
+
+
+def _path(key):
+    digest = hashlib.blake2b(repr((code_version(), key)).encode('utf-8'), digest_size=20).hexdigest()
+    return os.path.join(CACHE_DIR, digest + _SUFFIX)
+
+
+def _entries():
+    """(mtime, size, path) of the cache files"""
+    entries = []
+    for path in glob.glob(os.path.join(CACHE_DIR, '*' + _SUFFIX)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def load(key):
+    """Return the stored value for key, or None on a miss"""
+    if not persistable(key):
+        return None
+    path = _path(key)
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or unreadable entry - drop it and recompute
+        _remove(path)
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return value
+
+
+def store(key, value):
+    """Write value for key atomically; values that cannot be pickled are skipped"""
+    global _total_bytes
+    if not persistable(key):
+        return False
+    try:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    if len(data) > MAX_BYTES:
+        return False
+
+    temp_path = None
+    path = _path(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.part')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        with _lock:
+            # A rewritten key replaces its old file, whose size leaves the total
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(temp_path, path)
+            if _total_bytes is None:
+                _total_bytes = sum(size for _, size, _ in _entries())
+            else:
+                _total_bytes += len(data) - replaced
+            if _total_bytes > MAX_BYTES:
+                _evict()
+    except OSError:
+        if temp_path is not None:
+            _remove(temp_path)
+        return False
+    return True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _evict():
+    """Remove least recently used files until the cache is back under 90% of MAX_BYTES"""
+    global _total_bytes
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= MAX_BYTES * 0.9:
+            break
+        _remove(path)
+        total -= size
+    _total_bytes = total
+
+
+def cached(key, compute):
+    """Return the stored value for key, computing and storing it on a miss"""
+    value = load(key)
+    if value is None:
+        value = compute()
+        store(key, value)
+    return value
+
+
+def clear():
+    """Remove every cache file"""
+    global _total_bytes
+    with _lock:
+        for _, _, path in _entries():
+            _remove(path)
+        _total_bytes = 0
@@ -0,0 +1,141 @@
+"""
+Distribution Charts - box and violin plots drawn from server-side summaries
+Quartiles, whiskers, a capped sample of outliers and a binned density curve
+are computed per group on the server; the figures are built from those
+summaries, so the chart payload depends on the number of groups, not on the
+number of rows.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from quantile_sketch import distribution_from_rows
+
+# Largest groups shown (the rest are counted but not drawn)
+MAX_GROUPS = 20
+
+# Outliers kept per group (evenly spread over the sorted outliers, extremes included)
+MAX_OUTLIERS = 40
+
+# Points of each density curve, and bins the values are counted into before smoothing
+DENSITY_POINTS = 64
+DENSITY_BINS = 256
+
+CHART_TYPES = ['Box', 'Violin']
+
+# Column-name words of identifiers: anywhere in the name, or as its last word ('Application No.', 'S.No.', 'Student ID')
+IDENTIFIER_WORDS = {'serial', 'phone', 'mobile', 'contact', 'aadhaar', 'aadhar', 'pincode', 'pin', 'zip', 'uuid'}
+IDENTIFIER_LAST_WORDS = {'id', 'no', 'number', 'num', 'code', 'sno'}
+
+
+def is_identifier(column):
+    """True for column names of identifiers (serial, application or phone numbers), which are not measures"""
+    words = re.findall(r'[a-z0-9]+', str(column).lower())
+    return bool(words) and (words[-1] in IDENTIFIER_LAST_WORDS or not IDENTIFIER_WORDS.isdisjoint(words))
+
+
+def numeric_columns(df, exclude=()):
+    """Numeric measure columns of df that a distribution or correlation can be drawn for"""
+    return [col for col in df.columns
+            if col not in exclude and pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+            and not is_identifier(col)]
+
+
+def _sample_outliers(values, low, high):
+    outliers = np.sort(values[(values < low) | (values > high)])
+    if len(outliers) > MAX_OUTLIERS:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, MAX_OUTLIERS).round().astype(int)]
+    return outliers
+
+
+def _density(values, grid):
+    """Gaussian kernel density of values on grid, from binned counts (Scott's bandwidth)"""
+    if len(values) < 2 or grid[-1] == grid[0]:
+        return np.zeros(len(grid))
+    counts, edges = np.histogram(values, bins=DENSITY_BINS, range=(grid[0], grid[-1]))
+    centers = (edges[:-1] + edges[1:]) / 2
+    bandwidth = max(1.06 * values.std() * len(values) ** -0.2, (grid[-1] - grid[0]) / DENSITY_BINS)
+    kernel = np.exp(-0.5 * ((grid[:, None] - centers[None, :]) / bandwidth) ** 2)
+    return kernel @ counts / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+
+
+def box_summaries(df, value, by):
+    """Box statistics, outlier samples and density curves of value per group of by
+
+    Returns None when the column has no numeric values.
+    """
+    values = pd.to_numeric(df[value], errors='coerce')
+    frame = pd.DataFrame({by: df[by].to_numpy(), value: values.to_numpy()}).dropna()
+    if frame.empty:
+        return None
+    counts = frame[by].value_counts()
+    shown = counts.head(MAX_GROUPS).index
+    frame = frame[frame[by].isin(shown)]
+    stats = distribution_from_rows(frame, value, by).loc[shown]
+
+    grid = np.linspace(frame[value].min(), frame[value].max(), DENSITY_POINTS)
+    outliers, densities = {}, {}
+    for group, part in frame.groupby(by, sort=False, observed=True)[value]:
+        part = part.to_numpy(dtype='float64')
+        outliers[group] = _sample_outliers(part, stats.at[group, 'lower_whisker'], stats.at[group, 'upper_whisker'])
+        densities[group] = _density(part, grid)
+    return {
+        'value': value,
+        'by': by,
+        'stats': stats,
+        'outliers': outliers,
+        'grid': grid,
+        'densities': densities,
+        'hidden_groups': len(counts) - len(shown),
+    }
+
+
+def box_figure(summary, title=None):
+    """Box plot drawn from precomputed quartiles, whiskers and outlier samples"""
+    stats = summary['stats']
+    groups = [str(group) for group in stats.index]
+    fig = go.Figure(go.Box(
+        x=groups,
+        q1=stats['p25'], median=stats['p50'], q3=stats['p75'],
+        lowerfence=stats['lower_whisker'], upperfence=stats['upper_whisker'], mean=stats['mean'],
+        name=summary['value'], boxpoints=False, marker_color='#FECB52',
+    ))
+    outlier_x = [str(group) for group, points in summary['outliers'].items() for _ in points]
+    outlier_y = [point for points in summary['outliers'].values() for point in points]
+    if outlier_y:
+        fig.add_trace(go.Scatter(x=outlier_x, y=outlier_y, mode='markers', name='Outliers',
+                                 marker=dict(color='#EF553B', size=5, opacity=0.6)))
+    fig.update_layout(title=title or f"{summary['value']} by {summary['by']}",
+                      xaxis_title=summary['by'], yaxis_title=summary['value'], showlegend=False)
+    return fig
+
+
+def violin_figure(summary, title=None):
+    """Violin plot drawn from precomputed density curves, with the quartiles marked"""
+    stats, grid = summary['stats'], summary['grid']
+    peak = max((density.max() for density in summary['densities'].values()), default=0) or 1
+    fig = go.Figure()
+    for position, group in enumerate(stats.index):
+        half_width = summary['densities'][group] / peak * 0.45
+        fig.add_trace(go.Scatter(
+            x=np.r_[position - half_width, (position + half_width)[::-1]], y=np.r_[grid, grid[::-1]],
+            fill='toself', mode='lines', line=dict(width=1, color='#636EFA'), name=str(group), hoverinfo='name',
+        ))
+    fig.add_trace(go.Scatter(
+        x=list(range(len(stats))) * 3, y=list(stats['p25']) + list(stats['p50']) + list(stats['p75']),
+        mode='markers', marker=dict(color='white', line=dict(color='black', width=1),
+                                    size=[6] * len(stats) + [9] * len(stats) + [6] * len(stats)),
+        name='Quartiles', hoverinfo='y',
+    ))
+    fig.update_layout(title=title or f"{summary['value']} by {summary['by']}", showlegend=False,
+                      xaxis=dict(title=summary['by'], tickmode='array', tickvals=list(range(len(stats))),
+                                 ticktext=[str(group) for group in stats.index]),
+                      yaxis_title=summary['value'])
+    return fig
+
+
+def distribution_figure(summary, chart_type='Box', title=None):
+    return violin_figure(summary, title) if chart_type == 'Violin' else box_figure(summary, title)
@@ -3,9 +3,562 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 from datetime import datetime, date
+from dataset_registry import fingerprint_sources, tag_dataset, dataset_key, register_dataset
+from analytics_workers import submit_job, crosstab_frame, crosstab_totals
+from aggregate_cache import cached_aggregate, freeze
+import disk_cache
+from background_precompute import preempts_background, schedule_precompute, show_precompute_progress
+from ui_fragments import fragment
+from data_export import render_export_panel
+from time_bucketing import (GRANULARITIES, ROLLING_WINDOWS, UNIT_LABELS, time_buckets, rolling_mean,
+                            hour_of_day_counts, year_month_counts)
+from memory_optimizer import optimize_dataset, drop_unused_categories
+from column_stats import build_column_stats, dataset_column_stats, stat_bounds, stat_values, prune_row_groups
+from touch_sequences import SERVICE_LEVEL_HOURS, build_touch_sequences, select_follow_ups, response_time_summary
+import functools
 import warnings
 warnings.filterwarnings('ignore')
 
+# Specializations shown in the College x Specialization heatmaps (largest first)
+HEATMAP_TOP_SPECIALIZATIONS = 40
+
+# Columns whose statistics (zone maps) are recorded at ingest for the sidebar and the date filter
+ENQUIRY_STATS_COLUMNS = ['College', 'Specialization', 'Enquiry Type', 'Enquiry Date']
+
+# Formats tried in order for Enquiry Date; the first that parses any value is used
+ENQUIRY_DATE_FORMATS = [
+    '%d-%b-%Y %I:%M %p',  # Format like "20-Feb-2025 2:40 PM"
+    '%d-%b-%Y %H:%M',     # Format like "20-Feb-2025 14:40"
+    '%d-%m-%Y %H:%M',     # Format like "20-02-2025 14:40"
+    '%m-%d-%Y %H:%M'      # Format like "02-20-2025 14:40"
+]
+
+# Columns of the first touch kept per enquiry in event-sequence mode (the sidebar filters apply to them)
+TOUCH_ATTRIBUTES = ['College', 'Specialization', 'Enquiry Type']
+
+
+def load_enquiry_data(source):
+    """Read an enquiry CSV (file path or uploaded file); parsed frames are kept on disk"""
+    key = fingerprint_sources([source])
+    df = tag_dataset(disk_cache.cached(('enquiry', key, 'dataset'),
+                                       lambda: optimize_dataset('enquiry', key, parse_enquiry_csv(source))), key)
+    # Record the column statistics now, so the sidebar never scans the rows
+    enquiry_column_stats(df)
+    return df
+
+
+def parse_enquiry_csv(source):
+    """Read an enquiry CSV: de-duplicate and parse the dates"""
+    # Read the CSV file
+    df = pd.read_csv(source)
+    
+    # Remove duplicate entries (entries with same Enquiry No. and different times);
+    # the event-sequence mode keeps them (see parse_enquiry_touches)
+    df_unique = df.drop_duplicates(subset=['Enquiry No.'], keep='first')
+    
+    # Convert Enquiry Date to datetime with error handling
+    if 'Enquiry Date' in df_unique.columns:
+        df_unique['Enquiry Date'] = parse_enquiry_dates(df_unique['Enquiry Date'])
+    
+    # Remove rows with invalid dates
+    if df_unique is not None and 'Enquiry Date' in df_unique.columns:
+        df_unique = df_unique.dropna(subset=['Enquiry Date'])
+    
+    # Extract date components for analysis
+    if df_unique is not None and 'Enquiry Date' in df_unique.columns:
+        df_unique['Year'] = df_unique['Enquiry Date'].dt.year
+        df_unique['Month'] = df_unique['Enquiry Date'].dt.month
+        df_unique['Day'] = df_unique['Enquiry Date'].dt.day
+        df_unique['Hour'] = df_unique['Enquiry Date'].dt.hour
+    
+    if df_unique is None:
+        return pd.DataFrame()
+    return df_unique
+
+
+def parse_enquiry_dates(date_strings):
+    """Parse Enquiry Date strings with the first known format that matches any value, else let pandas infer"""
+    for fmt in ENQUIRY_DATE_FORMATS:
+        try:
+            parsed_dates = pd.to_datetime(date_strings, format=fmt, errors='coerce')
+        except Exception:
+            continue
+        if parsed_dates.notna().any():
+            return parsed_dates
+    return pd.to_datetime(date_strings, errors='coerce')
+
+
+def parse_enquiry_touches(source):
+    """Read every row of an enquiry CSV - follow-up touches included - as sorted touch sequences"""
+    if hasattr(source, 'seek'):
+        # An uploaded file has already been read once for the de-duplicated dataset
+        source.seek(0)
+    columns = ['Enquiry No.', 'Enquiry Date'] + TOUCH_ATTRIBUTES
+    touches = pd.read_csv(source, usecols=lambda column: column in columns)
+    touches['Enquiry Date'] = parse_enquiry_dates(touches['Enquiry Date'])
+    return build_touch_sequences(touches, attributes=TOUCH_ATTRIBUTES)
+
+
+def enquiry_touches(df, source):
+    """Touch sequences of the CSV a dataset was loaded from, built once per dataset key"""
+    return cached_aggregate(('enquiry', dataset_key(df), 'touch_sequences'), lambda: parse_enquiry_touches(source),
+                            persist=True)
+
+
+def enquiry_column_stats(df):
+    """Zone maps of the sidebar columns (built on the spot for an untagged frame)"""
+    stats = dataset_column_stats('enquiry', df, ENQUIRY_STATS_COLUMNS)
+    return stats if stats is not None else build_column_stats(df, ENQUIRY_STATS_COLUMNS)
+
+
+def enquiry_options(df, column):
+    """Distinct values of a sidebar column (missing values included, like Series.unique())"""
+    values = stat_values(enquiry_column_stats(df), column, dropna=False)
+    return values if values is not None else list(df[column].unique())
+
+
+def enquiry_date_bounds(df):
+    """First and last enquiry dates for the sidebar date pickers (None if unavailable)"""
+    min_date, max_date = stat_bounds(enquiry_column_stats(df), 'Enquiry Date')
+    if min_date is None or max_date is None:
+        return None
+    return min_date.date(), max_date.date()
+
+
+def default_enquiry_filters(df):
+    """Filter state produced by the sidebar widgets before the user changes anything"""
+    bounds = enquiry_date_bounds(df)
+    start_date, end_date = bounds if bounds is not None else (date.today(), date.today())
+    return {
+        'college': 'All Colleges',
+        'specialization': 'All Specializations',
+        'enquiry_type': 'All Types',
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+
+
+def apply_enquiry_filters(df, filters):
+    """Apply the sidebar selections to the enquiry data"""
+    # A date range of None (dates could not be processed) keeps all dates
+    dated = filters['start_date'] is not None and filters['end_date'] is not None
+    filtered_df = df
+    if dated:
+        start_datetime = datetime.combine(filters['start_date'], datetime.min.time())
+        end_datetime = datetime.combine(filters['end_date'], datetime.max.time())
+        # Skip the row groups whose zone maps lie outside the date range
+        filtered_df = prune_row_groups(df, dataset_column_stats('enquiry', df, ENQUIRY_STATS_COLUMNS),
+                                       {'Enquiry Date': (start_datetime, end_datetime)})
+
+    if filters['college'] != 'All Colleges':
+        filtered_df = filtered_df[filtered_df['College'] == filters['college']]
+    if filters['specialization'] != 'All Specializations':
+        filtered_df = filtered_df[filtered_df['Specialization'] == filters['specialization']]
+    if filters['enquiry_type'] != 'All Types':
+        filtered_df = filtered_df[filtered_df['Enquiry Type'] == filters['enquiry_type']]
+
+    if dated:
+        filtered_df = filtered_df[(filtered_df['Enquiry Date'] >= start_datetime) &
+                                  (filtered_df['Enquiry Date'] <= end_datetime)]
+    return filtered_df if filtered_df is df else drop_unused_categories(filtered_df)
+
+
+def submit_enquiry_jobs(df, filtered_df):
+    """Submit the College x Specialization matrix to the analytics worker pool
+
+    The matrix comes back sparse and truncated to the top specializations; its full
+    row/column totals feed the college and specialization summaries.
+    """
+    return {
+        'college_specialization': submit_job('crosstab', df, filtered_df, ['College', 'Specialization'],
+                                             row='College', column='Specialization',
+                                             top_cols=HEATMAP_TOP_SPECIALIZATIONS, as_sparse=True),
+    }
+
+
+def enquiry_time_buckets(df, filtered_df, filters, unit):
+    """Dense enquiry counts per hour/day/week/month, built once per filter state"""
+    key = ('enquiry', dataset_key(df), freeze(filters), 'time_buckets', unit)
+    return cached_aggregate(key, lambda: time_buckets(filtered_df['Enquiry Date'], unit))
+
+
+# ---------------------------------------------------------------------------
+# Section builders - shared by the page and the background warm-up.
+# Each gets the filtered data, the worker-pool futures and buckets(unit),
+# which returns the shared time-bucket counts for the filter state.
+# A figure that cannot be built is None; its name is added to 'errors'.
+# ---------------------------------------------------------------------------
+
+def _build_figures(builders):
+    section = {'errors': set()}
+    for name, build in builders.items():
+        try:
+            section[name] = build()
+        except Exception:
+            section[name] = None
+            section['errors'].add(name)
+    return section
+
+
+def build_metrics_section(filtered_df, jobs, buckets):
+    """Key metrics shown at the top of the dashboard"""
+    # Fix nunique issue by using pandas functions explicitly
+    try:
+        unique_specializations_series = pd.Series(filtered_df['Specialization']).nunique()
+        unique_specializations = int(unique_specializations_series) if not pd.isna(unique_specializations_series) else 0
+    except Exception:
+        unique_specializations = 0
+    return {
+        'total_enquiries': len(filtered_df),
+        'allotted_enquiries': int((filtered_df['Allotment Status'] == 'Allotted').sum()),
+        'admission_enquiries': int((filtered_df['Allotment Status'] == 'Admission').sum()),
+        'unique_specializations': unique_specializations,
+        'walkin_enquiries': int((filtered_df['Enquiry Type'] == 'Walk-in').sum()),
+        'online_enquiries': int((filtered_df['Enquiry Type'] == 'Online').sum()),
+        'male_enquiries': int((filtered_df['Gender'] == 'Male').sum()),
+        'female_enquiries': int((filtered_df['Gender'] == 'Female').sum()),
+    }
+
+
+def build_visualizations_section(filtered_df, jobs, buckets):
+    """Charts of the Data Visualizations section (None when there is nothing to plot)"""
+
+    def enquiries_by_college():
+        college_counts = crosstab_totals(jobs['college_specialization'].result()).reset_index()
+        college_counts.columns = ['College', 'Count']
+        if college_counts.empty:
+            return None
+        fig = px.bar(college_counts, x='College', y='Count', title='Enquiries by College')
+        fig.update_layout(xaxis_title='College', yaxis_title='Number of Enquiries')
+        return fig
+
+    def top_specializations():
+        specialization_counts = crosstab_totals(jobs['college_specialization'].result(), axis='columns').head(10)
+        if specialization_counts.empty:
+            return None
+        fig = px.bar(x=specialization_counts.values, y=specialization_counts.index,
+                     orientation='h', title='Top 10 Specializations by Enquiries')
+        fig.update_layout(xaxis_title='Number of Enquiries', yaxis_title='Specialization')
+        return fig
+
+    def enquiries_by_type():
+        enquiry_type_counts = pd.Series(filtered_df['Enquiry Type']).value_counts()
+        if enquiry_type_counts.empty:
+            return None
+        fig = px.pie(values=enquiry_type_counts.values, names=enquiry_type_counts.index,
+                     title='Enquiries by Type')
+        fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="#2c3e50"))
+        return fig
+
+    def enquiries_by_status():
+        status_counts = pd.Series(filtered_df['Allotment Status']).value_counts()
+        if status_counts.empty:
+            return None
+        fig = px.bar(x=status_counts.index, y=status_counts.values, title='Enquiries by Status')
+        fig.update_layout(xaxis_title='Status', yaxis_title='Number of Enquiries')
+        return fig
+
+    def enquiries_by_gender():
+        gender_counts = pd.Series(filtered_df['Gender']).value_counts()
+        if gender_counts.empty:
+            return None
+        fig = px.pie(values=gender_counts.values, names=gender_counts.index, title='Enquiries by Gender')
+        fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="#2c3e50"))
+        return fig
+
+    return _build_figures({
+        'college_fig': enquiries_by_college,
+        'specialization_fig': top_specializations,
+        'type_fig': enquiries_by_type,
+        'status_fig': enquiries_by_status,
+        'gender_fig': enquiries_by_gender,
+    })
+
+
+def build_trend_section(filtered_df, jobs, buckets, unit='D'):
+    """Enquiries over time at the selected granularity, with a rolling average"""
+
+    def enquiries_over_time():
+        counts = buckets(unit)
+        if counts is None:
+            return None
+        window = ROLLING_WINDOWS[unit]
+        trend = pd.DataFrame({
+            'Enquiries': counts['counts'],
+            f'Rolling Average ({window} {UNIT_LABELS[unit].lower()}s)': rolling_mean(counts['counts'], window),
+        }, index=counts['index'])
+        fig = px.line(trend, title='Enquiries Over Time')
+        fig.update_layout(xaxis_title=UNIT_LABELS[unit], yaxis_title='Number of Enquiries', legend_title_text='')
+        return fig
+
+    return _build_figures({'trend_fig': enquiries_over_time})
+
+
+def build_advanced_section(filtered_df, jobs, buckets):
+    """Charts of the Advanced Analytics section"""
+
+    def monthly_trend():
+        monthly = buckets('M')
+        if monthly is None:
+            return None
+        fig = px.line(x=monthly['index'], y=monthly['counts'], title='Monthly Enquiry Trends')
+        fig.update_layout(xaxis_title='Month', yaxis_title='Number of Enquiries')
+        return fig
+
+    def hourly_distribution():
+        hourly = buckets('h')
+        if hourly is None:
+            return None
+        fig = px.bar(x=list(range(24)), y=hour_of_day_counts(hourly), title='Enquiries by Hour of Day')
+        fig.update_layout(xaxis_title='Hour of Day', yaxis_title='Number of Enquiries')
+        return fig
+
+    def college_specialization_heatmap():
+        # College x Specialization counts from the analytics worker pool
+        result = jobs['college_specialization'].result()
+        pivot_table = crosstab_frame(result)
+        if pivot_table.empty:
+            return None
+        title = 'College-Specialization Distribution Heatmap'
+        if result['truncated']:
+            title += f' (Top {len(pivot_table.columns)} Specializations)'
+        fig = px.imshow(pivot_table, title=title,
+                        color_continuous_scale=px.colors.sequential.Viridis)
+        fig.update_layout(xaxis_title='Specialization', yaxis_title='College')
+        return fig
+
+    def college_performance():
+        college_counts = crosstab_totals(jobs['college_specialization'].result())
+        if college_counts.empty:
+            return None
+        fig = px.bar(x=college_counts.index, y=college_counts.values, title='Enquiries by College')
+        fig.update_layout(xaxis_title='College', yaxis_title='Number of Enquiries')
+        return fig
+
+    return _build_figures({
+        'monthly_fig': monthly_trend,
+        'hourly_fig': hourly_distribution,
+        'heatmap_fig': college_specialization_heatmap,
+        'college_fig': college_performance,
+    })
+
+
+def build_enhanced_section(filtered_df, jobs, buckets):
+    """Charts of the Enhanced Analysis section"""
+
+    def enquiry_type():
+        enquiry_type_counts = pd.Series(filtered_df['Enquiry Type']).value_counts()
+        if enquiry_type_counts.empty:
+            return None
+        return px.pie(values=enquiry_type_counts.values, names=enquiry_type_counts.index,
+                      title='Enquiry Type Distribution')
+
+    def gender():
+        gender_counts = pd.Series(filtered_df['Gender']).value_counts()
+        if gender_counts.empty:
+            return None
+        return px.bar(x=gender_counts.index, y=gender_counts.values, title='Gender Distribution',
+                      color_discrete_sequence=['#FF6699'])
+
+    def allotment():
+        allotment_counts = pd.Series(filtered_df['Allotment Status']).value_counts()
+        if allotment_counts.empty:
+            return None
+        return px.pie(values=allotment_counts.values, names=allotment_counts.index,
+                      title='Allotment Status Distribution')
+
+    return _build_figures({
+        'type_fig': enquiry_type,
+        'gender_fig': gender,
+        'allotment_fig': allotment,
+    })
+
+
+def build_advanced_visualizations_section(filtered_df, jobs, buckets):
+    """Charts of the Advanced Visualizations and Multi-dimensional Analysis sections"""
+
+    def daily_trend():
+        daily = buckets('D')
+        if daily is None:
+            return None
+        fig = px.line(x=daily['index'], y=daily['counts'], title='Daily Enquiry Trends')
+        fig.update_layout(xaxis_title='Date', yaxis_title='Number of Enquiries')
+        return fig
+
+    def hourly():
+        hourly_buckets = buckets('h')
+        if hourly_buckets is None:
+            return None
+        fig = px.bar(x=list(range(24)), y=hour_of_day_counts(hourly_buckets), title='Enquiries by Hour of Day')
+        fig.update_layout(xaxis_title='Hour', yaxis_title='Number of Enquiries')
+        return fig
+
+    def college_specialization_heatmap():
+        # Same College x Specialization matrix as the Advanced Analytics heatmap
+        result = jobs['college_specialization'].result()
+        pivot_table = crosstab_frame(result)
+        if pivot_table.empty:
+            return None
+        title = 'College vs Specialization Heatmap'
+        if result['truncated']:
+            title += f' (Top {len(pivot_table.columns)} Specializations)'
+        return px.imshow(pivot_table, title=title, color_continuous_scale='Viridis')
+
+    def year_month_scatter():
+        monthly = buckets('M')
+        if monthly is None:
+            return None
+        yearly_monthly = year_month_counts(monthly)
+        return px.scatter(yearly_monthly, x='Month', y='Year', size='Count', color='Count',
+                          title='Enquiries by Year and Month', color_continuous_scale='Plasma')
+
+    return _build_figures({
+        'daily_fig': daily_trend,
+        'hourly_fig': hourly,
+        'heatmap_fig': college_specialization_heatmap,
+        'year_month_fig': year_month_scatter,
+    })
+
+
+ENQUIRY_SECTIONS = {
+    'metrics': build_metrics_section,
+    'visualizations': build_visualizations_section,
+    'trend': build_trend_section,
+    'advanced': build_advanced_section,
+    'enhanced': build_enhanced_section,
+    'advanced_visualizations': build_advanced_visualizations_section,
+}
+
+# Parameters of the sections as first shown on the page (warmed in the background)
+DEFAULT_SECTION_PARAMS = {
+    'trend': {'unit': 'D'},
+}
+
+
+def enquiry_jobs(df, filtered_df, filters):
+    """Worker-pool futures for a filter state (submitted once, shared by all sections)"""
+    key = ('enquiry', dataset_key(df), freeze(filters), 'jobs')
+    return cached_aggregate(key, lambda: submit_enquiry_jobs(df, filtered_df))
+
+
+def enquiry_section(name, df, filtered_df, filters, **params):
+    """Return a dashboard section from the aggregate cache, building it on a miss"""
+    key = ('enquiry', dataset_key(df), freeze(filters), name, freeze(params))
+    buckets = functools.partial(enquiry_time_buckets, df, filtered_df, filters)
+    return cached_aggregate(key, lambda: ENQUIRY_SECTIONS[name](filtered_df, enquiry_jobs(df, filtered_df, filters),
+                                                                buckets, **params), persist=True)
+
+
+def enquiry_precompute_tasks(df):
+    """Background warm-up: default selection, worker jobs and every section"""
+    state = {}
+
+    def warm_selection():
+        state['filters'] = default_enquiry_filters(df)
+        state['filtered_df'] = apply_enquiry_filters(df, state['filters'])
+
+    def warm_jobs():
+        for future in enquiry_jobs(df, state['filtered_df'], state['filters']).values():
+            future.result()
+
+    def warm_section(name):
+        params = DEFAULT_SECTION_PARAMS.get(name, {})
+        return lambda: enquiry_section(name, df, state['filtered_df'], state['filters'], **params)
+
+    tasks = [("default filter selection", warm_selection), ("analytics worker jobs", warm_jobs)]
+    tasks += [(f"{name.replace('_', ' ')} section", warm_section(name)) for name in ENQUIRY_SECTIONS]
+    return tasks
+
+
+def _format_hours(hours):
+    if pd.isna(hours):
+        return "N/A"
+    return f"{hours:.1f} h" if hours < 48 else f"{hours / 24:.1f} days"
+
+
+def build_response_time_section(summary):
+    """Metrics and charts of the Response Time section from a response_time_summary"""
+    section = {
+        'metrics': [
+            ("Enquiries", f"{summary['enquiries']:,}"),
+            ("Touches", f"{summary['touches']:,}"),
+            ("Followed Up", f"{summary['followed_up'] / summary['enquiries']:.1%}" if summary['enquiries'] else "N/A"),
+            ("Median First Response", _format_hours(summary['median_first_response'])),
+            (f"First Response within {SERVICE_LEVEL_HOURS} h",
+             f"{summary['within_service_level']:.1%}" if pd.notna(summary['within_service_level']) else "N/A"),
+            ("Median Time Between Touches", _format_hours(summary['median_gap'])),
+        ],
+        'by_group': summary['by_group'],
+    }
+    bands = summary['response_bands']
+    section['response_fig'] = px.bar(x=bands.index, y=bands.values, title="Time to First Response",
+                                     labels={'x': 'First response after', 'y': 'Enquiries'},
+                                     color_discrete_sequence=['#636EFA'])
+    counts = summary['touch_counts']
+    section['touches_fig'] = px.bar(x=counts.index, y=counts.values, title="Touches per Enquiry",
+                                    labels={'x': 'Touches', 'y': 'Enquiries'}, color_discrete_sequence=['#00CC96'])
+    gaps = summary['gap_by_touch']
+    section['gap_fig'] = None
+    if len(gaps):
+        section['gap_fig'] = px.line(x=gaps.index, y=gaps.values, markers=True, title="Median Hours Before Each Touch",
+                                     labels={'x': 'Touch', 'y': 'Median hours since previous touch'})
+    for name in ('response_fig', 'touches_fig', 'gap_fig'):
+        if section[name] is not None:
+            section[name].update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return section
+
+
+def enquiry_response_times(df, touches, filters):
+    """Response Time section for a filter state; the filters apply to each enquiry's first touch"""
+    def compute():
+        enquiries = touches['enquiries']
+        selected = apply_enquiry_filters(enquiries, filters)
+        follow_ups = select_follow_ups(touches['follow_ups'], selected.index.to_numpy(), len(enquiries))
+        return build_response_time_section(response_time_summary(selected, follow_ups, by='College'))
+    return cached_aggregate(('enquiry', dataset_key(df), freeze(filters), 'response_time'), compute, persist=True)
+
+
+def render_response_time_section(df, source, filters):
+    """Response Time section of the event-sequence mode"""
+    try:
+        with st.spinner("Reading every touch of the enquiry file..."):
+            touches = enquiry_touches(df, source)
+        section = enquiry_response_times(df, touches, filters)
+    except Exception as e:
+        st.warning(f"Unable to build the touch sequences: {str(e)}")
+        return
+
+    columns = st.columns(len(section['metrics']))
+    for column, (label, value) in zip(columns, section['metrics']):
+        with column:
+            st.metric(label, value)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(section['response_fig'], use_container_width=True)
+    with col2:
+        st.plotly_chart(section['touches_fig'], use_container_width=True)
+    if section['gap_fig'] is not None:
+        st.plotly_chart(section['gap_fig'], use_container_width=True)
+    if section['by_group'] is not None:
+        st.write("**Response Time by College**")
+        st.dataframe(section['by_group'], use_container_width=True)
+    st.caption(f"{touches['touches']:,} touches of {len(touches['enquiries']):,} enquiries. Each enquiry is "
+               f"filtered by its first touch; the first response is the next touch of the same Enquiry No.")
+
+
+@fragment
+def enquiry_trend_panel(df, filtered_df, filters):
+    """Enquiries Over Time with its granularity selector; reruns on its own"""
+    granularity = st.radio("Trend granularity", list(GRANULARITIES), index=1, horizontal=True,
+                           key="enquiry_trend_granularity")
+    trend = enquiry_section('trend', df, filtered_df, filters, unit=GRANULARITIES[granularity])
+    if trend['trend_fig'] is not None:
+        st.plotly_chart(trend['trend_fig'], use_container_width=True)
+    else:
+        st.info("No data available for this selection")
+
+
+@preempts_background
 def render_enquiry_dashboard():
     """Render the enquiry dashboard content"""
     
@@ -133,71 +686,7 @@ def render_enquiry_dashboard():
     @st.cache_data
     def load_data_from_file(uploaded_file):
         try:
-            # Read the uploaded CSV file
-            df = pd.read_csv(uploaded_file)
-            
-            # Remove duplicate entries (entries with same Enquiry No. and different times)
-            df_unique = df.drop_duplicates(subset=['Enquiry No.'], keep='first')
-            
-            # Convert Enquiry Date to datetime with error handling
-            # Try multiple date formats including those with AM/PM
-            date_formats = [
-                '%d-%b-%Y %I:%M %p',  # Format like "20-Feb-2025 2:40 PM"
-                '%d-%b-%Y %H:%M',     # Format like "20-Feb-2025 14:40"
-                '%d-%m-%Y %H:%M',     # Format like "20-02-2025 14:40"
-                '%m-%d-%Y %H:%M'      # Format like "02-20-2025 14:40"
-            ]
-            
-            # Store the original date strings
-            if df_unique is not None and 'Enquiry Date' in df_unique.columns:
-                date_strings = df_unique['Enquiry Date'].copy()
-            else:
-                date_strings = pd.Series()
-            
-            # Initialize parsed_dates as None
-            parsed_dates = None
-            
-            # Try each format until we successfully parse some dates
-            for fmt in date_formats:
-                try:
-                    # Try to parse with the current format using the original date strings
-                    parsed_dates = pd.to_datetime(date_strings, format=fmt, errors='coerce')
-                    # If we successfully parsed some dates, use them
-                    if hasattr(parsed_dates, 'notna') and parsed_dates.notna().sum() > 0:
-                        if df_unique is not None:
-                            df_unique['Enquiry Date'] = parsed_dates
-                        break
-                except Exception as e:
-                    continue
-            
-            # If that didn't work, try without format specification
-            try:
-                if parsed_dates is None:
-                    if df_unique is not None:
-                        df_unique['Enquiry Date'] = pd.to_datetime(date_strings, errors='coerce')
-                else:
-                    # Check if all values are NaN using pandas methods
-                    isna_check = pd.isna(parsed_dates).sum()
-                    total_count = len(parsed_dates) if hasattr(parsed_dates, '__len__') else 0
-                    if isna_check == total_count and total_count > 0:
-                        if df_unique is not None:
-                            df_unique['Enquiry Date'] = pd.to_datetime(date_strings, errors='coerce')
-            except Exception:
-                if df_unique is not None:
-                    df_unique['Enquiry Date'] = pd.to_datetime(date_strings, errors='coerce')
-            
-            # Remove rows with invalid dates
-            if df_unique is not None and 'Enquiry Date' in df_unique.columns:
-                df_unique = df_unique.dropna(subset=['Enquiry Date'])
-            
-            # Extract date components for analysis
-            if df_unique is not None and 'Enquiry Date' in df_unique.columns:
-                df_unique['Year'] = df_unique['Enquiry Date'].dt.year
-                df_unique['Month'] = df_unique['Enquiry Date'].dt.month
-                df_unique['Day'] = df_unique['Enquiry Date'].dt.day
-                df_unique['Hour'] = df_unique['Enquiry Date'].dt.hour
-            
-            return df_unique if df_unique is not None else pd.DataFrame()
+            return load_enquiry_data(uploaded_file)
         except Exception as e:
             st.error(f"Error loading data: {str(e)}")
             return pd.DataFrame()  # Return empty DataFrame on error
@@ -206,6 +695,8 @@ def render_enquiry_dashboard():
     st.sidebar.markdown('<div class="sidebar-header">📁 Data Upload</div>', unsafe_allow_html=True)
     uploaded_file = st.sidebar.file_uploader("Enquiry Data Upload", type="csv", accept_multiple_files=False, key="enquiry_uploader",
         help="Upload CSV file containing enquiry data (Must include columns: Enquiry No., Enquiry Date, College, Specialization, Enquiry Type, Allotment Status, Gender)")
+    event_mode = st.sidebar.toggle("Event-sequence mode", key="enquiry_event_mode",
+        help="Keep every follow-up touch (rows with the same Enquiry No. and different times) to track response times")
 
     # Check if file is uploaded
     if uploaded_file is not None:
@@ -228,50 +719,37 @@ def render_enquiry_dashboard():
             """, unsafe_allow_html=True)
             return
 
-        # Initialize filtered_df with the full dataset
-        filtered_df = df.copy()
+        # Warm the caches for this dataset in the background while the page renders
+        schedule_precompute('enquiry', dataset_key(df), enquiry_precompute_tasks(df))
+        show_precompute_progress('enquiry', dataset_key(df))
+        # Make the dataset available to views that combine datasets (e.g. the funnel)
+        st.session_state['enquiry_dataset_key'] = register_dataset('enquiry', df)
 
         # Sidebar filters
         st.sidebar.markdown('<div class="sidebar-header">🔍 Filters</div>', unsafe_allow_html=True)
 
         # College filter
-        colleges = ['All Colleges'] + list(df['College'].unique())
+        colleges = ['All Colleges'] + enquiry_options(df, 'College')
         selected_college = st.sidebar.selectbox("Select College", colleges, key="enquiry_college")
 
         # Specialization filter
-        specializations = ['All Specializations'] + list(df['Specialization'].unique())
+        specializations = ['All Specializations'] + enquiry_options(df, 'Specialization')
         selected_specialization = st.sidebar.selectbox("Select Specialization", specializations, key="enquiry_specialization")
 
         # Enquiry Type filter
-        enquiry_types = ['All Types'] + list(df['Enquiry Type'].unique())
+        enquiry_types = ['All Types'] + enquiry_options(df, 'Enquiry Type')
         selected_enquiry_type = st.sidebar.selectbox("Select Enquiry Type", enquiry_types, key="enquiry_type")
 
         # Date range filter - with proper error handling
         try:
-            # Fix date attribute access issues by using pandas functions
-            min_date_raw = df['Enquiry Date'].min()
-            max_date_raw = df['Enquiry Date'].max()
-            
-            # Safely extract date components using pandas methods
-            try:
-                min_date_series = pd.Series([min_date_raw])
-                max_date_series = pd.Series([max_date_raw])
+            date_bounds = enquiry_date_bounds(df)
+            if date_bounds is not None:
+                min_date, max_date = date_bounds
                 
-                # Convert to datetime and extract date
-                min_date_dt = pd.to_datetime(min_date_series, errors='coerce')
-                max_date_dt = pd.to_datetime(max_date_series, errors='coerce')
-                
-                if not min_date_dt.isna().any() and not max_date_dt.isna().any():
-                    min_date = min_date_dt.dt.date.iloc[0]
-                    max_date = max_date_dt.dt.date.iloc[0]
-                    
-                    # Ensure we have valid dates
-                    start_date = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date, key="enquiry_start_date")
-                    end_date = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date, key="enquiry_end_date")
-                else:
-                    start_date = date.today()
-                    end_date = date.today()
-            except Exception:
+                # Ensure we have valid dates
+                start_date = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date, key="enquiry_start_date")
+                end_date = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date, key="enquiry_end_date")
+            else:
                 start_date = date.today()
                 end_date = date.today()
         except Exception as e:
@@ -279,55 +757,39 @@ def render_enquiry_dashboard():
             start_date = date.today()
             end_date = date.today()
 
-        # Apply filters to the data
-        if selected_college != 'All Colleges':
-            filtered_df = filtered_df[filtered_df['College'] == selected_college]
-
-        if selected_specialization != 'All Specializations':
-            filtered_df = filtered_df[filtered_df['Specialization'] == selected_specialization]
-
-        if selected_enquiry_type != 'All Types':
-            filtered_df = filtered_df[filtered_df['Enquiry Type'] == selected_enquiry_type]
+        # Fix date combination issues by checking the type of start_date and end_date
+        if isinstance(start_date, tuple):
+            start_date = start_date[0] if start_date else date.today()
+        if isinstance(end_date, tuple):
+            end_date = end_date[0] if end_date else date.today()
+            
+        # Ensure we have valid dates
+        if start_date is None:
+            start_date = date.today()
+        if end_date is None:
+            end_date = date.today()
 
-        # Convert dates for filtering with error handling
+        # Apply filters to the data
+        filters = {
+            'college': selected_college,
+            'specialization': selected_specialization,
+            'enquiry_type': selected_enquiry_type,
+            'start_date': start_date,
+            'end_date': end_date,
+        }
         try:
-            # Fix date combination issues by checking the type of start_date and end_date
-            if isinstance(start_date, tuple):
-                start_date = start_date[0] if start_date else date.today()
-            if isinstance(end_date, tuple):
-                end_date = end_date[0] if end_date else date.today()
-                
-            # Ensure we have valid dates
-            if start_date is None:
-                start_date = date.today()
-            if end_date is None:
-                end_date = date.today()
-                
-            start_datetime = datetime.combine(start_date, datetime.min.time())
-            end_datetime = datetime.combine(end_date, datetime.max.time())
-            filtered_df = filtered_df[(filtered_df['Enquiry Date'] >= start_datetime) & 
-                                      (filtered_df['Enquiry Date'] <= end_datetime)]
+            filtered_df = apply_enquiry_filters(df, filters)
         except Exception as e:
             st.warning("Error filtering by date. Showing all data.")
-            pass
+            filters = dict(filters, start_date=None, end_date=None)
+            filtered_df = apply_enquiry_filters(df, filters)
+        
+        # Submit the College x Specialization matrix to the analytics worker pool;
+        # both heatmaps below collect the same result while the page renders
+        enquiry_jobs(df, filtered_df, filters)
             
         # Calculate metrics
-        total_enquiries = len(filtered_df)
-        allotted_enquiries = len(filtered_df[filtered_df['Allotment Status'] == 'Allotted'])
-        admission_enquiries = len(filtered_df[filtered_df['Allotment Status'] == 'Admission'])
-        
-        # Fix nunique issue by using pandas functions explicitly
-        try:
-            unique_specializations_series = pd.Series(filtered_df['Specialization']).nunique()
-            unique_specializations = int(unique_specializations_series) if not pd.isna(unique_specializations_series) else 0
-        except Exception:
-            unique_specializations = 0
-
-        # Additional metrics
-        walkin_enquiries = len(filtered_df[filtered_df['Enquiry Type'] == 'Walk-in'])
-        online_enquiries = len(filtered_df[filtered_df['Enquiry Type'] == 'Online'])
-        male_enquiries = len(filtered_df[filtered_df['Gender'] == 'Male'])
-        female_enquiries = len(filtered_df[filtered_df['Gender'] == 'Female'])
+        metrics = enquiry_section('metrics', df, filtered_df, filters)
 
         # Display key metrics
         st.markdown("""
@@ -337,361 +799,131 @@ def render_enquiry_dashboard():
         """, unsafe_allow_html=True)
         
         col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Total Enquiries", total_enquiries)
-        col2.metric("Allotted Enquiries", allotted_enquiries)
-        col3.metric("Admission Enquiries", admission_enquiries)
-        col4.metric("Unique Specializations", unique_specializations)
+        col1.metric("Total Enquiries", metrics['total_enquiries'])
+        col2.metric("Allotted Enquiries", metrics['allotted_enquiries'])
+        col3.metric("Admission Enquiries", metrics['admission_enquiries'])
+        col4.metric("Unique Specializations", metrics['unique_specializations'])
 
         # Additional metrics row
         col5, col6, col7, col8 = st.columns(4)
-        col5.metric("Walk-in Enquiries", walkin_enquiries)
-        col6.metric("Online Enquiries", online_enquiries)
-        col7.metric("Male Enquiries", male_enquiries)
-        col8.metric("Female Enquiries", female_enquiries)
+        col5.metric("Walk-in Enquiries", metrics['walkin_enquiries'])
+        col6.metric("Online Enquiries", metrics['online_enquiries'])
+        col7.metric("Male Enquiries", metrics['male_enquiries'])
+        col8.metric("Female Enquiries", metrics['female_enquiries'])
 
         # Create charts
         st.markdown('<div class="section-header">📈 Data Visualizations</div>', unsafe_allow_html=True)
-
-        # Row 1
-        col1, col2 = st.columns(2)
-
-        # Enquiries by date (line chart)
-        with col1:
-            # Fix groupby and dt issues by using pandas functions explicitly
-            try:
-                enquiry_date_series = pd.Series(filtered_df['Enquiry Date'])
-                date_groups = enquiry_date_series.groupby(enquiry_date_series.dt.date)
-                daily_counts_series = date_groups.size()
-                # Fix reset_index issue
-                daily_counts = pd.DataFrame({
-                    'Enquiry Date': daily_counts_series.index,
-                    'Count': daily_counts_series.values
-                })
-                if not daily_counts.empty:
-                    fig1 = px.line(daily_counts, x='Enquiry Date', y='Count', 
-                                   title='Enquiries Over Time')
-                    fig1.update_layout(xaxis_title='Date', yaxis_title='Number of Enquiries')
-                    st.plotly_chart(fig1, use_container_width=True)
-                else:
-                    st.info("No data available for this selection")
-            except Exception as e:
-                st.info("No data available for this selection")
-
-        # Enquiries by college (bar chart)
-        with col2:
-            # Fix value_counts issues by using pandas functions explicitly
-            try:
-                college_value_counts = pd.Series(filtered_df['College']).value_counts()
-                college_counts = college_value_counts.reset_index()
-                college_counts.columns = ['College', 'Count']
-                if not college_counts.empty:
-                    fig2 = px.bar(college_counts, x='College', y='Count', 
-                                  title='Enquiries by College')
-                    fig2.update_layout(xaxis_title='College', yaxis_title='Number of Enquiries')
-                    st.plotly_chart(fig2, use_container_width=True)
-                else:
-                    st.info("No data available for this selection")
-            except Exception as e:
-                st.info("No data available for this selection")
-
-        # Row 2
-        col1, col2 = st.columns(2)
-
-        # Enquiries by specialization (bar chart)
-        with col1:
-            # Fix value_counts issues by using pandas functions explicitly
-            try:
-                specialization_counts = pd.Series(filtered_df['Specialization']).value_counts().head(10)
-                if not specialization_counts.empty:
-                    fig3 = px.bar(x=specialization_counts.values, y=specialization_counts.index,
-                                  orientation='h', title='Top 10 Specializations by Enquiries')
-                    fig3.update_layout(xaxis_title='Number of Enquiries', yaxis_title='Specialization')
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.info("No data available for this selection")
-            except Exception as e:
-                st.info("No data available for this selection")
-
-        # Enquiries by type (pie chart)
-        with col2:
-            # Fix value_counts issues by using pandas functions explicitly
-            try:
-                enquiry_type_counts = pd.Series(filtered_df['Enquiry Type']).value_counts()
-                if not enquiry_type_counts.empty:
-                    fig4 = px.pie(values=enquiry_type_counts.values, names=enquiry_type_counts.index,
-                                  title='Enquiries by Type')
-                    fig4.update_layout(
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color="#2c3e50")
-                    )
-                    st.plotly_chart(fig4, use_container_width=True)
-                else:
-                    st.info("No data available for this selection")
-            except Exception as e:
-                st.info("No data available for this selection")
-
-        # Row 3
-        col1, col2 = st.columns(2)
-
-        # Enquiries by status (bar chart)
-        with col1:
-            # Fix value_counts issues by using pandas functions explicitly
-            try:
-                status_counts = pd.Series(filtered_df['Allotment Status']).value_counts()
-                if not status_counts.empty:
-                    fig5 = px.bar(x=status_counts.index, y=status_counts.values,
-                                  title='Enquiries by Status')
-                    fig5.update_layout(xaxis_title='Status', yaxis_title='Number of Enquiries')
-                    st.plotly_chart(fig5, use_container_width=True)
-                else:
-                    st.info("No data available for this selection")
-            except Exception as e:
-                st.info("No data available for this selection")
-
-        # Enquiries by gender (pie chart)
-        with col2:
-            # Fix value_counts issues by using pandas functions explicitly
-            try:
-                gender_counts = pd.Series(filtered_df['Gender']).value_counts()
-                if not gender_counts.empty:
-                    fig6 = px.pie(values=gender_counts.values, names=gender_counts.index,
-                                  title='Enquiries by Gender')
-                    fig6.update_layout(
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color="#2c3e50")
-                    )
-                    st.plotly_chart(fig6, use_container_width=True)
-                else:
-                    st.info("No data available for this selection")
-            except Exception as e:
-                st.info("No data available for this selection")
+        visualizations = enquiry_section('visualizations', df, filtered_df, filters)
+
+        # Row 1: enquiries over time (line chart) and by college (bar chart)
+        # Row 2: enquiries by specialization (bar chart) and by type (pie chart)
+        # Row 3: enquiries by status (bar chart) and by gender (pie chart)
+        for left, right in [('date_fig', 'college_fig'), ('specialization_fig', 'type_fig'), ('status_fig', 'gender_fig')]:
+            col1, col2 = st.columns(2)
+            for column, name in [(col1, left), (col2, right)]:
+                with column:
+                    if name == 'date_fig':
+                        # The trend chart has its own selector and reruns as a fragment
+                        enquiry_trend_panel(df, filtered_df, filters)
+                    elif visualizations[name] is not None:
+                        st.plotly_chart(visualizations[name], use_container_width=True)
+                    else:
+                        st.info("No data available for this selection")
         
         # Row 4 - Additional Charts
         st.markdown('<div class="section-header">📈 Advanced Analytics</div>', unsafe_allow_html=True)
+        advanced = enquiry_section('advanced', df, filtered_df, filters)
 
         col1, col2 = st.columns(2)
 
         # Monthly trend analysis
         st.write("### Monthly Trend Analysis")
-        try:
-            # Fix dt and groupby issues by using pandas functions explicitly
-            enquiry_date_series = pd.Series(filtered_df['Enquiry Date'])
-            monthly_data = pd.DataFrame({
-                'Enquiry Date': enquiry_date_series
-            })
-            # Extract year and month using pandas functions
-            monthly_data['Year'] = pd.to_datetime(monthly_data['Enquiry Date']).dt.year
-            monthly_data['Month'] = pd.to_datetime(monthly_data['Enquiry Date']).dt.month
-            
-            # Group by year and month
-            monthly_groups = monthly_data.groupby(['Year', 'Month'])
-            monthly_counts_series = monthly_groups.size()
-            
-            # Fix reset_index issue
-            monthly_counts = pd.DataFrame({
-                'Year': monthly_counts_series.index.get_level_values(0),
-                'Month': monthly_counts_series.index.get_level_values(1),
-                'Count': monthly_counts_series.values
-            })
-            
-            if not monthly_counts.empty:
-                # Create a date column for plotting
-                monthly_counts['Date'] = pd.to_datetime(monthly_counts[['Year', 'Month']].assign(day=1))
-                fig7 = px.line(monthly_counts, x='Date', y='Count', title='Monthly Enquiry Trends')
-                fig7.update_layout(xaxis_title='Month', yaxis_title='Number of Enquiries')
-                st.plotly_chart(fig7, use_container_width=True)
-            else:
-                st.info("No data available for monthly trend analysis")
-        except Exception as e:
+        if advanced['monthly_fig'] is not None:
+            st.plotly_chart(advanced['monthly_fig'], use_container_width=True)
+        else:
             st.info("No data available for monthly trend analysis")
 
         # Hourly Distribution Analysis
         with col2:
             st.write("### Hourly Distribution")
-            try:
-                # Fix dt issues by using pandas functions explicitly
-                enquiry_date_series = pd.Series(filtered_df['Enquiry Date'])
-                hour_series = pd.to_datetime(enquiry_date_series).dt.hour
-                hourly_counts = pd.Series(hour_series).value_counts().sort_index()
-                
-                if not hourly_counts.empty:
-                    fig8 = px.bar(x=hourly_counts.index, y=hourly_counts.values,
-                                  title='Enquiries by Hour of Day')
-                    fig8.update_layout(xaxis_title='Hour of Day', yaxis_title='Number of Enquiries')
-                    st.plotly_chart(fig8, use_container_width=True)
-                else:
-                    st.info("No data available for hourly distribution")
-            except Exception as e:
+            if advanced['hourly_fig'] is not None:
+                st.plotly_chart(advanced['hourly_fig'], use_container_width=True)
+            else:
                 st.info("No data available for hourly distribution")
 
         # College-Specialization Heatmap
         st.write("### College-Specialization Analysis")
-        try:
-            # Fix groupby issues by using pandas functions explicitly
-            college_series = pd.Series(filtered_df['College'])
-            specialization_series = pd.Series(filtered_df['Specialization'])
-            
-            # Create a DataFrame for groupby operation
-            college_spec_data = pd.DataFrame({
-                'College': college_series,
-                'Specialization': specialization_series
-            })
-            
-            college_spec_groups = college_spec_data.groupby(['College', 'Specialization'])
-            college_spec_counts_series = college_spec_groups.size()
-            
-            # Fix reset_index issue
-            college_spec_counts = pd.DataFrame({
-                'College': college_spec_counts_series.index.get_level_values(0),
-                'Specialization': college_spec_counts_series.index.get_level_values(1),
-                'Count': college_spec_counts_series.values
-            })
-            
-            if not college_spec_counts.empty:
-                # Create pivot table for heatmap
-                pivot_table = college_spec_counts.pivot_table(
-                    index='College', 
-                    columns='Specialization', 
-                    values='Count', 
-                    fill_value=0
-                )
-                
-                fig9 = px.imshow(
-                    pivot_table,
-                    title='College-Specialization Distribution Heatmap',
-                    color_continuous_scale=px.colors.sequential.Viridis
-                )
-                fig9.update_layout(
-                    xaxis_title='Specialization',
-                    yaxis_title='College'
-                )
-                st.plotly_chart(fig9, use_container_width=True)
-            else:
-                st.info("No data available for college-specialization analysis")
-        except Exception as e:
+        if advanced['heatmap_fig'] is not None:
+            st.plotly_chart(advanced['heatmap_fig'], use_container_width=True)
+        else:
             st.info("No data available for college-specialization analysis")
 
         # College Performance Analysis
         st.write("### College Performance")
-        try:
-            # Fix value_counts issues by using pandas functions explicitly
-            college_counts = pd.Series(filtered_df['College']).value_counts()
-            
-            if not college_counts.empty:
-                fig10 = px.bar(x=college_counts.index, y=college_counts.values,
-                               title='Enquiries by College')
-                fig10.update_layout(xaxis_title='College', yaxis_title='Number of Enquiries')
-                st.plotly_chart(fig10, use_container_width=True)
-            else:
-                st.info("No data available for college performance analysis")
-        except Exception as e:
+        if advanced['college_fig'] is not None:
+            st.plotly_chart(advanced['college_fig'], use_container_width=True)
+        else:
             st.info("No data available for college performance analysis")
         
         # Enhanced Analysis Section
         st.subheader("Enhanced Analysis")
+        enhanced = enquiry_section('enhanced', df, filtered_df, filters)
         
         # Additional Charts and Analysis Parameters
         enh_col1, enh_col2, enh_col3 = st.columns(3)
-        
-        with enh_col1:
-            # Enquiry Type Analysis
-            if 'Enquiry Type' in filtered_df.columns:
-                try:
-                    enquiry_type_counts = pd.Series(filtered_df['Enquiry Type']).value_counts()
-                    if not enquiry_type_counts.empty:
-                        fig_enq_type = px.pie(values=enquiry_type_counts.values, names=enquiry_type_counts.index,
-                                             title='Enquiry Type Distribution')
-                        st.plotly_chart(fig_enq_type, use_container_width=True)
-                except Exception as e:
-                    st.info("Unable to create enquiry type analysis")
-        
-        with enh_col2:
-            # Gender Distribution Analysis
-            if 'Gender' in filtered_df.columns:
-                try:
-                    gender_counts = pd.Series(filtered_df['Gender']).value_counts()
-                    if not gender_counts.empty:
-                        fig_gender = px.bar(x=gender_counts.index, y=gender_counts.values,
-                                           title='Gender Distribution',
-                                           color_discrete_sequence=['#FF6699'])
-                        st.plotly_chart(fig_gender, use_container_width=True)
-                except Exception as e:
-                    st.info("Unable to create gender distribution analysis")
-        
-        with enh_col3:
-            # Allotment Status Analysis
-            if 'Allotment Status' in filtered_df.columns:
-                try:
-                    allotment_counts = pd.Series(filtered_df['Allotment Status']).value_counts()
-                    if not allotment_counts.empty:
-                        fig_allotment = px.pie(values=allotment_counts.values, names=allotment_counts.index,
-                                              title='Allotment Status Distribution')
-                        st.plotly_chart(fig_allotment, use_container_width=True)
-                except Exception as e:
-                    st.info("Unable to create allotment status analysis")
+        for column, name, message in [
+            (enh_col1, 'type_fig', "Unable to create enquiry type analysis"),
+            (enh_col2, 'gender_fig', "Unable to create gender distribution analysis"),
+            (enh_col3, 'allotment_fig', "Unable to create allotment status analysis"),
+        ]:
+            with column:
+                if enhanced[name] is not None:
+                    st.plotly_chart(enhanced[name], use_container_width=True)
+                elif name in enhanced['errors']:
+                    st.info(message)
         
         # Advanced Visualizations
         st.subheader("Advanced Visualizations")
+        advanced_visualizations = enquiry_section('advanced_visualizations', df, filtered_df, filters)
         adv_col1, adv_col2 = st.columns(2)
         
         with adv_col1:
             # Time Series Analysis
-            if 'Enquiry Date' in filtered_df.columns:
-                try:
-                    # Create daily enquiry counts
-                    daily_counts = filtered_df.groupby(filtered_df['Enquiry Date'].dt.date).size()
-                    if not daily_counts.empty:
-                        fig_time_series = px.line(x=daily_counts.index, y=daily_counts.values,
-                                                 title='Daily Enquiry Trends')
-                        fig_time_series.update_layout(xaxis_title='Date', yaxis_title='Number of Enquiries')
-                        st.plotly_chart(fig_time_series, use_container_width=True)
-                except Exception as e:
-                    st.info("Unable to create time series analysis")
+            if advanced_visualizations['daily_fig'] is not None:
+                st.plotly_chart(advanced_visualizations['daily_fig'], use_container_width=True)
+            elif 'daily_fig' in advanced_visualizations['errors']:
+                st.info("Unable to create time series analysis")
         
         with adv_col2:
             # Hourly Analysis
-            if 'Hour' in filtered_df.columns:
-                try:
-                    hourly_counts = filtered_df['Hour'].value_counts().sort_index()
-                    if not hourly_counts.empty:
-                        fig_hourly = px.bar(x=hourly_counts.index, y=hourly_counts.values,
-                                           title='Enquiries by Hour of Day')
-                        fig_hourly.update_layout(xaxis_title='Hour', yaxis_title='Number of Enquiries')
-                        st.plotly_chart(fig_hourly, use_container_width=True)
-                except Exception as e:
-                    st.info("Unable to create hourly analysis")
+            if advanced_visualizations['hourly_fig'] is not None:
+                st.plotly_chart(advanced_visualizations['hourly_fig'], use_container_width=True)
+            elif 'hourly_fig' in advanced_visualizations['errors']:
+                st.info("Unable to create hourly analysis")
         
         # Multi-dimensional Analysis
         st.subheader("Multi-dimensional Analysis")
         
         # Heatmap for College vs Specialization
-        if 'College' in filtered_df.columns and 'Specialization' in filtered_df.columns:
-            try:
-                # Create a pivot table for heatmap
-                pivot_data = filtered_df.groupby(['College', 'Specialization']).size().reset_index(name='Count')
-                if not pivot_data.empty:
-                    pivot_table = pivot_data.pivot_table(index='College', columns='Specialization', values='Count', fill_value=0)
-                    fig_heatmap = px.imshow(pivot_table, 
-                                           title='College vs Specialization Heatmap',
-                                           color_continuous_scale='Viridis')
-                    st.plotly_chart(fig_heatmap, use_container_width=True)
-            except Exception as e:
-                st.info("Unable to create college-specialization heatmap")
+        if advanced_visualizations['heatmap_fig'] is not None:
+            st.plotly_chart(advanced_visualizations['heatmap_fig'], use_container_width=True)
+        elif 'heatmap_fig' in advanced_visualizations['errors']:
+            st.info("Unable to create college-specialization heatmap")
         
         # Scatter Plot Analysis
-        if 'Year' in filtered_df.columns and 'Month' in filtered_df.columns:
-            try:
-                # Create a scatter plot of enquiries by year and month
-                yearly_monthly = filtered_df.groupby(['Year', 'Month']).size().reset_index(name='Count')
-                if not yearly_monthly.empty:
-                    fig_scatter = px.scatter(yearly_monthly, x='Month', y='Year', size='Count', color='Count',
-                                            title='Enquiries by Year and Month',
-                                            color_continuous_scale='Plasma')
-                    st.plotly_chart(fig_scatter, use_container_width=True)
-            except Exception as e:
-                st.info("Unable to create year-month scatter analysis")
+        if advanced_visualizations['year_month_fig'] is not None:
+            st.plotly_chart(advanced_visualizations['year_month_fig'], use_container_width=True)
+        elif 'year_month_fig' in advanced_visualizations['errors']:
+            st.info("Unable to create year-month scatter analysis")
+
+        # Response times from every touch of the file (event-sequence mode)
+        if event_mode:
+            st.markdown('<div class="section-header">⏱️ Response Time</div>', unsafe_allow_html=True)
+            render_response_time_section(df, uploaded_file, filters)
+
+        # Export of the filtered enquiries
+        st.markdown('<div class="section-header">📥 Export Data</div>', unsafe_allow_html=True)
+        render_export_panel(df, filtered_df, filters, "enquiry")
 
         # Additional information
         st.markdown("""
@@ -0,0 +1,137 @@
+"""
+Folder Watcher - background ingestion of a drop folder of CSV exports
+A daemon thread polls the files matching a glob pattern (name, size and
+modification time). A change is ingested only once the folder has been quiet
+for DEBOUNCE_SECONDS, so a burst of writes from an export job is loaded once,
+after the last file is complete. The new dataset replaces the current one in
+a single assignment; sessions showing an older version rerun on their own.
+"""
+
+import glob
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from dataset_registry import dataset_key
+from ui_fragments import fragment
+
+# How often the folder is scanned (seconds)
+POLL_SECONDS = float(os.environ.get('WATCH_POLL_SECONDS', '1'))
+
+# Quiet period after the last change before the folder is loaded (seconds)
+DEBOUNCE_SECONDS = float(os.environ.get('WATCH_DEBOUNCE_SECONDS', '2'))
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def folder_snapshot(pattern):
+    """(path, size, mtime) of every file matching pattern, in a stable order"""
+    snapshot = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Deleted between the glob and the stat
+            continue
+        snapshot.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(snapshot)
+
+
+def _ingest(watcher, snapshot):
+    """Load the files of a snapshot and swap the result in if the content changed"""
+    current = watcher['current']
+    watcher['snapshot'] = snapshot
+    try:
+        df, problems = watcher['load']([path for path, _, _ in snapshot])
+    except Exception as e:
+        if current is not None:
+            # Keep serving the previous version
+            current['problems'] = [f"Reload failed: {e}"]
+            return
+        df, problems = pd.DataFrame(), [str(e)]
+    if current is not None and dataset_key(df) == dataset_key(current['df']) and dataset_key(df) is not None:
+        # Touched or rewritten with the same content
+        current['problems'] = problems
+        return
+    version = {
+        'version': (current['version'] + 1) if current is not None else 1,
+        'df': df,
+        'problems': problems,
+        'files': len(snapshot),
+        'loaded_at': time.time(),
+    }
+    watcher['current'] = version
+    if watcher['on_change'] is not None:
+        try:
+            watcher['on_change'](df)
+        except Exception as e:
+            version['problems'] = problems + [str(e)]
+
+
+def _watch(watcher):
+    pending, changed_at = None, None
+    while not watcher['stopped'].wait(POLL_SECONDS):
+        snapshot = folder_snapshot(watcher['pattern'])
+        if snapshot == watcher['snapshot']:
+            pending = None
+            continue
+        if snapshot != pending:
+            # Still being written - restart the quiet period
+            pending, changed_at = snapshot, time.monotonic()
+            continue
+        if time.monotonic() - changed_at >= DEBOUNCE_SECONDS:
+            _ingest(watcher, snapshot)
+            pending = None
+
+
+def watch_folder(name, pattern, load, on_change=None):
+    """Start watching pattern (once per process) and return the current dataset version
+
+    load(paths) returns (DataFrame, problems). The first call loads the folder
+    synchronously; later changes are loaded by the watcher thread, which calls
+    on_change(df) after every swap. The returned dict has the keys version, df,
+    problems, files and loaded_at.
+    """
+    with _watchers_lock:
+        watcher = _watchers.get(name)
+        if watcher is None:
+            watcher = {
+                'pattern': pattern,
+                'load': load,
+                'on_change': on_change,
+                'snapshot': None,
+                'current': None,
+                'stopped': threading.Event(),
+            }
+            _ingest(watcher, folder_snapshot(pattern))
+            thread = threading.Thread(target=_watch, args=(watcher,), name=f"watch-{name}", daemon=True)
+            thread.start()
+            _watchers[name] = watcher
+    return watcher['current']
+
+
+def watched_version(name):
+    """Version number of the dataset currently served for a watched folder, or None"""
+    watcher = _watchers.get(name)
+    if watcher is None or watcher['current'] is None:
+        return None
+    return watcher['current']['version']
+
+
+def stop_watching(name):
+    with _watchers_lock:
+        watcher = _watchers.pop(name, None)
+    if watcher is not None:
+        watcher['stopped'].set()
+
+
+@fragment(run_every=2)
+def follow_folder_updates(name, shown_version):
+    """Rerun the app when the watcher has swapped in a newer version than the one on screen"""
+    version = watched_version(name)
+    if version is not None and shown_version is not None and version != shown_version:
+        st.rerun(scope='app')
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objects as go
+
+from funnel_dashboard_module import session_datasets
+from forecasting import (FORECAST_UNITS, HORIZONS, start_forecasts, forecast_progress, forecast_results,
+                         forecast_index)
+from background_precompute import preempts_background
+from ui_fragments import fragment, in_fragment_rerun
+
+# Dataset, date column and the columns its counts can be forecast per
+FORECAST_SOURCES = {
+    'Enquiries': ('enquiry', 'Enquiry Date', ['College', 'Specialization']),
+    'Admissions': ('admission', 'Date of Admission', ['College', 'Programme Name', 'Program Level']),
+}
+
+UNIT_NAMES = {'D': 'days', 'W': 'weeks'}
+
+
+def forecast_figure(index, history, fit, future_index, title):
+    """Actual counts followed by the forecast and its prediction band"""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=index, y=history, mode='lines', name='Actual', line=dict(color='#636EFA')))
+    fig.add_trace(go.Scatter(x=np.r_[future_index, future_index[::-1]], y=np.r_[fit['upper'], fit['lower'][::-1]],
+                             fill='toself', fillcolor='rgba(239, 85, 59, 0.15)', line=dict(width=0),
+                             name='95% band', hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=future_index, y=fit['forecast'], mode='lines', name='Forecast',
+                             line=dict(color='#EF553B', dash='dash')))
+    fig.update_layout(title=title, yaxis_title="Records", hovermode='x unified',
+                      plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+
+def forecast_table(series, results, group_column):
+    """Actual count of the last horizon and forecast of the next one per group"""
+    horizon = HORIZONS[series['unit']]
+    unit = UNIT_NAMES[series['unit']]
+    recent = series['counts'][:, -horizon:].sum(axis=1)
+    projected = np.array([fit['forecast'].sum() for fit in results['groups']])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(recent > 0, (projected / recent - 1) * 100, np.nan)
+    return pd.DataFrame({
+        group_column: [str(group) for group in series['groups']],
+        f"Last {horizon} {unit}": recent,
+        f"Next {horizon} {unit} (forecast)": projected.round().astype(int),
+        'Change %': np.round(change, 1),
+        'Model': [fit['method'] for fit in results['groups']],
+        'Fit': ['Optimised' if fit['refit'] else 'Updated with new data' for fit in results['groups']],
+    })
+
+
+@fragment(run_every=1)
+def forecast_progress_panel(batch):
+    done, total = forecast_progress(batch)
+    if done == total:
+        # Draw the finished forecasts (a fragment cannot redraw the panel around it)
+        if in_fragment_rerun():
+            st.rerun(scope='app')
+        return
+    st.progress(done / total if total else 1.0, text=f"⏳ Fitting forecast models ({done}/{total} series)")
+    st.caption("The models are fitted in the background; the rest of the suite stays responsive.")
+
+
+@preempts_background
+def render_forecast_dashboard():
+    """Forecasts of daily / weekly enquiry and admission counts per college or program"""
+    datasets = session_datasets()
+    available = [label for label, (name, _, _) in FORECAST_SOURCES.items() if datasets[name] is not None]
+    if not available:
+        st.info("Load the enquiry or admission dataset in the other tabs to forecast its daily and weekly counts.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        source = st.radio("Forecast", available, horizontal=True, key='forecast_source')
+    name, date_column, group_columns = FORECAST_SOURCES[source]
+    df = datasets[name]
+    with col2:
+        group_column = st.selectbox("Per", [column for column in group_columns if column in df.columns],
+                                    key=f'forecast_group_{name}')
+    with col3:
+        granularity = st.radio("Granularity", list(FORECAST_UNITS), horizontal=True, key='forecast_granularity')
+    if date_column not in df.columns or group_column is None:
+        st.warning(f"The {source.lower()} dataset has no {date_column} column to forecast from.")
+        return
+
+    unit = FORECAST_UNITS[granularity]
+    batch = start_forecasts(name, df, date_column, group_column, unit)
+    series = batch['series']
+    if series is None:
+        st.warning(f"No valid {date_column} values to forecast from.")
+        return
+    try:
+        results = forecast_results(batch)
+    except Exception as e:
+        st.error(f"Could not fit the forecast models: {str(e)}")
+        return
+    if results is None:
+        forecast_progress_panel(batch)
+        return
+
+    horizon, unit_name = HORIZONS[unit], UNIT_NAMES[unit]
+    future_index = forecast_index(series)
+    total_fit = results['total']
+
+    # 📈 Total
+    st.subheader(f"📈 {source}: next {horizon} {unit_name}")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"Last {horizon} {unit_name}", f"{int(series['total'][-horizon:].sum()):,}")
+    with col2:
+        st.metric(f"Next {horizon} {unit_name} (forecast)", f"{int(round(total_fit['forecast'].sum())):,}")
+    with col3:
+        st.metric("Model", total_fit['method'])
+    st.plotly_chart(forecast_figure(series['index'], series['total'], total_fit, future_index,
+                                    f"{granularity} {source.lower()}"), use_container_width=True)
+
+    if not series['groups']:
+        return
+
+    # 🏫 Per group
+    st.subheader(f"🏫 Forecast by {group_column}")
+    labels = [str(group) for group in series['groups']]
+    chosen = st.selectbox(group_column, labels, key=f'forecast_pick_{name}_{group_column}')
+    position = labels.index(chosen)
+    st.plotly_chart(forecast_figure(series['index'], series['counts'][position], results['groups'][position],
+                                    future_index, f"{granularity} {source.lower()}: {chosen}"),
+                    use_container_width=True)
+    st.dataframe(forecast_table(series, results, group_column), use_container_width=True, hide_index=True)
+    if series['hidden_groups']:
+        st.caption(f"The {len(labels)} largest of {len(labels) + series['hidden_groups']} {group_column} values are "
+                   f"forecast individually; the others count towards the total only.")
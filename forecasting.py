@@ -0,0 +1,246 @@
+"""
+Forecasting - seasonal forecasts of enquiry and admission counts per college or program
+Records are counted per day or week for every group with one bincount
+(time_bucketing codes), and a damped Holt-Winters model (statsmodels) is fitted
+to each group's series as a separate task in the analytics worker pool, so the
+page keeps rendering while the models are fitted. Finished forecasts are kept
+per dataset key. When a dataset only adds new days to one fitted before, each
+group's stored parameters are reused and the model is just run over the longer
+series; the parameters are optimised again once a whole season of new data
+has arrived.
+"""
+
+import warnings
+from concurrent.futures import Future
+
+import numpy as np
+from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+import disk_cache
+from aggregate_cache import cached_aggregate, invalidate
+from analytics_workers import submit_task
+from dataset_registry import dataset_key
+from time_bucketing import bucket_codes, bucket_starts
+
+# Granularities offered by the forecast tab
+FORECAST_UNITS = {
+    'Daily': 'D',
+    'Weekly': 'W',
+}
+
+# Season length (a week of days, a year of weeks) and forecast horizon per granularity
+SEASON_LENGTHS = {'D': 7, 'W': 52}
+HORIZONS = {'D': 28, 'W': 12}
+
+# Series shorter than this are projected by their recent average instead of a fitted model
+MIN_FIT_POINTS = 10
+
+# Largest groups forecast individually (smaller ones only count towards the total)
+MAX_FORECAST_GROUPS = 60
+
+# Width of the prediction band in residual standard deviations (about 95%)
+BAND_SIGMAS = 1.96
+
+_PARAM_NAMES = ['smoothing_level', 'smoothing_trend', 'smoothing_seasonal', 'damping_trend',
+                'initial_level', 'initial_trend', 'initial_seasons']
+
+
+def group_series(df, date_column, group_column, unit='D'):
+    """Dense counts per bucket of the whole dataset and of its largest groups (None when there are no dates)
+
+    Every series covers the same buckets, from the first to the last date of the
+    dataset; a last week that the data stops part-way through is left out.
+    """
+    codes, valid = bucket_codes(df[date_column], unit)
+    if not valid.any():
+        return None
+    if unit == 'W':
+        days, _ = bucket_codes(df[date_column], 'D')
+        last = int(codes[valid].max())
+        day_after = bucket_starts(int(days[valid].max()) + 1, 1, 'D')[0]
+        if day_after < bucket_starts(last + 1, 1, 'W')[0] and codes[valid].min() < last:
+            valid &= codes < last
+    first = int(codes[valid].min())
+    length = int(codes[valid].max()) - first + 1
+    total = np.bincount(codes[valid] - first, minlength=length)
+
+    if group_column in df.columns:
+        group_codes, labels = df[group_column].factorize()
+    else:
+        group_codes, labels = np.full(len(df), -1), []
+    keep = valid & (group_codes >= 0)
+    counts = np.bincount(group_codes[keep] * length + codes[keep] - first,
+                         minlength=len(labels) * length).reshape(len(labels), length)
+    order = np.argsort(-counts.sum(axis=1), kind='stable')[:MAX_FORECAST_GROUPS]
+    return {
+        'unit': unit,
+        'first': first,
+        'index': bucket_starts(first, length, unit),
+        'total': total,
+        'groups': [labels[position] for position in order],
+        'counts': counts[order],
+        'hidden_groups': len(labels) - len(order),
+    }
+
+
+def _band(forecast, residuals, alpha):
+    """Prediction band that widens with the horizon like simple exponential smoothing's"""
+    sigma = float(np.std(residuals)) if len(residuals) > 1 else 0.0
+    steps = np.arange(len(forecast))
+    width = BAND_SIGMAS * sigma * np.sqrt(1 + steps * alpha ** 2)
+    return np.maximum(forecast - width, 0), forecast + width
+
+
+def fit_series(counts, unit, params=None):
+    """Forecast one count series with a damped Holt-Winters model (runs in a worker process)
+
+    Given the parameters of an earlier fit of the same series, the model is only
+    re-run over the new values instead of being optimised again.
+    """
+    values = np.asarray(counts, dtype='float64')
+    horizon, season = HORIZONS[unit], SEASON_LENGTHS[unit]
+    if len(values) < MIN_FIT_POINTS or not values.any():
+        recent = values[-season:]
+        forecast = np.full(horizon, recent.mean() if len(recent) else 0.0)
+        lower, upper = _band(forecast, recent - forecast[0], 1.0)
+        return {'method': 'Recent average', 'refit': True, 'params': None,
+                'forecast': forecast, 'lower': lower, 'upper': upper}
+
+    # A seasonal component needs at least two whole seasons of history
+    seasonal = 'add' if len(values) >= 2 * season else None
+    reuse = params is not None and params['seasonal'] == seasonal
+    with warnings.catch_warnings():
+        # Optimiser convergence warnings are expected on short or flat series
+        warnings.simplefilter('ignore')
+        if reuse:
+            model = ExponentialSmoothing(
+                values, trend='add', damped_trend=True, seasonal=seasonal,
+                seasonal_periods=season if seasonal else None, initialization_method='known',
+                initial_level=params['initial_level'], initial_trend=params['initial_trend'],
+                initial_seasonal=params['initial_seasons'] if seasonal else None)
+            fit = model.fit(smoothing_level=params['smoothing_level'], smoothing_trend=params['smoothing_trend'],
+                            smoothing_seasonal=params['smoothing_seasonal'] if seasonal else None,
+                            damping_trend=params['damping_trend'], optimized=False)
+        else:
+            model = ExponentialSmoothing(values, trend='add', damped_trend=True, seasonal=seasonal,
+                                         seasonal_periods=season if seasonal else None,
+                                         initialization_method='estimated')
+            fit = model.fit()
+            params = {name: fit.params[name] for name in _PARAM_NAMES}
+            params.update({'seasonal': seasonal, 'fitted_length': len(values)})
+
+    forecast = np.maximum(np.asarray(fit.forecast(horizon), dtype='float64'), 0)
+    lower, upper = _band(forecast, np.asarray(fit.resid), params['smoothing_level'])
+    return {
+        'method': 'Holt-Winters, seasonal' if seasonal else 'Holt-Winters, damped trend',
+        'refit': not reuse,
+        'params': params,
+        'forecast': forecast,
+        'lower': lower,
+        'upper': upper,
+    }
+
+
+def _reusable_params(previous, group, series, counts):
+    """Parameters of the previous fit of a group when its series has only gained new buckets since"""
+    if previous is None or previous['unit'] != series['unit'] or previous['first'] != series['first']:
+        return None
+    entry = previous['groups'].get(group)
+    if entry is None or entry['params'] is None:
+        return None
+    history, params = entry['history'], entry['params']
+    # The last bucket of the earlier data may have been incomplete
+    settled = len(history) - 1
+    if len(counts) < len(history) or not np.array_equal(counts[:settled], history[:settled]):
+        return None
+    if len(counts) - params['fitted_length'] >= SEASON_LENGTHS[series['unit']]:
+        return None
+    return params
+
+
+def _models_key(name, date_column, group_column, unit):
+    # Latest fitted parameters of a dashboard's series, whatever dataset they came from
+    return (name, 'forecast_models', date_column, group_column, unit)
+
+
+def _submit_batch(name, df, date_column, group_column, unit, key):
+    series = group_series(df, date_column, group_column, unit)
+    batch = {'key': key, 'models_key': _models_key(name, date_column, group_column, unit), 'series': series,
+             'total': None, 'groups': []}
+    if series is None:
+        return batch
+    stored = disk_cache.load(key + ('results',))
+    if stored is not None:
+        batch.update({'total': _resolved(stored['total']), 'groups': [_resolved(fit) for fit in stored['groups']]})
+        return batch
+    previous = disk_cache.load(batch['models_key'])
+    # The total goes first, so it is ready early
+    batch['total'] = submit_task(fit_series, series['total'], unit,
+                                 _reusable_params(previous, None, series, series['total']))
+    batch['groups'] = [submit_task(fit_series, counts, unit, _reusable_params(previous, group, series, counts))
+                       for group, counts in zip(series['groups'], series['counts'])]
+    return batch
+
+
+def _resolved(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def start_forecasts(name, df, date_column, group_column, unit='D'):
+    """Submit the forecasts of a dataset's total and of its largest groups (once per dataset key)
+
+    Returns the batch at once; use forecast_progress and forecast_results to follow it.
+    """
+    key = (name, dataset_key(df), 'forecast', date_column, group_column, unit)
+    return cached_aggregate(key, lambda: _submit_batch(name, df, date_column, group_column, unit, key))
+
+
+def failed(future):
+    """True for a finished task that raised (or was cancelled, e.g. by a broken worker pool)"""
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+def forecast_progress(batch):
+    """(finished, total) number of series of a batch"""
+    futures = ([batch['total']] if batch['total'] is not None else []) + batch['groups']
+    return sum(future.done() for future in futures), len(futures)
+
+
+def _collect(batch):
+    series = batch['series']
+    results = {'total': batch['total'].result(), 'groups': [future.result() for future in batch['groups']]}
+    # The parameters of this dataset are the starting point for the next version of it
+    disk_cache.store(batch['models_key'], {
+        'unit': series['unit'],
+        'first': series['first'],
+        'groups': {group: {'history': history, 'params': fit['params']}
+                   for group, history, fit in zip([None] + series['groups'], [series['total'], *series['counts']],
+                                                  [results['total']] + results['groups'])},
+    })
+    return results
+
+
+def forecast_results(batch):
+    """Forecasts of a finished batch ({'total': fit, 'groups': [fit per group]}), None while it is running
+
+    Raises the error of a series that could not be fitted; the batch is then
+    dropped, so the next call of start_forecasts submits it again.
+    """
+    if batch['series'] is None:
+        return {'total': None, 'groups': []}
+    done, total = forecast_progress(batch)
+    if done < total:
+        return None
+    futures = [batch['total']] + batch['groups']
+    errors = [future for future in futures if failed(future)]
+    if errors:
+        invalidate(batch['key'])
+        errors[0].result()
+    return cached_aggregate(batch['key'] + ('results',), lambda: _collect(batch), persist=True)
+
+
+def forecast_index(series):
+    """Start timestamps of the forecast buckets that follow a series"""
+    return bucket_starts(series['first'] + len(series['total']), HORIZONS[series['unit']], series['unit'])
@@ -0,0 +1,95 @@
+import streamlit as st
+import plotly.express as px
+import plotly.graph_objects as go
+
+from dataset_registry import get_dataset
+from dataset_linking import funnel_metrics, summarize_days, STAGE_LABELS
+from background_precompute import preempts_background
+
+# How each stage was matched to the previous ones
+LINKAGE_LABELS = {
+    'enquiry_no': 'matched on Enquiry No.',
+    'applicant_id': 'matched on Applicant / Application ID',
+    None: 'record counts only (no shared record key)',
+}
+
+
+def session_datasets():
+    """Datasets loaded by the other dashboards in this session (None where not loaded)"""
+    datasets = {}
+    for name in ('enquiry', 'applicant', 'admission'):
+        key = st.session_state.get(f'{name}_dataset_key')
+        datasets[name] = get_dataset(name, key) if key else None
+    return datasets
+
+
+@preempts_background
+def render_funnel_dashboard():
+    """Enquiry -> applicant -> admission funnel across the loaded datasets"""
+    datasets = session_datasets()
+    loaded = [STAGE_LABELS[name] for name, df in datasets.items() if df is not None]
+
+    if len(loaded) < 2:
+        st.info("Load at least two of the enquiry, applicant and admission datasets in the other tabs to see the conversion funnel.")
+        if loaded:
+            st.caption(f"Loaded so far: {', '.join(loaded)}")
+        return
+
+    try:
+        funnel = funnel_metrics(datasets['enquiry'], datasets['applicant'], datasets['admission'])
+    except Exception as e:
+        st.warning(f"Could not link the datasets: {str(e)}")
+        return
+
+    stages = funnel['stages']
+
+    # 📊 Funnel KPIs
+    st.subheader("📊 Conversion Funnel")
+    columns = st.columns(len(stages))
+    for column, stage in zip(columns, stages):
+        with column:
+            delta = f"{stage['conversion']:.1f}% of previous stage" if stage['conversion'] is not None else None
+            st.metric(stage['label'], f"{stage['count']:,}", delta=delta, delta_color="off")
+
+    funnel_fig = go.Figure(go.Funnel(
+        y=[stage['label'] for stage in stages],
+        x=[stage['count'] for stage in stages],
+        textinfo="value+percent initial+percent previous",
+    ))
+    funnel_fig.update_layout(title="Enquiry → Applicant → Admission", plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    st.plotly_chart(funnel_fig, use_container_width=True)
+
+    with st.expander("🔗 How the datasets were linked"):
+        for stage in stages[1:]:
+            st.write(f"**{stage['label']}:** {LINKAGE_LABELS.get(stage['linked_by'], stage['linked_by'])}")
+        st.caption("Stages without a shared record key are compared by record counts, so their conversion rates are approximate.")
+
+    # ⏱️ Time to convert
+    if funnel['days']:
+        st.subheader("⏱️ Time to Convert")
+        for stage, days in funnel['days'].items():
+            summary = summarize_days(days)
+            st.write(f"**Enquiry → {STAGE_LABELS[stage]}** ({summary['count']:,} records)")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Median Days", f"{summary['median']:.1f}")
+            with col2:
+                st.metric("Average Days", f"{summary['mean']:.1f}")
+            with col3:
+                st.metric("90th Percentile", f"{summary['p90']:.1f}")
+            days_fig = px.histogram(x=days, nbins=40, labels={'x': 'Days from Enquiry'},
+                                    title=f"Days from Enquiry to {STAGE_LABELS[stage][:-1]}")
+            days_fig.update_layout(yaxis_title="Records", plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+            st.plotly_chart(days_fig, use_container_width=True)
+
+    # 🏫 Breakdown by college / program
+    breakdown = funnel['breakdown']
+    if breakdown is not None and not breakdown.empty:
+        st.subheader(f"🏫 Funnel by {breakdown.index.name}")
+        count_columns = [label for label in STAGE_LABELS.values() if label in breakdown.columns]
+        top = breakdown.head(15).reset_index()
+        breakdown_fig = px.bar(top, x=breakdown.index.name, y=count_columns, barmode='group',
+                               title=f"Top {len(top)} by Enquiries" if 'Enquiries' in count_columns else f"Top {len(top)}")
+        breakdown_fig.update_layout(yaxis_title="Records", plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(breakdown_fig, use_container_width=True)
+        st.dataframe(breakdown, use_container_width=True)
@@ -0,0 +1,219 @@
+"""
+Report Generator - static dashboard reports from the command line
+Loads the admission, applicant and enquiry datasets, builds every dashboard
+section for the default (unfiltered) selection and writes the charts as HTML,
+PNG or PDF files plus an index page. Sections are rendered in parallel by a
+process pool; no browser or Streamlit server is needed, so it can run from
+cron on a headless machine.
+
+Usage:
+    python generate_reports.py --enquiry enquiries.csv --output reports --format html --format pdf
+"""
+
+import argparse
+import glob
+import html
+import importlib.util
+import multiprocessing
+import numbers
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Sections are already rendered one per process; keep the analytics jobs inline
+os.environ.setdefault('ANALYTICS_WORKERS', '0')
+
+import pandas as pd
+import plotly.offline
+from plotly.basedatatypes import BaseFigure
+
+from admission_dashboard_module import (DEFAULT_DATA_FILE, ADMISSION_SECTIONS, load_admission_data,
+                                        default_admission_filters, apply_admission_filters, admission_section)
+from applicant_dashboard_module import (APPLICANT_DATA_GLOB, APPLICANT_SECTIONS, load_applicant_data,
+                                        default_applicant_filters, apply_applicant_filters, applicant_section)
+from enquiry_dashboard_module import (ENQUIRY_SECTIONS, DEFAULT_SECTION_PARAMS, load_enquiry_data,
+                                      default_enquiry_filters, apply_enquiry_filters, enquiry_section)
+
+REPORT_FORMATS = ['html', 'png', 'pdf']
+
+# Dashboard -> title, section registry, default filters, filter function, cached section builder
+DASHBOARDS = {
+    'admission': ("🏫 Admission Dashboard", ADMISSION_SECTIONS, default_admission_filters,
+                  apply_admission_filters, admission_section),
+    'applicant': ("🎓 Applicant Dashboard", APPLICANT_SECTIONS, default_applicant_filters,
+                  apply_applicant_filters, applicant_section),
+    'enquiry': ("📞 Enquiry Dashboard", ENQUIRY_SECTIONS, default_enquiry_filters,
+                apply_enquiry_filters, enquiry_section),
+}
+
+# Section parameters as first shown on the page
+SECTION_PARAMS = {
+    'enquiry': DEFAULT_SECTION_PARAMS,
+}
+
+# Datasets of the current worker process, set by the pool initializer
+_datasets = {}
+_selections = {}
+
+
+def image_export_available():
+    """PNG and PDF output need plotly's kaleido engine"""
+    return importlib.util.find_spec('kaleido') is not None
+
+
+def load_datasets(admission_file, applicant_pattern, enquiry_file):
+    """Load the datasets that are available; returns {dashboard: DataFrame} and a list of problems"""
+    datasets, problems = {}, []
+    try:
+        datasets['admission'] = load_admission_data(admission_file)
+    except Exception as e:
+        problems.append(f"admission: {e}")
+
+    applicant_files = sorted(glob.glob(applicant_pattern))
+    applicant_df = load_applicant_data(applicant_files, on_error=lambda source, e: problems.append(f"applicant {source}: {e}"))
+    if applicant_df.empty:
+        problems.append(f"applicant: no data in {applicant_pattern}")
+    else:
+        datasets['applicant'] = applicant_df
+
+    if enquiry_file:
+        try:
+            datasets['enquiry'] = load_enquiry_data(enquiry_file)
+        except Exception as e:
+            problems.append(f"enquiry: {e}")
+    else:
+        problems.append("enquiry: no file given (--enquiry)")
+    return datasets, problems
+
+
+def _init_worker(datasets):
+    _datasets.update(datasets)
+
+
+def _selection(dashboard):
+    """Default filter state and filtered rows of a dashboard (computed once per worker)"""
+    if dashboard not in _selections:
+        _, _, default_filters, apply_filters, _ = DASHBOARDS[dashboard]
+        df = _datasets[dashboard]
+        filters = default_filters(df)
+        _selections[dashboard] = (filters, apply_filters(df, filters))
+    return _selections[dashboard]
+
+
+def _section_html(title, section):
+    """Figures, tables and scalar values of a section as an HTML fragment"""
+    parts, values = [], []
+    for name, value in section.items():
+        if isinstance(value, BaseFigure):
+            parts.append(value.to_html(full_html=False, include_plotlyjs=False))
+        elif isinstance(value, pd.DataFrame):
+            parts.append(f"<h3>{html.escape(name.replace('_', ' ').title())}</h3>" + value.to_html(border=0))
+        elif isinstance(value, (numbers.Number, str)) and not isinstance(value, bool):
+            if isinstance(value, numbers.Integral):
+                value = f"{value:,}"
+            elif isinstance(value, numbers.Real):
+                value = f"{value:,.2f}"
+            values.append(f"<li><b>{html.escape(name.replace('_', ' ').title())}:</b> {html.escape(str(value))}</li>")
+    if values:
+        parts.insert(0, f"<ul>{''.join(values)}</ul>")
+    return (f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            f"<script src='plotly.min.js'></script></head><body><h1>{html.escape(title)}</h1>"
+            + "\n".join(parts) + "</body></html>")
+
+
+def render_section(dashboard, name, output_dir, formats):
+    """Build one dashboard section and write its report files; returns the written file names"""
+    title, _, _, _, build = DASHBOARDS[dashboard]
+    filters, filtered_df = _selection(dashboard)
+    params = SECTION_PARAMS.get(dashboard, {}).get(name, {})
+    section = build(name, _datasets[dashboard], filtered_df, filters, **params)
+
+    stem = f"{dashboard}_{name}"
+    written = []
+    if 'html' in formats:
+        path = os.path.join(output_dir, f"{stem}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(_section_html(f"{title} - {name.replace('_', ' ').title()}", section))
+        written.append(os.path.basename(path))
+    for fmt in ('png', 'pdf'):
+        if fmt not in formats:
+            continue
+        for figure_name, value in section.items():
+            if isinstance(value, BaseFigure):
+                path = os.path.join(output_dir, f"{stem}_{figure_name}.{fmt}")
+                value.write_image(path)
+                written.append(os.path.basename(path))
+    return written
+
+
+def write_index(output_dir, results, problems):
+    """Index page linking every section report"""
+    rows = []
+    for (dashboard, name), written in sorted(results.items()):
+        links = " ".join(f"<a href='{html.escape(file)}'>{html.escape(os.path.splitext(file)[1][1:])}</a>"
+                         for file in written if file.endswith('.html')) or f"{len(written)} files"
+        rows.append(f"<tr><td>{html.escape(DASHBOARDS[dashboard][0])}</td><td>{html.escape(name)}</td><td>{links}</td></tr>")
+    issues = "".join(f"<li>{html.escape(problem)}</li>" for problem in problems)
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write("<html><head><meta charset='utf-8'><title>Admission Analytics Reports</title></head><body>"
+                f"<h1>Admission Analytics Reports</h1><p>Generated {time.strftime('%Y-%m-%d %H:%M')}</p>"
+                f"<table><tr><th>Dashboard</th><th>Section</th><th>Report</th></tr>{''.join(rows)}</table>"
+                + (f"<h2>Problems</h2><ul>{issues}</ul>" if issues else "") + "</body></html>")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate static dashboard reports without a browser")
+    parser.add_argument('--admission', default=DEFAULT_DATA_FILE, help="admission CSV file")
+    parser.add_argument('--applicant', default=APPLICANT_DATA_GLOB, help="glob of applicant CSV files")
+    parser.add_argument('--enquiry', help="enquiry CSV file")
+    parser.add_argument('--dashboard', action='append', choices=list(DASHBOARDS),
+                        help="dashboards to report on (repeatable; default: all loaded)")
+    parser.add_argument('--format', action='append', choices=REPORT_FORMATS,
+                        help="output formats (repeatable; default: html)")
+    parser.add_argument('--output', default=os.path.join('reports', time.strftime('%Y-%m-%d')), help="output directory")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1), help="worker processes")
+    args = parser.parse_args(argv)
+
+    formats = set(args.format or ['html'])
+    if formats & {'png', 'pdf'} and not image_export_available():
+        parser.error("PNG/PDF output requires the kaleido package (pip install kaleido)")
+
+    datasets, problems = load_datasets(args.admission, args.applicant, args.enquiry)
+    if args.dashboard:
+        datasets = {name: df for name, df in datasets.items() if name in args.dashboard}
+    for problem in problems:
+        print(f"warning: {problem}", file=sys.stderr)
+    if not datasets:
+        print("error: no dataset could be loaded", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    if 'html' in formats:
+        with open(os.path.join(args.output, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+            f.write(plotly.offline.get_plotlyjs())
+
+    tasks = [(dashboard, name) for dashboard in datasets for name in DASHBOARDS[dashboard][1]]
+    results, failures = {}, 0
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(datasets,)) as pool:
+        futures = {pool.submit(render_section, dashboard, name, args.output, formats): (dashboard, name)
+                   for dashboard, name in tasks}
+        for future in as_completed(futures):
+            dashboard, name = futures[future]
+            try:
+                results[(dashboard, name)] = future.result()
+                print(f"{dashboard}/{name}: {len(results[(dashboard, name)])} files")
+            except Exception as e:
+                failures += 1
+                problems.append(f"{dashboard}/{name}: {e}")
+                print(f"error: {dashboard}/{name}: {e}", file=sys.stderr)
+
+    write_index(args.output, results, problems)
+    print(f"Wrote {len(results)} section reports to {args.output} in {time.time() - started:.1f}s")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
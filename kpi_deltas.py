@@ -0,0 +1,53 @@
+"""
+KPI Deltas - KPIs for any filter selection from a pre-aggregated cube
+A cube holds record counts per combination of the filter dimensions (plus any
+column needed for distinct counts). Once the cube of a dataset is cached, the
+KPIs of the current selection and of a comparison selection (the previous
+filter state or the previous data file) are both read from cubes, so showing
+a delta never scans the full frame again.
+"""
+
+import pandas as pd
+
+# Comparison windows offered next to the KPI cards
+COMPARISON_MODES = {
+    'previous_filters': "Previous filter selection",
+    'previous_file': "Previous data file",
+}
+
+
+def build_cube(df, dimensions):
+    """Record counts per combination of the given columns (missing values kept as their own cell)"""
+    dimensions = [col for col in dimensions if col in df.columns]
+    return df.groupby(dimensions, dropna=False, observed=True, sort=False).size().rename('records').reset_index()
+
+
+def slice_cube(cube, selections):
+    """Cube cells matching a {column: selected values} filter state"""
+    mask = pd.Series(True, index=cube.index)
+    for column, values in selections.items():
+        if column in cube.columns:
+            mask &= cube[column].isin(values)
+    return cube[mask]
+
+
+def kpi_deltas(current, previous):
+    """Difference of every numeric KPI against the comparison KPIs (None when unavailable)"""
+    if previous is None:
+        return {name: None for name in current}
+    return {
+        name: value - previous[name] if isinstance(value, (int, float)) and previous.get(name) is not None else None
+        for name, value in current.items()
+    }
+
+
+def track_previous(history, state):
+    """Remember the last state that differs from the current one; returns the previous state
+
+    history is a dict kept across reruns (e.g. in st.session_state) and state
+    any hashable value (e.g. a frozen filter state).
+    """
+    if history.get('current') != state:
+        history['previous'] = history.get('current')
+        history['current'] = state
+    return history.get('previous')
@@ -0,0 +1,213 @@
+"""
+Memory Optimizer - compact column types for loaded datasets, with a per-column report
+Loaded frames pass through optimize_frame before they are cached: text columns
+with many repeated values are interned as categoricals, the remaining text
+columns move to Arrow-backed strings (when pyarrow is installed), integer
+columns are downcast and whole-number float columns without gaps become
+integers. Other floats stay float64, so sums and means keep full precision.
+The before/after footprint of every column is kept per dataset for the
+performance panel.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pandas.api.types import union_categoricals
+
+import disk_cache
+
+
+def _arrow_string_dtype():
+    """Arrow-backed string dtype with NaN for missing values (like object columns), or None"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except TypeError:
+        # pandas < 2.3 spells it 'pyarrow_numpy' (2.1 and later only)
+        try:
+            return pd.StringDtype('pyarrow_numpy')
+        except (TypeError, ValueError):
+            return None
+
+
+ARROW_STRING_DTYPE = _arrow_string_dtype()
+
+# Text columns whose distinct values are at most this share of the rows become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+REPORT_COLUMNS = ['Column', 'Type before', 'Type after', 'Bytes before', 'Bytes after']
+
+_reports = {}
+_reports_lock = threading.Lock()
+
+
+def column_memory(df):
+    """Bytes used by each column (string contents included)"""
+    return df.memory_usage(deep=True, index=False)
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _optimize_text(series):
+    values = series.dropna()
+    if pd.api.types.is_object_dtype(series) and not values.map(lambda value: isinstance(value, str)).all():
+        # Mixed objects (numbers, dates, ...) keep their Python types
+        return series
+    if len(values) and series.nunique() <= CATEGORY_MAX_RATIO * len(series):
+        return series.astype('category')
+    if ARROW_STRING_DTYPE is not None and series.dtype != ARROW_STRING_DTYPE:
+        return series.astype(ARROW_STRING_DTYPE)
+    return series
+
+
+def _optimize_integer(series):
+    downcast = pd.to_numeric(series, downcast='integer')
+    return downcast if downcast.dtype.itemsize < series.dtype.itemsize else series
+
+
+def _optimize_float(series):
+    values = series.to_numpy()
+    present = values[~np.isnan(values)]
+    if len(present) == len(values) and len(values) and np.array_equal(present, np.round(present)):
+        # Whole numbers without gaps are stored as integers
+        if present.min() >= np.iinfo(np.int64).min and present.max() <= np.iinfo(np.int64).max:
+            return _optimize_integer(series.astype('int64'))
+    # float32 would make pandas sum and average the measures in single precision
+    return series
+
+
+def optimize_column(series):
+    """Smallest type that keeps every value of the column unchanged"""
+    if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(series) and isinstance(series.dtype, np.dtype):
+        return _optimize_integer(series)
+    if pd.api.types.is_float_dtype(series) and isinstance(series.dtype, np.dtype):
+        return _optimize_float(series)
+    if _is_text(series):
+        return _optimize_text(series)
+    return series
+
+
+def optimize_frame(df):
+    """Return (optimised copy of df, per-column memory report)"""
+    before = column_memory(df)
+    optimized = pd.DataFrame({column: optimize_column(df[column]) for column in df.columns}, index=df.index)
+    optimized.attrs = dict(df.attrs)
+    after = column_memory(optimized)
+    report = pd.DataFrame({
+        'Column': df.columns,
+        'Type before': [str(dtype) for dtype in df.dtypes],
+        'Type after': [str(dtype) for dtype in optimized.dtypes],
+        'Bytes before': before.to_numpy(),
+        'Bytes after': after.to_numpy(),
+    }, columns=REPORT_COLUMNS)
+    return optimized, report
+
+
+def _record_report(dashboard, key, report):
+    with _reports_lock:
+        _reports[(dashboard, key)] = report
+    disk_cache.store((dashboard, key, 'memory_report'), report)
+
+
+def optimize_dataset(dashboard, key, df):
+    """optimize_frame for a dataset about to be cached; the report is kept under its dataset key"""
+    optimized, report = optimize_frame(df)
+    _record_report(dashboard, key, report)
+    return optimized
+
+
+def concat_frames(frames):
+    """pd.concat of optimised frames that keeps categorical columns categorical (their categories are merged)"""
+    combined = pd.concat(frames, ignore_index=True)
+    for column in combined.columns:
+        parts = [frame[column] for frame in frames if column in frame.columns]
+        if len(parts) == len(frames) and all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            combined[column] = union_categoricals(parts, sort_categories=True)
+    return combined
+
+
+def record_combined_report(dashboard, key, reports, df):
+    """Report of a dataset concatenated from optimised parts: the parts' footprint before, the result's after"""
+    reports = [report for report in reports if report is not None]
+    after = column_memory(df)
+    parts = pd.concat(reports) if reports else pd.DataFrame(columns=REPORT_COLUMNS)
+    before = parts.groupby('Column', sort=False)['Bytes before'].sum()
+    types = parts.drop_duplicates('Column').set_index('Column')['Type before']
+    after_types = pd.Series([str(dtype) for dtype in df.dtypes], index=df.columns)
+    _record_report(dashboard, key, pd.DataFrame({
+        'Column': df.columns,
+        'Type before': types.reindex(df.columns).fillna(after_types).to_numpy(),
+        'Type after': after_types.to_numpy(),
+        # Columns added after the parts were optimised count at their current size
+        'Bytes before': before.reindex(df.columns).fillna(after).astype('int64').to_numpy(),
+        'Bytes after': after.to_numpy(),
+    }, columns=REPORT_COLUMNS))
+
+
+def value_counts(series):
+    """series.value_counts() with ties in first-appearance order
+
+    A categorical's value_counts orders ties by category instead, which would
+    reorder top-N lists compared with the text column (and the SQL backend).
+    """
+    codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    order = np.argsort(-counts, kind='stable')
+    return pd.Series(counts[order], index=pd.Index(np.asarray(uniques)[order], name=series.name), name='count')
+
+
+def drop_unused_categories(df):
+    """Forget the categories a filtered frame no longer contains, so counts and groupings list only present values"""
+    categorical = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return df
+    return df.assign(**{column: df[column].cat.remove_unused_categories() for column in categorical})
+
+
+def memory_report(dashboard, key):
+    """Report recorded when the dataset was optimised (None if it never was)"""
+    with _reports_lock:
+        report = _reports.get((dashboard, key))
+    if report is None and key is not None:
+        report = disk_cache.load((dashboard, key, 'memory_report'))
+        if report is not None:
+            with _reports_lock:
+                _reports[(dashboard, key)] = report
+    return report
+
+
+def memory_totals(report):
+    """(bytes before, bytes after, reduction factor) of a report"""
+    before, after = int(report['Bytes before'].sum()), int(report['Bytes after'].sum())
+    return before, after, before / after if after else np.nan
+
+
+def _megabytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def render_memory_panel(datasets):
+    """Performance panel: in-memory footprint of the loaded datasets, given as (label, dashboard, dataset key)"""
+    with st.sidebar.expander("⚙️ Performance"):
+        shown = False
+        for label, dashboard, key in datasets:
+            report = memory_report(dashboard, key) if key is not None else None
+            if report is None:
+                continue
+            shown = True
+            before, after, factor = memory_totals(report)
+            st.metric(f"{label} data in memory", _megabytes(after),
+                      f"{factor:.1f}x smaller than {_megabytes(before)}", delta_color="off")
+            table = report.assign(**{'Saved %': (100 * (1 - report['Bytes after'] / report['Bytes before'])).round(1)})
+            st.dataframe(table.sort_values('Bytes before', ascending=False), use_container_width=True, hide_index=True)
+        if not shown:
+            st.caption("Load a dataset to see its memory footprint.")
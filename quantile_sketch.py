@@ -0,0 +1,195 @@
+"""
+Quantile Sketch - mergeable t-digests per cube cell
+A digest summarises a column as a few dozen weighted centroids (small near
+the tails, larger in the middle), so p10/p50/p90 and box-plot statistics of
+any union of cells come from merging the cells' centroids instead of sorting
+the raw rows. Digests of all cells are built in one sorted NumPy pass; a
+sketch cube keeps them per combination of the filter dimensions and month,
+together with exact counts, sums and extremes.
+"""
+
+import numpy as np
+import pandas as pd
+
+# t-digest compression: about COMPRESSION / 2 centroids per digest
+COMPRESSION = 100
+
+# Statistics returned for every group
+DISTRIBUTION_COLUMNS = ['count', 'mean', 'min', 'p10', 'p25', 'p50', 'p75', 'p90', 'max',
+                        'lower_whisker', 'upper_whisker']
+
+# Statistic label -> column of a distribution table
+STATISTICS = {
+    'Mean': 'mean',
+    'Median': 'p50',
+    '10th percentile': 'p10',
+    '90th percentile': 'p90',
+}
+
+_PERCENTILES = {'p10': 0.10, 'p25': 0.25, 'p50': 0.50, 'p75': 0.75, 'p90': 0.90}
+
+
+def compress(cells, means, weights, compression=COMPRESSION):
+    """Merge centroids sorted by (cell, mean) into t-digest centroids per cell
+
+    Returns (cells, means, weights) of the merged centroids. Centroids of a
+    cell are grouped by the k1 scale function of their quantile, so every
+    merged centroid spans at most one unit of k.
+    """
+    if len(means) == 0:
+        return cells, means, weights
+    starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+    totals = np.add.reduceat(weights, starts)
+    lengths = np.diff(np.r_[starts, len(cells)])
+    cumulative = np.cumsum(weights)
+    before_cell = np.repeat(cumulative[starts] - weights[starts], lengths)
+    q = (cumulative - before_cell - weights / 2) / np.repeat(totals, lengths)
+    k = np.floor(compression / (2 * np.pi) * (np.arcsin(np.clip(2 * q - 1, -1, 1)) + np.pi / 2)).astype(np.int64)
+
+    buckets = cells.astype(np.int64) * (compression + 1) + k
+    bounds = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    merged_weights = np.add.reduceat(weights, bounds)
+    merged_means = np.add.reduceat(means * weights, bounds) / merged_weights
+    return cells[bounds], merged_means, merged_weights
+
+
+def build_digests(values, cells):
+    """t-digest centroids of values per integer cell code (NaN values are skipped)"""
+    values = np.asarray(values, dtype='float64')
+    cells = np.asarray(cells, dtype=np.int64)
+    valid = ~np.isnan(values)
+    values, cells = values[valid], cells[valid]
+    order = np.lexsort((values, cells))
+    return compress(cells[order], values[order], np.ones(len(values)))
+
+
+def merge_centroids(means, weights):
+    """One digest from the centroids of several cells"""
+    order = np.argsort(means, kind='stable')
+    _, means, weights = compress(np.zeros(len(means), dtype=np.int64), means[order], weights[order])
+    return means, weights
+
+
+def digest_quantiles(means, weights, quantiles, low, high):
+    """Approximate quantiles of a digest (low/high are the exact minimum and maximum)"""
+    total = weights.sum()
+    if total == 0:
+        return np.full(len(quantiles), np.nan)
+    # Each centroid sits at the middle of its weight; the extremes anchor both ends
+    positions = np.r_[0.0, np.cumsum(weights) - weights / 2, total]
+    values = np.r_[low, means, high]
+    return np.interp(np.asarray(quantiles) * total, positions, values)
+
+
+def digest_stats(means, weights, count, total, low, high):
+    """Distribution statistics of a digest: count, mean, percentiles and box whiskers"""
+    stats = {'count': int(count), 'mean': total / count if count else np.nan, 'min': low, 'max': high}
+    stats.update(zip(_PERCENTILES, digest_quantiles(means, weights, list(_PERCENTILES.values()), low, high)))
+    iqr = stats['p75'] - stats['p25']
+    stats['lower_whisker'] = max(low, stats['p25'] - 1.5 * iqr)
+    stats['upper_whisker'] = min(high, stats['p75'] + 1.5 * iqr)
+    return stats
+
+
+def _distribution_frame(rows, by):
+    frame = pd.DataFrame(rows, columns=([by] if by else []) + DISTRIBUTION_COLUMNS)
+    return frame.set_index(by) if by else frame
+
+
+def distribution_from_rows(frame, column, by=None):
+    """Exact distribution table of a column (per group of by) from raw rows"""
+    rows = []
+    groups = frame.groupby(by, sort=False, observed=True) if by else [(None, frame)]
+    for group, part in groups:
+        values = part[column].dropna()
+        if values.empty:
+            continue
+        stats = {'count': len(values), 'mean': values.mean(), 'min': values.min(), 'max': values.max()}
+        stats.update(zip(_PERCENTILES, values.quantile(list(_PERCENTILES.values())).to_numpy()))
+        iqr = stats['p75'] - stats['p25']
+        # Whiskers reach the most extreme values within 1.5 IQR of the box
+        stats['lower_whisker'] = values[values >= stats['p25'] - 1.5 * iqr].min()
+        stats['upper_whisker'] = values[values <= stats['p75'] + 1.5 * iqr].max()
+        rows.append(([group] if by else []) + [stats[name] for name in DISTRIBUTION_COLUMNS])
+    return _distribution_frame(rows, by)
+
+
+# ---------------------------------------------------------------------------
+# Sketch cube
+# ---------------------------------------------------------------------------
+
+def build_sketch_cube(df, dimensions, metrics, date_column=None):
+    """Digests, counts, sums and extremes of each metric per dimension combination (and month)
+
+    Cells record the first and last date they contain, so a date range can be
+    answered exactly whenever it covers whole cells.
+    """
+    dimensions = [column for column in dimensions if column in df.columns]
+    keys = [df[column] for column in dimensions]
+    if date_column is not None:
+        keys.append(df[date_column].dt.to_period('M').rename('_period'))
+    codes = df.groupby(keys, dropna=False, observed=True, sort=False).ngroup().to_numpy()
+
+    frame = pd.DataFrame({column: df[column].to_numpy() for column in dimensions})
+    frame['_cell'] = codes
+    if date_column is not None:
+        frame['_date'] = df[date_column].to_numpy()
+    grouped = frame.groupby('_cell', sort=True)
+    table = grouped[dimensions].first() if dimensions else pd.DataFrame(index=grouped.size().index)
+    table['_records'] = grouped.size()
+    if date_column is not None:
+        table['_first'] = grouped['_date'].min()
+        table['_last'] = grouped['_date'].max()
+
+    centroids = {}
+    for metric in metrics:
+        if metric not in df.columns:
+            continue
+        values = pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype='float64')
+        present = ~np.isnan(values)
+        grouped = pd.DataFrame({'cell': codes[present], 'value': values[present]}).groupby('cell')['value']
+        table[f'{metric}__count'] = grouped.size().reindex(table.index, fill_value=0)
+        table[f'{metric}__sum'] = grouped.sum().reindex(table.index, fill_value=0.0)
+        table[f'{metric}__min'] = grouped.min().reindex(table.index)
+        table[f'{metric}__max'] = grouped.max().reindex(table.index)
+        cell_codes, means, weights = build_digests(values, codes)
+        centroids[metric] = (cell_codes, means, weights)
+    return {'cells': table, 'dimensions': dimensions, 'dated': date_column is not None, 'centroids': centroids}
+
+
+def select_cells(cube, selections, date_range=None):
+    """Codes of the cells matching a selection, or None when a date range splits a cell"""
+    table = cube['cells']
+    mask = pd.Series(True, index=table.index)
+    for column, values in selections.items():
+        if column in table.columns:
+            mask &= table[column].isin(values)
+    if date_range is not None and cube['dated']:
+        start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+        inside = (table['_first'] >= start) & (table['_last'] <= end)
+        outside = (table['_last'] < start) | (table['_first'] > end) | table['_first'].isna()
+        if (mask & ~inside & ~outside).any():
+            return None
+        mask &= inside
+    return table.index[mask].to_numpy()
+
+
+def sketch_distribution(cube, cells, metric, by=None):
+    """Distribution table of a metric over the selected cells (per group of by), or None"""
+    if metric not in cube['centroids'] or (by is not None and by not in cube['dimensions']):
+        return None
+    table = cube['cells'].loc[cells]
+    table = table[table[f'{metric}__count'] > 0]
+    cell_codes, means, weights = cube['centroids'][metric]
+    selected = np.isin(cell_codes, table.index.to_numpy())
+    cell_codes, means, weights = cell_codes[selected], means[selected], weights[selected]
+
+    rows = []
+    groups = table.groupby(by, sort=False, observed=True) if by else [(None, table)]
+    for group, part in groups:
+        in_group = np.isin(cell_codes, part.index.to_numpy())
+        merged_means, merged_weights = merge_centroids(means[in_group], weights[in_group])
+        stats = digest_stats(merged_means, merged_weights, part[f'{metric}__count'].sum(), part[f'{metric}__sum'].sum(),
+                             part[f'{metric}__min'].min(), part[f'{metric}__max'].max())
+        rows.append(([group] if by else []) + [stats[name] for name in DISTRIBUTION_COLUMNS])
+    return _distribution_frame(rows, by)
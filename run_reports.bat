@@ -0,0 +1,18 @@
+@echo off
+echo Admission Analytics Suite - Report Generator
+echo ============================================
+
+REM Check if Python is installed
+python --version >nul 2>&1
+if %errorlevel% neq 0 (
+    echo Error: Python is not installed or not in PATH
+    echo Please install Python 3.8 or higher
+    pause
+    exit /b 1
+)
+
+REM Generate the reports (pass e.g. --enquiry enquiries.csv --format pdf)
+echo Generating dashboard reports...
+python generate_reports.py %*
+
+pause
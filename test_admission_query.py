@@ -0,0 +1,113 @@
+"""
+FrameQuery / SqlQuery parity: every admission section must come out the same
+from the filtered DataFrame and from the admission database.
+"""
+
+import os
+
+# The parity check must not be answered from a warm disk cache
+os.environ['ANALYTICS_CACHE_MB'] = '0'
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from admission_dashboard_module import (ADMISSION_SECTIONS, apply_admission_filters, default_admission_filters,
+                                        prepare_admission_frame, read_admission_source)
+from admission_query import FrameQuery, SqlQuery, build_admission_db
+
+ROWS = 3000
+
+
+def synthetic_admissions(path, rows=ROWS, seed=7):
+    """Admission CSV with tied counts, fractional incomes and missing values"""
+    rng = np.random.default_rng(seed)
+    admitted = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 300, rows), unit='D')
+    # Half-rupee incomes survive a float32 round trip, so a float32 column would go unnoticed otherwise
+    income = np.round(rng.uniform(100000, 2500000, rows) * 2) / 2
+    income[rng.random(rows) < 0.05] = np.nan
+    frame = pd.DataFrame({
+        'Date of Admission': admitted.strftime('%Y-%m-%d'),
+        'enquiry date': (admitted - pd.to_timedelta(rng.integers(0, 120, rows), unit='D')).strftime('%Y-%m-%d'),
+        'Date of Birth': (pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 3000, rows), unit='D'))
+        .strftime('%Y-%m-%d'),
+        'Gender': rng.choice(['Male', 'Female'], rows),
+        'Category': rng.choice(['GEN', 'OBC', 'SC', 'ST'], rows),
+        'Religion': rng.choice(['Hindu', 'Muslim', 'Sikh', 'Christian'], rows),
+        'Source': rng.choice(['Online', 'Agent', 'Walk-in'], rows),
+        'Student Status': rng.choice(['Active', 'Inactive', 'Left'], rows),
+        'erp20may_State': rng.choice(['UP', 'Bihar', 'Delhi', 'MP', 'Punjab'], rows),
+        # Few rows per programme, so the top-10 list has ties
+        'Programme Name': rng.choice([f'Prog {i}' for i in range(40)], rows),
+        'Program Level': rng.choice(['UG', 'PG', 'Diploma'], rows),
+        'Family Annual Income': income,
+        'Prequalification Percentage': np.round(rng.uniform(40, 99, rows), 2),
+    })
+    frame.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope='module')
+def backends(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('admissions')
+    source = synthetic_admissions(str(directory / 'admissions.csv'))
+    db_path = str(directory / 'admissions.db')
+    build_admission_db([source], db_path, prepare_admission_frame)
+    return read_admission_source(source), db_path
+
+
+def filter_states(df):
+    defaults = default_admission_filters(df)
+    low, high = defaults['income_range']
+    return {
+        'defaults': defaults,
+        'state': dict(defaults, state=['UP', 'Delhi']),
+        'category_status': dict(defaults, category=['OBC'], status=['Active', 'Left']),
+        'income': dict(defaults, income_range=(low + (high - low) // 4, high - (high - low) // 4)),
+        'dates': dict(defaults, date_range=(pd.Timestamp('2025-03-01').date(), pd.Timestamp('2025-07-31').date())),
+    }
+
+
+def _plotly_data(fig):
+    # Compare the plotted values, not the figure objects
+    return [{key: np.asarray(trace[key]) for key in ('x', 'y', 'values', 'labels', 'z')
+             if key in trace and trace[key] is not None} for trace in fig.data]
+
+
+def assert_same(frame_value, sql_value, path):
+    if hasattr(frame_value, 'to_plotly_json'):
+        frame_value, sql_value = _plotly_data(frame_value), _plotly_data(sql_value)
+    if isinstance(frame_value, dict):
+        assert set(frame_value) == set(sql_value), path
+        for key in frame_value:
+            assert_same(frame_value[key], sql_value[key], f"{path}.{key}")
+    elif isinstance(frame_value, (list, tuple)):
+        assert len(frame_value) == len(sql_value), path
+        for i, (left, right) in enumerate(zip(frame_value, sql_value)):
+            assert_same(left, right, f"{path}[{i}]")
+    elif isinstance(frame_value, pd.DataFrame):
+        pd.testing.assert_frame_equal(frame_value, sql_value, check_dtype=False, check_index_type=False,
+                                      check_column_type=False, check_categorical=False, obj=path)
+    elif isinstance(frame_value, pd.Series):
+        pd.testing.assert_series_equal(frame_value, sql_value, check_dtype=False, check_index_type=False,
+                                       check_categorical=False, obj=path)
+    elif isinstance(frame_value, np.ndarray) or isinstance(sql_value, np.ndarray):
+        left, right = np.asarray(frame_value), np.asarray(sql_value)
+        if left.dtype.kind in 'fiu' and right.dtype.kind in 'fiu':
+            np.testing.assert_allclose(left, right, rtol=1e-12, err_msg=path)
+        else:
+            assert left.astype(str).tolist() == right.astype(str).tolist(), path
+    elif isinstance(frame_value, (float, np.floating)) or isinstance(sql_value, (float, np.floating)):
+        assert frame_value == pytest.approx(sql_value, rel=1e-12, nan_ok=True), path
+    else:
+        assert frame_value == sql_value, path
+
+
+@pytest.mark.parametrize('state', ['defaults', 'state', 'category_status', 'income', 'dates'])
+@pytest.mark.parametrize('name', list(ADMISSION_SECTIONS))
+def test_sections_match_across_backends(backends, name, state):
+    df, db_path = backends
+    filters = filter_states(df)[state]
+    frame_section = ADMISSION_SECTIONS[name](FrameQuery(apply_admission_filters(df, filters)))
+    sql_section = ADMISSION_SECTIONS[name](SqlQuery(db_path, filters))
+    assert_same(frame_section, sql_section, name)
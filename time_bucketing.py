@@ -0,0 +1,115 @@
+"""
+Time Bucketing - dense count arrays for time-series charts
+Timestamps are mapped to integer bucket codes (hours, days, weeks or months
+since the epoch) and counted once with np.bincount into a dense array that
+covers every bucket between the first and last timestamp. Trend charts,
+hour-of-day profiles and rolling averages are all slices or folds of that array.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Granularities offered by the trend selector
+GRANULARITIES = {
+    'Hourly': 'h',
+    'Daily': 'D',
+    'Weekly': 'W',
+    'Monthly': 'M',
+}
+
+# Rolling-average window per granularity (one day, one week, four weeks, one quarter)
+ROLLING_WINDOWS = {
+    'h': 24,
+    'D': 7,
+    'W': 4,
+    'M': 3,
+}
+
+UNIT_LABELS = {
+    'h': 'Hour',
+    'D': 'Date',
+    'W': 'Week',
+    'M': 'Month',
+}
+
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+_WEEK_SHIFT_DAYS = 3
+
+_NS_PER_HOUR = 3600 * 10**9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+
+def bucket_codes(dates, unit='D'):
+    """Integer bucket code per timestamp and a validity mask"""
+    values = pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy(dtype='datetime64[ns]')
+    valid = ~np.isnat(values)
+    ns = values.astype(np.int64)
+    if unit == 'h':
+        codes = ns // _NS_PER_HOUR
+    elif unit == 'D':
+        codes = ns // _NS_PER_DAY
+    elif unit == 'W':
+        codes = (ns // _NS_PER_DAY + _WEEK_SHIFT_DAYS) // 7
+    elif unit == 'M':
+        codes = values.astype('datetime64[M]').astype(np.int64)
+    else:
+        raise ValueError(f"Unknown time bucket unit: {unit}")
+    return codes, valid
+
+
+def bucket_starts(first, count, unit='D'):
+    """Start timestamps of `count` consecutive buckets beginning at code `first`"""
+    codes = np.arange(first, first + count, dtype=np.int64)
+    if unit == 'h':
+        starts = codes.astype('datetime64[h]')
+    elif unit == 'D':
+        starts = codes.astype('datetime64[D]')
+    elif unit == 'W':
+        starts = (codes * 7 - _WEEK_SHIFT_DAYS).astype('datetime64[D]')
+    else:
+        starts = codes.astype('datetime64[M]')
+    return pd.DatetimeIndex(starts.astype('datetime64[ns]'))
+
+
+def time_buckets(dates, unit='D'):
+    """Dense counts per bucket between the first and last timestamp (None when empty)"""
+    codes, valid = bucket_codes(dates, unit)
+    codes = codes[valid]
+    if len(codes) == 0:
+        return None
+    first = int(codes.min())
+    counts = np.bincount(codes - first)
+    return {
+        'unit': unit,
+        'first': first,
+        'counts': counts,
+        'index': bucket_starts(first, len(counts), unit),
+    }
+
+
+def rolling_mean(counts, window):
+    """Trailing moving average via cumulative sums (partial windows at the start)"""
+    counts = np.asarray(counts, dtype='float64')
+    if len(counts) == 0 or window <= 1:
+        return counts
+    csum = np.concatenate(([0.0], np.cumsum(counts)))
+    positions = np.arange(1, len(counts) + 1)
+    lower = np.maximum(positions - window, 0)
+    return (csum[positions] - csum[lower]) / (positions - lower)
+
+
+def hour_of_day_counts(hourly):
+    """Fold an hourly bucket array into counts per hour of day (0-23)"""
+    hours = (hourly['first'] + np.arange(len(hourly['counts']))) % 24
+    return np.bincount(hours, weights=hourly['counts'], minlength=24).astype(np.int64)
+
+
+def year_month_counts(monthly):
+    """Non-empty months of a monthly bucket array as a Year/Month/Count frame"""
+    nonzero = monthly['counts'] > 0
+    starts = monthly['index'][nonzero]
+    return pd.DataFrame({
+        'Year': starts.year,
+        'Month': starts.month,
+        'Count': monthly['counts'][nonzero],
+    })
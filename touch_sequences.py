@@ -0,0 +1,151 @@
+"""
+Touch Sequences - every follow-up touch of every enquiry, sorted once
+Enquiry exports repeat an Enquiry No. for each time the enquiry was contacted.
+All touches are kept as flat arrays sorted once by (enquiry, timestamp), and
+every figure is read from neighbouring elements of those arrays: an enquiry
+starts where the code changes, the time since the previous touch is a shifted
+difference, touch counts are the distances between enquiry starts and the
+time to first response is the gap after each enquiry's first touch. Nothing
+loops or groups over the touches, so tens of millions of rows take seconds.
+"""
+
+import numpy as np
+import pandas as pd
+
+_NS_PER_HOUR = 3600 * 10**9
+
+# Touch counts from this value up share the last bar of the distribution
+MAX_TOUCH_BUCKET = 10
+
+# Follow-ups from this touch number up share the last point of the gap profile
+MAX_TOUCH_NUMBER = 6
+
+# First-response time bands (hours)
+RESPONSE_BANDS = [0, 1, 4, 12, 24, 48, 72, 168, np.inf]
+RESPONSE_LABELS = ['< 1 h', '1-4 h', '4-12 h', '12-24 h', '1-2 days', '2-3 days', '3-7 days', '> 7 days']
+
+# Share of first responses within this many hours is reported as the service level
+SERVICE_LEVEL_HOURS = 24
+
+
+def sort_touches(codes, times):
+    """Positions that sort touches by (enquiry code, time)
+
+    When the codes and the times (in steps of their common resolution, e.g.
+    whole minutes) fit in one int64 key, a single argsort of that key replaces
+    the two-key lexsort, which is several times slower.
+    """
+    if not len(codes):
+        return np.empty(0, dtype=np.int64)
+    offsets = times - times.min()
+    step = int(np.gcd.reduce(offsets)) or 1
+    span = int(offsets.max()) // step + 1
+    if (int(codes.max()) + 1) * span < np.iinfo(np.int64).max:
+        return np.argsort(codes.astype(np.int64) * span + offsets // step)
+    return np.lexsort((times, codes))
+
+
+def build_touch_sequences(df, id_column='Enquiry No.', time_column='Enquiry Date', attributes=()):
+    """Sort the touches of df once and derive the per-enquiry and per-follow-up arrays
+
+    Returns {'touches': number of touches, 'enquiries': one row per enquiry,
+    'follow_ups': {'enquiry', 'touch', 'gap_hours'} arrays}. The enquiry rows
+    carry the time of the first touch under time_column, the attributes of the
+    first touch, Last Touch, Touches and First Response Hours (NaN without a
+    follow-up). Touches without an id or a time are dropped.
+    """
+    codes, labels = pd.factorize(df[id_column])
+    times = pd.to_datetime(df[time_column], errors='coerce').to_numpy(dtype='datetime64[ns]')
+    valid = (codes >= 0) & ~np.isnat(times)
+    times = times.astype(np.int64)
+    positions = np.flatnonzero(valid)
+    order = positions[sort_touches(codes[positions], times[positions])]
+    codes, times = codes[order], times[order]
+
+    # A touch starts an enquiry where the code differs from the previous touch's
+    first = np.empty(len(codes), dtype=bool)
+    first[:1] = True
+    first[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(first)
+    touches = np.diff(np.r_[starts, len(codes)])
+    enquiry = np.cumsum(first) - 1
+
+    # Shifted difference: hours since the previous touch of the same enquiry
+    follow_up = ~first
+    gaps = np.diff(times) / _NS_PER_HOUR
+    follow_gaps = gaps[follow_up[1:]]
+    first_response = np.full(len(starts), np.nan)
+    responded = touches >= 2
+    first_response[responded] = (times[starts[responded] + 1] - times[starts[responded]]) / _NS_PER_HOUR
+
+    enquiries = pd.DataFrame({
+        id_column: np.asarray(labels)[codes[starts]],
+        time_column: times[starts].astype('datetime64[ns]'),
+        **{column: df[column].iloc[order[starts]].reset_index(drop=True) for column in attributes if column in df.columns},
+        'Last Touch': times[starts + touches - 1].astype('datetime64[ns]'),
+        'Touches': touches,
+        'First Response Hours': first_response,
+    })
+    follow_rows = np.flatnonzero(follow_up)
+    return {
+        'touches': len(codes),
+        'enquiries': enquiries,
+        'follow_ups': {
+            'enquiry': enquiry[follow_rows].astype(np.int32),
+            # 2 for the first follow-up, 3 for the next, ...
+            'touch': (follow_rows - starts[enquiry[follow_rows]] + 1).astype(np.int32),
+            'gap_hours': follow_gaps.astype(np.float32),
+        },
+    }
+
+
+def select_follow_ups(follow_ups, positions, enquiry_count):
+    """Follow-ups of the enquiries at the given row positions of the enquiry table"""
+    selected = np.zeros(enquiry_count, dtype=bool)
+    selected[positions] = True
+    keep = selected[follow_ups['enquiry']]
+    return {name: values[keep] for name, values in follow_ups.items()}
+
+
+def response_time_summary(enquiries, follow_ups, by=None):
+    """Response-time figures of a set of enquiries and their follow-ups"""
+    touches = enquiries['Touches'].to_numpy()
+    response = enquiries['First Response Hours'].to_numpy(dtype='float64')
+    response = response[~np.isnan(response)]
+    gaps = follow_ups['gap_hours'].astype('float64')
+    summary = {
+        'enquiries': len(enquiries),
+        'touches': int(touches.sum()),
+        'followed_up': len(response),
+        'median_first_response': float(np.median(response)) if len(response) else np.nan,
+        'mean_first_response': float(response.mean()) if len(response) else np.nan,
+        'p90_first_response': float(np.percentile(response, 90)) if len(response) else np.nan,
+        'within_service_level': float((response <= SERVICE_LEVEL_HOURS).mean()) if len(response) else np.nan,
+        'median_gap': float(np.median(gaps)) if len(gaps) else np.nan,
+    }
+
+    counts = np.bincount(np.minimum(touches, MAX_TOUCH_BUCKET), minlength=MAX_TOUCH_BUCKET + 1)[1:]
+    summary['touch_counts'] = pd.Series(counts, index=[str(n) for n in range(1, MAX_TOUCH_BUCKET)] +
+                                        [f"{MAX_TOUCH_BUCKET}+"], name='Enquiries')
+    bands = np.searchsorted(RESPONSE_BANDS, response, side='right') - 1
+    summary['response_bands'] = pd.Series(np.bincount(bands, minlength=len(RESPONSE_LABELS))[:len(RESPONSE_LABELS)],
+                                          index=RESPONSE_LABELS, name='Enquiries')
+
+    # Median hours before the 2nd, 3rd, ... touch
+    numbers = np.minimum(follow_ups['touch'], MAX_TOUCH_NUMBER)
+    present = np.unique(numbers)
+    summary['gap_by_touch'] = pd.Series([float(np.median(gaps[numbers == n])) for n in present],
+                                        index=[f"{n}+" if n == MAX_TOUCH_NUMBER else str(n) for n in present],
+                                        name='Median Hours', dtype='float64')
+
+    summary['by_group'] = None
+    if by is not None and by in enquiries.columns and len(enquiries):
+        summary['by_group'] = enquiries.groupby(by, observed=True).agg(**{
+            'Enquiries': ('Touches', 'size'),
+            'Avg Touches': ('Touches', 'mean'),
+            'Followed Up': ('First Response Hours', 'count'),
+            'Median First Response (h)': ('First Response Hours', 'median'),
+        }).sort_values('Enquiries', ascending=False)
+        summary['by_group']['Avg Touches'] = summary['by_group']['Avg Touches'].round(2)
+        summary['by_group']['Median First Response (h)'] = summary['by_group']['Median First Response (h)'].round(1)
+    return summary
@@ -0,0 +1,44 @@
+"""
+UI Fragments - partial reruns for dashboard panels
+A widget inside a fragment reruns only that fragment, so changing a filter in
+one dashboard leaves the other dashboards (and the page chrome) untouched.
+On Streamlit versions without st.fragment the panels are plain functions and
+every interaction reruns the whole app, as before.
+"""
+
+import streamlit as st
+
+# Session-state flag that is True only while the whole app script is running
+FULL_RUN_FLAG = 'full_app_run'
+
+
+def fragment(func=None, *, run_every=None):
+    """st.fragment when available, otherwise a no-op decorator"""
+    st_fragment = getattr(st, 'fragment', None)
+    decorator = st_fragment(run_every=run_every) if st_fragment is not None else (lambda f: f)
+    return decorator(func) if func is not None else decorator
+
+
+def begin_full_run():
+    """Call at the top of the app script"""
+    st.session_state[FULL_RUN_FLAG] = True
+
+
+def end_full_run():
+    """Call at the end of the app script"""
+    st.session_state[FULL_RUN_FLAG] = False
+
+
+def in_fragment_rerun():
+    """True while a single fragment is rerunning on its own"""
+    return not st.session_state.get(FULL_RUN_FLAG, True)
+
+
+def rerun_app_if_changed(before, after):
+    """Escalate a fragment rerun to a full rerun when shared state changed
+
+    Used when a fragment loads a new dataset that other panels (e.g. the
+    conversion funnel) depend on.
+    """
+    if before != after and in_fragment_rerun():
+        st.rerun(scope='app')